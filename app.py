@@ -2,13 +2,15 @@
 Application Streamlit - Gestion des Rapports de Maintenance
 Version avec authentification complète - navigation sidebar
 """
+import importlib
 import streamlit as st
-from ui import equipements, observations, telechargements, modifications, fiabilite, suppressions
-from ui import gestion_utilisateurs
-from data.data_manager import initialiser_fichiers
-from auth.auth import init_session_state, is_authenticated, check_permission, is_admin
+from auth.auth import init_session_state, is_authenticated, check_permission, is_admin, refresh_session_if_needed
 from auth.login_page import render_login_page, render_user_info
 from auth.permissions import Permission
+from data.sante import verifier_en_arriere_plan, etat_sante, OK, LENT, INDISPONIBLE
+from data.contexte import ouvrir_contexte
+from data.instrumentation import mesure
+from data.profilage import profiler_page
 
 # =============================================================================
 # CONFIGURATION
@@ -21,12 +23,58 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# =============================================================================
+# REGISTRE DES PAGES
+# =============================================================================
+
+# Nom affiché → (module UI, permission requise ; None = administrateur uniquement).
+# Les modules (et leurs dépendances : pandas, plotly, openpyxl, Supabase...)
+# ne sont importés qu'à la première ouverture de la page.
+PAGES = {
+    "📦 Équipements":    ("ui.equipements",          Permission.VOIR_EQUIPEMENTS),
+    "📝 Observations":   ("ui.observations",         Permission.VOIR_OBSERVATIONS),
+    "📥 Exports":        ("ui.telechargements",      Permission.EXPORTER_DONNEES),
+    "📤 Import mesures": ("ui.import_mesures",       Permission.AJOUTER_SUIVIS),
+    "✏️ Modifications":  ("ui.modifications",        Permission.MODIFIER_OBSERVATIONS),
+    "🔧 Fiabilité":      ("ui.fiabilite",            Permission.VOIR_OBSERVATIONS),
+    "🗑️ Suppressions":   ("ui.suppressions",         Permission.SUPPRIMER_OBSERVATIONS),
+    "👥 Utilisateurs":   ("ui.gestion_utilisateurs", None),
+    "⚡ Performance":    ("ui.performance",          None),
+}
+
+
+def page_accessible(permission) -> bool:
+    """Vérifie l'accès à une page (permission, ou administrateur si None)"""
+    return is_admin() if permission is None else check_permission(permission)
+
+
+def render_etat_connexion():
+    """Affiche dans la sidebar le dernier état connu de la base (sans appel réseau)"""
+    etat = etat_sante()
+
+    if etat["statut"] == OK:
+        st.caption(f"🟢 Base de données connectée ({etat['latence_ms']:.0f} ms)")
+    elif etat["statut"] == LENT:
+        st.caption(f"🟠 Base de données lente ({etat['latence_ms']:.0f} ms)")
+    elif etat["statut"] == INDISPONIBLE:
+        st.caption("🔴 Base de données injoignable")
+        if etat["coupe_circuit_ouvert"]:
+            st.warning("⚠️ Supabase ne répond pas : nouvelle tentative automatique dans quelques instants")
+        if etat["message"]:
+            st.caption(f"Détail : {etat['message']}")
+    else:
+        st.caption("⏳ Vérification de la base de données...")
+
+
 # =============================================================================
 # INITIALISATION
 # =============================================================================
 
 init_session_state()
-initialiser_fichiers()
+
+# Vérification de la connexion Supabase en arrière-plan (une sonde par processus,
+# statut mis en cache) : l'affichage n'attend jamais la base
+verifier_en_arriere_plan()
 
 # =============================================================================
 # INTERFACE PRINCIPALE
@@ -40,6 +88,9 @@ def main():
         render_login_page()
         st.stop()
 
+    # Jeton d'accès renouvelé avant expiration (sans appel réseau sinon)
+    refresh_session_if_needed()
+
     # Afficher profil (icône top-right + sidebar bas)
     render_user_info()
 
@@ -56,27 +107,15 @@ def main():
 
     with st.sidebar:
         st.markdown("### 📌 Navigation")
+        render_etat_connexion()
         st.markdown("---")
 
-    # Pages standard (filtrées par permission)
-    pages = {
-        "📦 Équipements":   Permission.VOIR_EQUIPEMENTS,
-        "📝 Observations":  Permission.VOIR_OBSERVATIONS,
-        "📥 Exports":       Permission.EXPORTER_DONNEES,
-        "✏️ Modifications": Permission.MODIFIER_OBSERVATIONS,
-        "🔧 Fiabilité": Permission.VOIR_OBSERVATIONS,
-        "🗑️ Suppressions":  Permission.SUPPRIMER_OBSERVATIONS,
-    }
-
+    # Pages filtrées par permission (Utilisateurs et Performance : administrateur uniquement)
     pages_accessibles = [
-        nom for nom, perm in pages.items()
-        if check_permission(perm)
+        nom for nom, (_, perm) in PAGES.items()
+        if page_accessible(perm)
     ]
 
-    # Ajouter l'onglet admin uniquement si l'utilisateur est administrateur
-    if is_admin():
-        pages_accessibles.append("👥 Utilisateurs")
-
     if not pages_accessibles:
         st.error("🔒 Aucune page accessible avec votre rôle.")
         st.stop()
@@ -104,22 +143,12 @@ def main():
     # AFFICHAGE DE LA PAGE ACTIVE
     # =============================================================================
 
-    page = st.session_state.page_active
-
-    if page == "📦 Équipements":
-        equipements.render()
-    elif page == "📝 Observations":
-        observations.render()
-    elif page == "📥 Exports":
-        telechargements.render()
-    elif page == "✏️ Modifications":
-        modifications.render()
-    elif page == "🔧 Fiabilité":        # ← AJOUT
-        fiabilite.render()              # ← AJOUT
-    elif page == "🗑️ Suppressions":
-        suppressions.render()
-    elif page == "👥 Utilisateurs":
-        gestion_utilisateurs.render()
+    # Contexte de données de cette exécution : chaque table lue au plus une fois
+    ctx = ouvrir_contexte()
+
+    module, _ = PAGES[st.session_state.page_active]
+    with mesure(f"page:{module}"), profiler_page(module):
+        importlib.import_module(module).render(ctx)
 
 
 if __name__ == "__main__":
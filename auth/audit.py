@@ -0,0 +1,245 @@
+"""
+Écriture asynchrone du journal d'audit
+File bornée vidée par un thread d'arrière-plan (insertions groupées), avec
+fichier de secours local si la base est indisponible et vidage à l'arrêt
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from data.resilience import ClientSurveille
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Nombre maximal d'entrées en attente en mémoire (au-delà : fichier de secours)
+TAILLE_FILE_AUDIT = int(os.getenv("TAILLE_FILE_AUDIT", "10000"))
+
+# Nombre d'entrées envoyées par requête INSERT
+TAILLE_LOT_AUDIT = int(os.getenv("TAILLE_LOT_AUDIT", "50"))
+
+# Délai maximal (secondes) avant envoi d'un lot incomplet
+INTERVALLE_ENVOI_AUDIT = float(os.getenv("INTERVALLE_ENVOI_AUDIT_S", "2"))
+
+# Fichier JSONL des entrées non envoyées (base indisponible), rejoué ensuite
+FICHIER_SECOURS_AUDIT = os.getenv(
+    "FICHIER_SECOURS_AUDIT",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                 "data", "audit_en_attente.jsonl")
+)
+
+
+# =============================================================================
+# ÉCRIVAIN D'AUDIT
+# =============================================================================
+
+class JournalAudit:
+    """
+    Écrivain du journal d'audit en arrière-plan
+
+    enregistrer() ne fait jamais d'appel réseau : l'entrée est déposée dans une
+    file bornée. Un thread démon regroupe les entrées et les insère par lots
+    (dès TAILLE_LOT_AUDIT entrées ou après INTERVALLE_ENVOI_AUDIT secondes).
+    En cas d'échec d'envoi ou de file pleine, les entrées sont ajoutées au
+    fichier de secours, rejoué dès que la base répond à nouveau.
+    """
+
+    def __init__(self):
+        self._file: queue.Queue = queue.Queue(maxsize=TAILLE_FILE_AUDIT)
+        self._thread: threading.Thread = None
+        self._verrou_thread = threading.Lock()
+        self._verrou_fichier = threading.Lock()
+        self._arret = threading.Event()
+        self._client: "ClientSurveille" = None
+
+    # ── API publique ─────────────────────────────────────────────────────────
+
+    def enregistrer(self, entree: Dict[str, Any]):
+        """
+        Dépose une entrée d'audit (non bloquant)
+
+        Args:
+            entree (dict): Ligne de la table audit_log
+        """
+        self._demarrer()
+        try:
+            self._file.put_nowait(entree)
+        except queue.Full:
+            self._ecrire_secours([entree])
+
+    def vider(self, delai: float = 5.0):
+        """
+        Envoie immédiatement toutes les entrées en attente (appelé à l'arrêt)
+
+        Args:
+            delai (float): Durée maximale consacrée à l'envoi (secondes)
+        """
+        self._arret.set()
+        if self._thread is not None:
+            self._thread.join(timeout=delai)
+        # Entrées restantes (thread absent ou interrompu) : envoi direct ou secours
+        restantes = self._prelever(TAILLE_FILE_AUDIT)
+        if restantes:
+            self._envoyer(restantes)
+
+    def en_attente(self) -> int:
+        """
+        Returns:
+            int: Nombre d'entrées en mémoire non encore envoyées
+        """
+        return self._file.qsize()
+
+    # ── Thread d'envoi ───────────────────────────────────────────────────────
+
+    def _demarrer(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._verrou_thread:
+            if self._thread is None or not self._thread.is_alive():
+                self._arret.clear()
+                self._thread = threading.Thread(
+                    target=self._boucle, name="journal-audit", daemon=True
+                )
+                self._thread.start()
+
+    def _boucle(self):
+        lot: List[Dict[str, Any]] = []
+        echeance = time.monotonic() + INTERVALLE_ENVOI_AUDIT
+
+        while True:
+            try:
+                lot.append(self._file.get(timeout=max(echeance - time.monotonic(), 0.05)))
+                lot.extend(self._prelever(TAILLE_LOT_AUDIT - len(lot)))
+            except queue.Empty:
+                pass
+
+            arret = self._arret.is_set()
+            if lot and (len(lot) >= TAILLE_LOT_AUDIT or time.monotonic() >= echeance or arret):
+                self._rejouer_secours()
+                self._envoyer(lot)
+                lot = []
+
+            if time.monotonic() >= echeance:
+                echeance = time.monotonic() + INTERVALLE_ENVOI_AUDIT
+                if not lot:
+                    self._rejouer_secours()
+
+            if arret and self._file.empty():
+                return
+
+    def _prelever(self, nb_max: int) -> List[Dict[str, Any]]:
+        """Retire sans attendre jusqu'à nb_max entrées de la file."""
+        entrees = []
+        while len(entrees) < nb_max:
+            try:
+                entrees.append(self._file.get_nowait())
+            except queue.Empty:
+                break
+        return entrees
+
+    def _envoyer(self, lot: List[Dict[str, Any]], secours: bool = True) -> int:
+        """
+        Insère un lot par sous-lots de TAILLE_LOT_AUDIT ; en cas d'échec (ou
+        coupe-circuit de la table ouvert), les entrées à partir du sous-lot en
+        échec sont ajoutées au fichier de secours (si secours)
+
+        Returns:
+            int: Nombre d'entrées insérées (début du lot)
+        """
+        debut = 0
+        try:
+            if self._client is None:
+                from data.resilience import configuration_supabase, creer_client
+                self._client = creer_client(*configuration_supabase())
+            for debut in range(0, len(lot), TAILLE_LOT_AUDIT):
+                self._client.table("audit_log").insert(lot[debut:debut + TAILLE_LOT_AUDIT]).execute()
+            return len(lot)
+        except Exception as e:
+            print(f"Erreur log audit (mis en attente locale) : {e}")
+            if secours:
+                self._ecrire_secours(lot[debut:])
+            return debut
+
+    # ── Fichier de secours ───────────────────────────────────────────────────
+
+    def _ecrire_secours(self, entrees: List[Dict[str, Any]]):
+        try:
+            with self._verrou_fichier:
+                os.makedirs(os.path.dirname(FICHIER_SECOURS_AUDIT), exist_ok=True)
+                with open(FICHIER_SECOURS_AUDIT, "a", encoding="utf-8") as f:
+                    for entree in entrees:
+                        f.write(json.dumps(entree, ensure_ascii=False, default=str) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+        except OSError as e:
+            print(f"Erreur écriture audit de secours : {e}")
+
+    def _rejouer_secours(self):
+        """
+        Renvoie les entrées du fichier de secours si la base est disponible
+
+        Le fichier n'est raccourci qu'après l'envoi, des seules entrées
+        insérées : un échec le laisse tel quel (aucune entrée dupliquée).
+        """
+        from data.resilience import coupe_circuit
+
+        if coupe_circuit("audit_log").est_ouvert() or not os.path.exists(FICHIER_SECOURS_AUDIT):
+            return
+
+        with self._verrou_fichier:
+            try:
+                with open(FICHIER_SECOURS_AUDIT, "rb") as f:
+                    contenu = f.read()
+            except OSError:
+                return
+
+        entrees, fins = [], []  # fins : position dans le fichier après chaque entrée
+        position = 0
+        for ligne in contenu.splitlines(keepends=True):
+            position += len(ligne)
+            try:
+                entrees.append(json.loads(ligne))
+                fins.append(position)
+            except ValueError:
+                continue  # ligne tronquée (arrêt brutal pendant l'écriture)
+
+        nb_envoyees = self._envoyer(entrees, secours=False) if entrees else 0
+        if nb_envoyees == len(entrees):
+            self._retirer_secours(len(contenu))
+        elif nb_envoyees:
+            self._retirer_secours(fins[nb_envoyees - 1])
+
+    def _retirer_secours(self, nb_octets: int):
+        """
+        Retire les nb_octets premiers octets du fichier de secours (entrées
+        envoyées) ; les entrées ajoutées pendant l'envoi sont conservées
+        """
+        try:
+            with self._verrou_fichier:
+                with open(FICHIER_SECOURS_AUDIT, "rb") as f:
+                    f.seek(nb_octets)
+                    reste = f.read()
+                if not reste:
+                    os.remove(FICHIER_SECOURS_AUDIT)
+                    return
+                temporaire = FICHIER_SECOURS_AUDIT + ".tmp"
+                with open(temporaire, "wb") as f:
+                    f.write(reste)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temporaire, FICHIER_SECOURS_AUDIT)
+        except OSError as e:
+            print(f"Erreur écriture audit de secours : {e}")
+
+
+# Instance unique du processus
+journal_audit = JournalAudit()
+atexit.register(journal_audit.vider)
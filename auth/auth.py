@@ -5,30 +5,56 @@ Gestion des utilisateurs avec 4 rôles : Admin, Analyste, Technicien, Autre
 
 import streamlit as st
 import os
-from supabase import create_client, Client
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, FrozenSet, TYPE_CHECKING
+from auth.audit import journal_audit
 from auth.permissions import (
     Permission, 
-    has_permission, 
+    resolve_permissions,
     get_permission_error_message,
     get_role_label,
     get_role_icon,
     get_all_roles
 )
 
+from data.instrumentation import instrumenter
+from data.resilience import configuration_supabase, creer_client
+
+if TYPE_CHECKING:
+    from data.resilience import ClientSurveille
+
 
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+# Durée de validité du profil utilisateur mis en cache à la connexion (secondes)
+DUREE_CACHE_PROFIL = int(os.getenv("DUREE_CACHE_PROFIL_S", "120"))
+
+# Marge avant expiration du jeton d'accès déclenchant son rafraîchissement (secondes)
+MARGE_RAFRAICHISSEMENT_JWT = 60
+
+# Pause avant un nouvel essai après un échec transitoire du rafraîchissement (secondes)
+PAUSE_RAFRAICHISSEMENT_JWT = 30
 
+# Profils actifs récemment lus : {email: (horodatage, ligne users)}
+_cache_profils: Dict[str, Tuple[float, Dict]] = {}
+_verrou_profils = threading.Lock()
 
-def get_supabase_client() -> Client:
-    """Crée et retourne le client Supabase"""
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+# Écritures différées de la connexion (dernière connexion)
+_executeur_connexion = ThreadPoolExecutor(max_workers=4, thread_name_prefix="connexion")
+
+
+def get_supabase_client() -> "ClientSurveille":
+    """
+    Crée et retourne le client Supabase (SDK importé au premier appel), avec
+    délai maximal par requête et coupe-circuit par table (data/resilience.py) ;
+    même configuration que data_manager (environnement, puis secrets)
+    """
+    return creer_client(*configuration_supabase())
 
 
 # =============================================================================
@@ -51,6 +77,10 @@ def init_session_state():
         st.session_state.user_name = None
     if 'user_departement' not in st.session_state:
         st.session_state.user_departement = None
+    if 'user_permissions' not in st.session_state:
+        st.session_state.user_permissions = None
+    if 'auth_session' not in st.session_state:
+        st.session_state.auth_session = None
     # ✅ FIX : initialisation de show_profile manquante
     if 'show_profile' not in st.session_state:
         st.session_state.show_profile = False
@@ -94,9 +124,39 @@ def get_user_name() -> str:
 # VÉRIFICATION DES PERMISSIONS
 # =============================================================================
 
+def set_user_role(role: str):
+    """
+    Change le rôle de la session et recalcule ses permissions
+
+    Args:
+        role (str): Nouveau rôle
+    """
+    st.session_state.user_role = role
+    st.session_state.user_permissions = resolve_permissions(role)
+
+
+def get_user_permissions() -> FrozenSet[Permission]:
+    """
+    Retourne les permissions de l'utilisateur actuel, résolues une fois par
+    session (à la connexion ou au changement de rôle)
+
+    Returns:
+        FrozenSet[Permission]: Permissions (vide si non authentifié)
+    """
+    if not is_authenticated():
+        return frozenset()
+
+    permissions = st.session_state.get('user_permissions')
+    if permissions is None:
+        set_user_role(get_user_role())
+        permissions = st.session_state.user_permissions
+    return permissions
+
+
 def check_permission(permission: Permission) -> bool:
     """
-    Vérifie si l'utilisateur actuel a une permission
+    Vérifie si l'utilisateur actuel a une permission (test O(1) sur
+    l'ensemble résolu à la connexion)
 
     Args:
         permission (Permission): Permission à vérifier
@@ -104,11 +164,25 @@ def check_permission(permission: Permission) -> bool:
     Returns:
         bool: True si l'utilisateur a la permission
     """
-    if not is_authenticated():
-        return False
+    return permission in get_user_permissions()
 
-    role = get_user_role()
-    return has_permission(role, permission)
+
+def widget_permission(permission: Permission) -> Dict[str, Any]:
+    """
+    Arguments d'un widget d'action selon la permission de l'utilisateur :
+    le widget reste affiché mais désactivé, avec le motif en info-bulle
+
+    Exemple : st.button("🗑️ Supprimer", **widget_permission(Permission.SUPPRIMER_SUIVIS))
+
+    Args:
+        permission (Permission): Permission requise par l'action
+
+    Returns:
+        dict: {} si autorisé, sinon {"disabled": True, "help": message}
+    """
+    if check_permission(permission):
+        return {}
+    return {"disabled": True, "help": get_permission_error_message(permission)}
 
 
 def require_permission(permission: Permission, show_error: bool = True) -> bool:
@@ -150,10 +224,132 @@ def is_technicien() -> bool:
 # AUTHENTIFICATION
 # =============================================================================
 
+def _lire_profil(client: "ClientSurveille", email: str) -> Optional[Dict]:
+    """
+    Lit le profil actif d'un utilisateur authentifié (table users), via le
+    cache si récent
+
+    À n'appeler qu'après une authentification réussie : la lecture passe par
+    le client qui porte le jeton de la session (aucune lecture anonyme de la
+    table users), et seuls les profils de comptes authentifiés sont mis en cache.
+
+    Args:
+        client (ClientSurveille): Client connecté (après sign_in_with_password)
+        email (str): Email de l'utilisateur
+
+    Returns:
+        dict: Ligne de la table users, None si compte inconnu ou désactivé
+    """
+    with _verrou_profils:
+        entree = _cache_profils.get(email)
+    if entree and time.monotonic() - entree[0] < DUREE_CACHE_PROFIL:
+        return entree[1]
+
+    result = client.table('users')\
+        .select('*')\
+        .eq('email', email)\
+        .eq('actif', True)\
+        .execute()
+    profil = result.data[0] if result.data else None
+
+    if profil:
+        with _verrou_profils:
+            _cache_profils[email] = (time.monotonic(), profil)
+    return profil
+
+
+def invalidate_profile_cache(email: Optional[str] = None):
+    """
+    Retire un profil du cache (après modification du compte), ou tout le cache
+
+    Args:
+        email (str, optional): Email du compte modifié ; None pour tout vider
+    """
+    with _verrou_profils:
+        if email is None:
+            _cache_profils.clear()
+        else:
+            _cache_profils.pop(email, None)
+
+
+def _enregistrer_derniere_connexion(client: "ClientSurveille", email: str, horodatage: str):
+    """Met à jour derniere_connexion avec le client connecté (en arrière-plan, non critique)."""
+    try:
+        client.table('users').update({
+            'derniere_connexion': horodatage
+        }).eq('email', email).execute()
+    except Exception as e:
+        print(f"Erreur mise à jour dernière connexion : {e}")
+
+
+def _memoriser_session(session):
+    """Conserve les jetons de la session Supabase Auth pour leur rafraîchissement."""
+    if session is None:
+        return
+    st.session_state.auth_session = {
+        'access_token': session.access_token,
+        'refresh_token': session.refresh_token,
+        'expires_at': session.expires_at,
+    }
+
+
+def _est_jeton_refuse(erreur: Exception) -> bool:
+    """
+    Indique si le service Auth a refusé le jeton de rafraîchissement (révoqué,
+    déjà utilisé, expiré) : erreur 4xx hors 429, inutile de réessayer
+
+    Args:
+        erreur (Exception): Exception levée par refresh_session
+
+    Returns:
+        bool: True si l'utilisateur doit se reconnecter
+    """
+    statut = getattr(erreur, "status", None)
+    return isinstance(statut, int) and 400 <= statut < 500 and statut != 429
+
+
+def refresh_session_if_needed():
+    """
+    Rafraîchit le jeton d'accès de l'utilisateur s'il expire bientôt
+    (à appeler à chaque exécution de l'application, sans coût sinon)
+
+    Sans date d'expiration connue, le jeton n'est pas rafraîchi. Un jeton de
+    rafraîchissement refusé déconnecte l'utilisateur ; après un échec
+    transitoire, le nouvel essai attend PAUSE_RAFRAICHISSEMENT_JWT secondes.
+    """
+    auth_session = st.session_state.get('auth_session')
+    if not is_authenticated() or not auth_session:
+        return
+
+    expires_at = auth_session.get('expires_at')
+    if not expires_at or expires_at - time.time() > MARGE_RAFRAICHISSEMENT_JWT:
+        return
+    if time.time() < st.session_state.get('auth_rafraichir_apres', 0):
+        return
+
+    try:
+        response = get_supabase_client().auth.refresh_session(auth_session['refresh_token'])
+        _memoriser_session(response.session)
+        st.session_state.pop('auth_rafraichir_apres', None)
+    except Exception as e:
+        if _est_jeton_refuse(e):
+            st.session_state.auth_session = None
+            logout("🔒 Votre session a expiré : veuillez vous reconnecter")
+            return
+        st.session_state.auth_rafraichir_apres = time.time() + PAUSE_RAFRAICHISSEMENT_JWT
+        st.error(f"❌ Erreur rafraîchissement session (nouvel essai dans "
+                 f"{PAUSE_RAFRAICHISSEMENT_JWT} s) : {e}")
+
+
+@instrumenter()
 def login(email: str, password: str) -> Tuple[bool, str, Optional[Dict]]:
     """
     Authentifie un utilisateur
 
+    Le profil (table users, ou cache récent) n'est lu qu'une fois
+    l'authentification réussie, avec le jeton de la session ; la mise à jour
+    de derniere_connexion et l'audit sont écrits en arrière-plan.
+
     Args:
         email (str): Email de l'utilisateur
         password (str): Mot de passe
@@ -171,15 +367,9 @@ def login(email: str, password: str) -> Tuple[bool, str, Optional[Dict]]:
         })
 
         if response.user:
-            # Récupérer les informations complémentaires depuis la table users
-            user_info = supabase.table('users')\
-                .select('*')\
-                .eq('email', email)\
-                .eq('actif', True)\
-                .single()\
-                .execute()
-
-            if not user_info.data:
+            profil = _lire_profil(supabase, email)
+
+            if not profil:
                 # Compte désactivé ou non trouvé
                 supabase.auth.sign_out()
                 return False, "❌ Compte désactivé ou non autorisé", None
@@ -187,30 +377,26 @@ def login(email: str, password: str) -> Tuple[bool, str, Optional[Dict]]:
             # Mettre à jour la session
             st.session_state.authenticated = True
             st.session_state.user = response.user
-            st.session_state.user_id = user_info.data.get('id')
+            st.session_state.user_id = profil.get('id')
             st.session_state.user_email = email
-            st.session_state.user_role = user_info.data.get('role', 'autre')
-            st.session_state.user_name = user_info.data.get('nom_complet', email)
-            st.session_state.user_departement = user_info.data.get('departement', '')
-
-            # Enregistrer la dernière connexion et l'action dans l'audit
-            try:
-                supabase.table('users').update({
-                    'derniere_connexion': datetime.now().isoformat()
-                }).eq('email', email).execute()
-
-                # Log dans audit
-                log_action('connexion', 'users', user_info.data.get('id'), {
-                    'email': email,
-                    'success': True
-                })
-            except:
-                pass  # Non critique
+            set_user_role(profil.get('role', 'autre'))
+            st.session_state.user_name = profil.get('nom_complet', email)
+            st.session_state.user_departement = profil.get('departement', '')
+            _memoriser_session(response.session)
+
+            # Dernière connexion et audit : écrits en arrière-plan (non critiques)
+            _executeur_connexion.submit(
+                _enregistrer_derniere_connexion, supabase, email, datetime.now().isoformat()
+            )
+            log_action('connexion', 'users', profil.get('id'), {
+                'email': email,
+                'success': True
+            })
 
             role_icon = get_role_icon(st.session_state.user_role)
             role_label = get_role_label(st.session_state.user_role)
 
-            return True, f"✅ Bienvenue {st.session_state.user_name} ! ({role_icon} {role_label})", user_info.data
+            return True, f"✅ Bienvenue {st.session_state.user_name} ! ({role_icon} {role_label})", profil
         else:
             return False, "❌ Identifiants incorrects", None
 
@@ -234,8 +420,13 @@ def login(email: str, password: str) -> Tuple[bool, str, Optional[Dict]]:
             return False, f"❌ Erreur de connexion : {error_msg}", None
 
 
-def logout():
-    """Déconnecte l'utilisateur"""
+def logout(message: str = None):
+    """
+    Déconnecte l'utilisateur
+
+    Args:
+        message (str, optional): Message affiché sur la page de connexion
+    """
     # Log déconnexion
     try:
         if is_authenticated():
@@ -256,6 +447,8 @@ def logout():
         del st.session_state[key]
 
     init_session_state()
+    if message:
+        st.session_state.message_connexion = message
     st.rerun()
 
 
@@ -360,6 +553,11 @@ def update_user_role(email: str, new_role: str) -> Tuple[bool, str]:
         supabase.table('users').update({
             'role': new_role
         }).eq('email', email).execute()
+        invalidate_profile_cache(email)
+
+        # Rôle de la session courante modifié : permissions recalculées
+        if email == get_user_email():
+            set_user_role(new_role)
 
         # Log action
         log_action('modification_role', 'users', None, {
@@ -392,6 +590,7 @@ def deactivate_user(email: str) -> Tuple[bool, str]:
         supabase.table('users').update({
             'actif': False
         }).eq('email', email).execute()
+        invalidate_profile_cache(email)
 
         # Log action
         log_action('desactivation_utilisateur', 'users', None, {
@@ -416,6 +615,7 @@ def reactivate_user(email: str) -> Tuple[bool, str]:
         supabase.table('users').update({
             'actif': True
         }).eq('email', email).execute()
+        invalidate_profile_cache(email)
 
         # Log action
         log_action('reactivation_utilisateur', 'users', None, {
@@ -449,6 +649,7 @@ def delete_user(email: str) -> Tuple[bool, str]:
 
         # Supprimer de la table users
         supabase.table('users').delete().eq('email', email).execute()
+        invalidate_profile_cache(email)
 
         return True, f"✅ Utilisateur {email} supprimé définitivement"
 
@@ -546,7 +747,8 @@ def log_action(
     details: Optional[Dict[str, Any]] = None
 ):
     """
-    Enregistre une action dans le journal d'audit
+    Enregistre une action dans le journal d'audit (non bloquant : l'insertion
+    est faite par lots en arrière-plan, voir auth/audit.py)
 
     Args:
         action (str): Type d'action (connexion, creation, modification, etc.)
@@ -558,8 +760,7 @@ def log_action(
         if not is_authenticated():
             return
 
-        supabase = get_supabase_client()
-
+        # Données de session lues ici (thread de l'utilisateur), envoi en arrière-plan
         audit_data = {
             'user_id': st.session_state.get('user_id'),
             'email': get_user_email(),
@@ -570,26 +771,71 @@ def log_action(
             'timestamp': datetime.now().isoformat()
         }
 
-        supabase.table('audit_log').insert(audit_data).execute()
+        journal_audit.enregistrer(audit_data)
 
     except Exception as e:
         print(f"Erreur log audit : {e}")
         pass
 
 
-def get_audit_logs(limit: int = 100) -> list:
-    """Récupère les logs d'audit (admin uniquement)"""
+def get_audit_logs(
+    limit: int = 100,
+    avant: Optional[tuple] = None,
+    email: Optional[str] = None,
+    action: Optional[str] = None,
+    table_name: Optional[str] = None,
+    date_debut: Optional[str] = None,
+    date_fin: Optional[str] = None
+) -> list:
+    """
+    Récupère une page du journal d'audit, du plus récent au plus ancien (admin uniquement)
+
+    Pagination par curseur (timestamp, id) : la page suivante s'obtient en
+    passant le timestamp et l'id de la dernière ligne reçue dans `avant` ; l'id
+    départage les entrées de même timestamp (aucune n'est sautée entre deux
+    pages). Le filtrage et le tri sont faits par la base (index
+    audit_log_timestamp_id_idx, voir data/supabase.sql).
+
+    Args:
+        limit (int): Nombre maximal de lignes retournées
+        avant (tuple, optional): Curseur (timestamp, id) : ne retourner que les
+            entrées qui le suivent dans l'ordre (timestamp, id) décroissant
+        email (str, optional): Filtre sur l'utilisateur
+        action (str, optional): Filtre sur le type d'action
+        table_name (str, optional): Filtre sur la table concernée
+        date_debut (str, optional): Borne inférieure incluse (ISO)
+        date_fin (str, optional): Borne supérieure exclue (ISO)
+
+    Returns:
+        list: Entrées d'audit (dicts), vide en cas d'erreur
+    """
     if not check_permission(Permission.VOIR_AUDIT):
         return []
 
     try:
         supabase = get_supabase_client()
-        result = supabase.table('audit_log')\
-            .select('*')\
-            .order('timestamp', desc=True)\
-            .limit(limit)\
-            .execute()
+        query = supabase.table('audit_log').select('*')
+
+        if email:
+            query = query.eq('email', email)
+        if action:
+            query = query.eq('action', action)
+        if table_name:
+            query = query.eq('table_name', table_name)
+        if date_debut:
+            query = query.gte('timestamp', date_debut)
+        if date_fin:
+            query = query.lt('timestamp', date_fin)
+        if avant:
+            horodatage, id_ligne = avant
+            query = query.or_(
+                f'timestamp.lt."{horodatage}",'
+                f'and(timestamp.eq."{horodatage}",id.lt.{int(id_ligne)})'
+            )
+
+        result = query.order('timestamp', desc=True).order('id', desc=True) \
+            .limit(limit).execute()
         return result.data if result.data else []
     except Exception as e:
         st.error(f"Erreur chargement audit : {e}")
-        return []
\ No newline at end of file
+        return []
@@ -196,6 +196,11 @@ def render_login_page():
             </div>
         ''', unsafe_allow_html=True)
 
+        # Motif de la déconnexion (ex. session expirée)
+        message = st.session_state.pop("message_connexion", None)
+        if message:
+            st.warning(message)
+
         # Carte blanche pour le formulaire
         st.markdown('<div class="login-card">', unsafe_allow_html=True)
 
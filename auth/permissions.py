@@ -4,7 +4,7 @@ Définit les permissions pour chaque rôle
 """
 
 from enum import Enum
-from typing import List, Dict
+from typing import List, Dict, FrozenSet
 
 
 class Role(Enum):
@@ -164,6 +164,25 @@ ROLE_METADATA = {
 }
 
 
+# Permissions indexées par nom de rôle (ensembles figés : test d'appartenance en O(1))
+_PERMISSIONS_PAR_ROLE: Dict[str, FrozenSet[Permission]] = {
+    role.value: frozenset(permissions) for role, permissions in ROLE_PERMISSIONS.items()
+}
+
+
+def resolve_permissions(role: str) -> FrozenSet[Permission]:
+    """
+    Résout l'ensemble des permissions d'un rôle (calculé une fois à la connexion)
+
+    Args:
+        role (str): Nom du rôle
+
+    Returns:
+        FrozenSet[Permission]: Permissions du rôle (vide si rôle inconnu)
+    """
+    return _PERMISSIONS_PAR_ROLE.get(role, frozenset())
+
+
 def has_permission(role: str, permission: Permission) -> bool:
     """
     Vérifie si un rôle a une permission spécifique
@@ -175,11 +194,7 @@ def has_permission(role: str, permission: Permission) -> bool:
     Returns:
         bool: True si le rôle a la permission
     """
-    try:
-        role_enum = Role(role)
-        return permission in ROLE_PERMISSIONS.get(role_enum, [])
-    except ValueError:
-        return False
+    return permission in resolve_permissions(role)
 
 
 def get_role_permissions(role: str) -> List[Permission]:
@@ -0,0 +1,139 @@
+"""
+Backend Supabase en mémoire pour les benchmarks
+
+Reproduit la partie de l'API du client supabase-py utilisée par les
+lectures de l'application (table().select().eq()/in_()/gte()/lte()
+.order().range().limit().execute()) et par les insertions
+(table().insert().execute()) sur des DataFrames locaux. Chaque page
+est renvoyée, comme par PostgREST, sous forme de liste de dicts (conversion
+à la charge du benchmark, comme le décodage JSON en production).
+
+Une latence réseau par requête peut être simulée (latence_ms).
+"""
+
+import threading
+import time
+
+import pandas as pd
+
+
+class _Reponse:
+    def __init__(self, data: list, count: int = None):
+        self.data = data
+        self.count = count
+
+
+class _Requete:
+    """Requête SELECT (ou INSERT) sur une table en mémoire."""
+
+    def __init__(self, backend: "BackendMemoire", table: str):
+        self._backend = backend
+        self._table = table
+        self._colonnes = None
+        self._masques = []
+        self._ordre = None
+        self._debut, self._fin = 0, None
+        self._compter = False
+        self._insertion = None
+
+    def insert(self, lignes):
+        self._insertion = lignes if isinstance(lignes, list) else [lignes]
+        return self
+
+    def select(self, colonnes: str = "*", count: str = None):
+        if colonnes.strip() != "*":
+            self._colonnes = [c.strip() for c in colonnes.split(",")]
+        self._compter = count is not None
+        return self
+
+    def _filtre(self, colonne: str, masque):
+        self._masques.append((colonne, masque))
+        return self
+
+    def eq(self, colonne: str, valeur):
+        return self._filtre(colonne, lambda s: s == valeur)
+
+    def in_(self, colonne: str, valeurs):
+        return self._filtre(colonne, lambda s: s.isin(list(valeurs)))
+
+    def gte(self, colonne: str, valeur):
+        return self._filtre(colonne, lambda s: s >= valeur)
+
+    def lte(self, colonne: str, valeur):
+        return self._filtre(colonne, lambda s: s <= valeur)
+
+    def lt(self, colonne: str, valeur):
+        return self._filtre(colonne, lambda s: s < valeur)
+
+    def order(self, colonne: str, desc: bool = False):
+        self._ordre = (colonne, desc)
+        return self
+
+    def range(self, debut: int, fin: int):
+        self._debut, self._fin = debut, fin + 1
+        return self
+
+    def limit(self, nb: int):
+        self._fin = self._debut + nb
+        return self
+
+    def execute(self) -> _Reponse:
+        if self._backend.latence_ms:
+            time.sleep(self._backend.latence_ms / 1000)
+        self._backend.nb_requetes += 1
+
+        if self._insertion is not None:
+            self._backend.inserer(self._table, self._insertion)
+            return _Reponse([dict(ligne) for ligne in self._insertion])
+
+        df = self._backend.trie(self._table, self._ordre)
+        for colonne, masque in self._masques:
+            df = df[masque(df[colonne])]
+        total = len(df) if self._compter else None
+        df = df.iloc[self._debut:self._fin]
+        if self._colonnes:
+            df = df[self._colonnes]
+        # Valeurs manquantes renvoyées à null, comme en JSON
+        lignes = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+        return _Reponse(lignes, total)
+
+
+class BackendMemoire:
+    """
+    Client « Supabase » lisant des DataFrames en mémoire
+
+    Args:
+        tables (dict): {nom de table: DataFrame}
+        latence_ms (float): Latence simulée par requête
+    """
+
+    def __init__(self, tables: dict, latence_ms: float = 0.0):
+        self.tables = tables
+        self.latence_ms = latence_ms
+        self.nb_requetes = 0
+        self._tris = {}
+        self._verrou = threading.Lock()
+
+    def trie(self, table: str, ordre: tuple) -> pd.DataFrame:
+        """Table triée selon ordre (colonne, desc), mémorisée comme un index."""
+        with self._verrou:
+            df = self.tables.setdefault(table, pd.DataFrame())
+            if ordre is None:
+                return df
+            if (table, ordre) not in self._tris:
+                colonne, desc = ordre
+                self._tris[(table, ordre)] = df.sort_values(colonne, ascending=not desc, kind="stable")
+            return self._tris[(table, ordre)]
+
+    def inserer(self, table: str, lignes: list):
+        """Ajoute des lignes à une table (créée au besoin)."""
+        with self._verrou:
+            nouvelles = pd.DataFrame(lignes)
+            existante = self.tables.get(table)
+            self.tables[table] = nouvelles if existante is None or existante.empty \
+                else pd.concat([existante, nouvelles], ignore_index=True)
+            for cle in [cle for cle in self._tris if cle[0] == table]:
+                del self._tris[cle]
+
+    def table(self, nom: str) -> _Requete:
+        return _Requete(self, nom)
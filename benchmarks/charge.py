@@ -0,0 +1,281 @@
+"""
+Test de charge : utilisateurs simultanés sur une instance de l'application
+
+Chaque utilisateur virtuel est une session Streamlit sans navigateur
+(streamlit.testing AppTest) exécutant app.py dans le même processus, comme
+les sessions d'un serveur réel. Toutes les sessions partagent un backend
+Supabase en mémoire (benchmarks/backend_memoire.py) alimenté par le
+générateur synthétique (benchmarks/synthetique.py).
+
+Scénario de chaque utilisateur, répété --iterations fois : page Observations,
+saisie d'une mesure de suivi, page Fiabilité, changement d'équipement dans
+les filtres, page Exports (génération des fichiers Excel).
+
+Rapport : débit (réexécutions par seconde), latence p50/p95/p99 des
+réexécutions par action, mémoire par session (état de session et
+croissance du processus).
+
+AppTest n'est pas prévu pour des exécutions simultanées dans un même
+processus (runtime factice et options de configuration globaux, remplacés à
+chaque exécution) : les réexécutions des sessions sont donc sérialisées par
+un verrou. Les réexécutions étant liées au processeur, le GIL les sérialise
+déjà sur un serveur réel ; la latence mesurée inclut l'attente du verrou,
+comme la file d'attente d'un serveur chargé. Seule la latence Supabase
+simulée (--latence-ms) ne se recouvre pas d'une session à l'autre.
+
+Usage (depuis la racine du dépôt) :
+    python benchmarks/charge.py --utilisateurs 10 --iterations 3
+    python benchmarks/charge.py --utilisateurs 25 --lignes 20000 --sortie charge.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+os.environ.setdefault("SUPABASE_URL", "http://localhost:1")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+# Journal d'audit de secours hors du dépôt
+os.environ.setdefault(
+    "FICHIER_SECOURS_AUDIT", os.path.join(tempfile.gettempdir(), "charge_audit_en_attente.jsonl")
+)
+
+from backend_memoire import BackendMemoire  # noqa: E402
+from synthetique import generer  # noqa: E402
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+FICHIER_APP = os.path.join(RACINE, "app.py")
+
+# Délai maximal d'une réexécution avant échec (secondes)
+DELAI_REEXECUTION = 300
+
+# Préfixe des opérations enregistrées dans data/instrumentation
+PREFIXE = "charge:"
+
+# Une seule exécution AppTest à la fois (voir l'en-tête du module)
+_verrou_execution = threading.Lock()
+
+
+# =============================================================================
+# ENVIRONNEMENT PARTAGÉ
+# =============================================================================
+
+def installer_backend(backend: BackendMemoire):
+    """Branche le backend en mémoire sur tous les clients Supabase du processus."""
+    import data.data_manager as dm
+    from auth.audit import journal_audit
+    from data import sante
+    from data.resilience import ClientSurveille
+
+    dm._supabase_client = journal_audit._client = sante._client = ClientSurveille(backend)
+
+
+def memoire_processus() -> int:
+    """
+    Returns:
+        int: Mémoire résidente du processus (octets ; pic à défaut de /proc)
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# =============================================================================
+# UTILISATEUR VIRTUEL
+# =============================================================================
+
+class Utilisateur:
+    """Session AppTest authentifiée qui enchaîne les actions du scénario."""
+
+    def __init__(self, numero: int, role: str, graine: int):
+        from streamlit.testing.v1 import AppTest
+
+        self.numero = numero
+        self.rng = random.Random(graine + numero)
+        self.erreurs = []
+        self.app = AppTest.from_file(FICHIER_APP, default_timeout=DELAI_REEXECUTION)
+        etat = self.app.session_state
+        etat["authenticated"] = True
+        etat["user_role"] = role
+        etat["user_email"] = f"charge{numero}@example.com"
+        etat["user_name"] = f"Utilisateur {numero}"
+
+    def _action(self, nom: str, declencher):
+        """Exécute une réexécution et enregistre sa latence."""
+        from data.instrumentation import enregistrer
+
+        debut = time.perf_counter()
+        echec = False
+        try:
+            with _verrou_execution:
+                declencher()
+            if self.app.exception:
+                echec = True
+                self.erreurs.append(f"{nom} : {self.app.exception[0].value}")
+        except Exception as e:
+            echec = True
+            self.erreurs.append(f"{nom} : {e}")
+        enregistrer(PREFIXE + nom, time.perf_counter() - debut, echec=echec)
+
+    def _naviguer(self, page: str):
+        self._action(f"page {page}", lambda: self.app.sidebar.button(key=f"nav_{page}").click().run())
+
+    def connexion(self):
+        self._action("ouverture", self.app.run)
+
+    def saisir_mesure(self):
+        app = self.app
+
+        def soumettre():
+            equipements = app.selectbox(key="form_suivi_equip").options
+            app.selectbox(key="form_suivi_equip").set_value(self.rng.choice(equipements))
+            app.date_input(key="form_suivi_date").set_value(
+                date(2030, 1, 1) + timedelta(days=self.rng.randrange(3650))
+            )
+            for cle, valeur in (("form_suivi_vitesse", 1500.0), ("form_suivi_twf_rms", 0.5),
+                                ("form_suivi_crest", 3.0), ("form_suivi_peak", 3.0)):
+                app.number_input(key=cle).set_value(valeur * self.rng.uniform(0.8, 1.2))
+            next(b for b in app.button if b.label == "✅ Enregistrer mesure").click().run()
+
+        self._action("saisie mesure", soumettre)
+
+    def changer_filtre(self):
+        def choisir():
+            filtre = self.app.selectbox(key="fiab_equipement")
+            filtre.set_value(self.rng.choice(filtre.options)).run()
+
+        self._action("filtre fiabilité", choisir)
+
+    def scenario(self, iterations: int, pause_s: float, depart: threading.Barrier):
+        depart.wait()
+        self.connexion()
+        for _ in range(iterations):
+            for etape in (
+                lambda: self._naviguer("📝 Observations"),
+                self.saisir_mesure,
+                lambda: self._naviguer("🔧 Fiabilité"),
+                self.changer_filtre,
+                lambda: self._naviguer("📥 Exports"),
+            ):
+                etape()
+                if pause_s:
+                    time.sleep(self.rng.uniform(0.5, 1.5) * pause_s)
+
+    def memoire_session(self) -> int:
+        """Mémoire estimée de l'état de session (octets)."""
+        from data.profilage import empreinte_etat
+        return sum(d["octets"] for d in empreinte_etat(self.app.session_state.to_dict()))
+
+
+# =============================================================================
+# POINT D'ENTRÉE
+# =============================================================================
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--utilisateurs", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--lignes", type=int, default=5000, help="Mesures de suivi générées")
+    parser.add_argument("--role", default="technicien")
+    parser.add_argument("--pause-ms", type=float, default=0.0,
+                        help="Temps de réflexion moyen entre deux actions")
+    parser.add_argument("--latence-ms", type=float, default=0.0,
+                        help="Latence simulée par requête Supabase")
+    parser.add_argument("--graine", type=int, default=42)
+    parser.add_argument("--sortie", help="Fichier JSON du rapport")
+    args = parser.parse_args()
+
+    import logging
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    # État de session prérempli hors exécution (mode « bare ») : avertissement inutile
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+
+    from data import instrumentation
+
+    backend = BackendMemoire(generer(args.lignes, graine=args.graine), latence_ms=args.latence_ms)
+    installer_backend(backend)
+
+    # Mémoire de référence : application importée et première session servie
+    Utilisateur(-1, args.role, args.graine).connexion()
+    instrumentation.reinitialiser()
+    memoire_avant = memoire_processus()
+
+    utilisateurs = [Utilisateur(n, args.role, args.graine) for n in range(args.utilisateurs)]
+    depart = threading.Barrier(len(utilisateurs))
+    threads = [
+        threading.Thread(target=u.scenario, args=(args.iterations, args.pause_ms / 1000, depart),
+                         name=f"utilisateur-{u.numero}")
+        for u in utilisateurs
+    ]
+
+    print(f"{args.utilisateurs} utilisateurs × {args.iterations} itérations "
+          f"({args.lignes} mesures, rôle {args.role})...", flush=True)
+    debut = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duree = time.perf_counter() - debut
+
+    # ── Rapport ──────────────────────────────────────────────────────────────
+    operations = instrumentation.synthese()
+    actions = [o for o in operations if o["operation"].startswith(PREFIXE)]
+    pages = [o for o in operations if o["operation"].startswith("page:")]
+    nb_reexecutions = sum(o["nb"] for o in actions)
+    memoire_sessions = [u.memoire_session() for u in utilisateurs]
+    croissance = max(memoire_processus() - memoire_avant, 0)
+    erreurs = [e for u in utilisateurs for e in u.erreurs]
+
+    rapport = {
+        "parametres": vars(args),
+        "duree_s": round(duree, 2),
+        "reexecutions": nb_reexecutions,
+        "debit_par_s": round(nb_reexecutions / duree, 2) if duree else None,
+        "actions": actions,
+        "pages": pages,
+        "memoire": {
+            "session_moyenne_octets": int(sum(memoire_sessions) / len(memoire_sessions)),
+            "session_max_octets": max(memoire_sessions),
+            "croissance_processus_octets": croissance,
+            "croissance_par_session_octets": croissance // len(utilisateurs),
+        },
+        "erreurs": erreurs,
+    }
+
+    print(f"\nDurée {rapport['duree_s']} s — {nb_reexecutions} réexécutions — "
+          f"{rapport['debit_par_s']} réexécutions/s\n")
+    print(f"{'Action':<28} {'Nb':>5} {'Échecs':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for o in sorted(actions, key=lambda o: o["operation"]):
+        print(f"{o['operation'][len(PREFIXE):]:<28} {o['nb']:>5} {o['echecs']:>7} "
+              f"{o['p50_ms']:>9.0f} {o['p95_ms']:>9.0f} {o['p99_ms']:>9.0f}")
+    m = rapport["memoire"]
+    print(f"\nMémoire par session : état {m['session_moyenne_octets'] / 1e3:.1f} Ko en moyenne "
+          f"(max {m['session_max_octets'] / 1e3:.1f} Ko), "
+          f"processus +{m['croissance_par_session_octets'] / 1e6:.1f} Mo par session")
+    for message in erreurs[:10]:
+        print(f"❌ {message}")
+
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            json.dump(rapport, f, indent=2, ensure_ascii=False, default=str)
+            f.write("\n")
+
+    return 1 if erreurs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""
+Benchmarks des traitements de données à l'échelle d'une usine
+
+Pour chaque taille (nombre de mesures de suivi), un jeu synthétique est
+généré (benchmarks/synthetique.py) et servi par un backend Supabase en
+mémoire (benchmarks/backend_memoire.py) au travers du client protégé de
+l'application. Sont chronométrés : les chargements, la cascade de filtres de
+la page Fiabilité, les fonctions statistiques, le calcul MTBF, la
+construction de la figure de tendance et chaque export Excel.
+
+Usage (depuis la racine du dépôt) :
+    python benchmarks/donnees.py                          # 10k, 100k, 1M lignes
+    python benchmarks/donnees.py --tailles 10000 100000   # tailles choisies
+    python benchmarks/donnees.py --mettre-a-jour          # nouvelle référence
+    python benchmarks/donnees.py --sortie resultats.json  # résultats bruts
+
+L'export Excel du suivi (un onglet et un graphique par équipement) domine
+le temps total : plusieurs minutes dès 100k lignes ; --max-lignes-export
+permet de l'écarter pour les grandes tailles.
+
+Code de sortie 1 si une opération dépasse la référence (donnees_reference.json)
+de plus de --tolerance, pour une taille présente dans la référence.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+os.environ.setdefault("SUPABASE_URL", "http://localhost:1")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+# Mesures propres : pas de relevé d'instrumentation pendant les chronométrages
+os.environ.setdefault("INSTRUMENTATION", "0")
+
+from backend_memoire import BackendMemoire  # noqa: E402
+from synthetique import generer, intervalles_maintenance  # noqa: E402
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+FICHIER_REFERENCE = os.path.join(RACINE, "benchmarks", "donnees_reference.json")
+
+TAILLES_DEFAUT = (10_000, 100_000, 1_000_000)
+
+# Une opération rapide est répétée (minimum retenu) tant que le temps cumulé
+# reste sous ce budget (secondes)
+BUDGET_REPETITIONS_S = 2.0
+
+
+# =============================================================================
+# MESURE
+# =============================================================================
+
+def chronometrer(fonction, repetitions: int):
+    """
+    Exécute une fonction et retourne (meilleur temps en ms, dernier résultat)
+
+    Une première exécution non chronométrée précède les répétitions (imports
+    différés, caches des bibliothèques) ; elle n'entre pas dans le budget.
+
+    Args:
+        fonction (callable): Fonction sans argument
+        repetitions (int): Nombre maximal d'exécutions chronométrées
+    """
+    fonction()
+    meilleur, resultat, cumul = None, None, 0.0
+    for _ in range(max(repetitions, 1)):
+        debut = time.perf_counter()
+        resultat = fonction()
+        duree = time.perf_counter() - debut
+        meilleur = duree if meilleur is None else min(meilleur, duree)
+        cumul += duree
+        if cumul > BUDGET_REPETITIONS_S:
+            break
+    return round(meilleur * 1000, 2), resultat
+
+
+def mesurer_taille(nb_lignes: int, args) -> dict:
+    """
+    Génère un jeu de la taille demandée et chronomètre chaque opération
+
+    Args:
+        nb_lignes (int): Nombre de mesures de suivi
+        args: Arguments de la ligne de commande
+
+    Returns:
+        dict: {opération: {"ms": durée, "lignes": lignes traitées}}
+    """
+    import data.data_manager as dm
+    from data import agregats, statistiques
+    from data.resilience import ClientSurveille
+    from data.series import extraire_series
+    from ui import fiabilite
+    # Appels Streamlit hors exécution d'une page (mode « bare ») : avertissement inutile
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+
+    donnees = generer(nb_lignes, args.departements, args.equipements, args.annees, args.graine)
+    backend = BackendMemoire(donnees, latence_ms=args.latence_ms)
+    dm._supabase_client = ClientSurveille(backend)
+
+    resultats = {}
+
+    def mesurer(nom: str, fonction, lignes: int = None):
+        ms, resultat = chronometrer(fonction, args.repetitions)
+        if lignes is None:
+            lignes = len(resultat) if hasattr(resultat, "__len__") else 0
+        resultats[nom] = {"ms": ms, "lignes": int(lignes)}
+        print(f"  {nom:<34} {ms:>12.1f} ms  ({lignes} lignes)", flush=True)
+        return resultat
+
+    # ── Chargements (pagination PostgREST, construction des DataFrames) ──────
+    df_equipements = mesurer("charger_equipements", dm.charger_equipements)
+    df_observations = mesurer("charger_observations", dm.charger_observations)
+    df_suivi = mesurer("charger_suivi", dm.charger_suivi)
+
+    # ── Cascade de filtres de la page Fiabilité (premier choix de chaque liste)
+    df_filtre = mesurer(
+        "filtres_fiabilite",
+        lambda: fiabilite.render_filtres_globaux(df_equipements, df_suivi)
+    )
+    id_equip = df_filtre["id_equipement"].iloc[0]
+    point = df_filtre["point_mesure"].iloc[0]
+
+    # ── Statistiques ─────────────────────────────────────────────────────────
+    toutes = df_suivi["twf_rms_g"]
+    mesurer("calculer_statistiques", lambda: statistiques.calculer_statistiques(toutes),
+            lignes=len(toutes))
+    mesurer("calculer_kde", lambda: statistiques.calculer_kde(toutes), lignes=len(toutes))
+
+    def periode_a_froid():
+        agregats.vider_agregats()
+        return agregats.statistiques_periode(
+            df_filtre[["date", "twf_rms_g"]], (id_equip, point, "twf_rms_g"),
+            df_filtre["date"].min().date(), df_filtre["date"].max().date()
+        )
+    mesurer("statistiques_periode", periode_a_froid, lignes=len(df_filtre))
+
+    cles = list(df_suivi[["id_equipement", "point_mesure"]].drop_duplicates()
+                .itertuples(index=False, name=None))
+    mesurer("extraire_series", lambda: extraire_series(df_suivi, cles, frequence="W"),
+            lignes=len(df_suivi))
+
+    # ── MTBF ─────────────────────────────────────────────────────────────────
+    intervalles = intervalles_maintenance(id_equip, donnees["suivi_equipements"])
+    mesurer("date_min_equipement",
+            lambda: fiabilite._get_date_min_equipement(df_suivi, id_equip), lignes=len(df_suivi))
+    mesurer("calculer_fiabilite", lambda: fiabilite.calculer_fiabilite(intervalles),
+            lignes=len(intervalles))
+
+    # ── Figure de tendance ───────────────────────────────────────────────────
+    mesurer("_fig_tendance", lambda: fiabilite._fig_tendance(
+        df_filtre, "twf_rms_g", "TWF RMS (g)", id_equip, point
+    ), lignes=len(df_filtre))
+
+    # ── Exports Excel ────────────────────────────────────────────────────────
+    mesurer("exporter_equipements_excel",
+            lambda: dm.exporter_equipements_excel(df_equipements), lignes=len(df_equipements))
+    mesurer("exporter_observations_excel",
+            lambda: dm.exporter_observations_excel(df_observations, df_equipements),
+            lignes=len(df_observations))
+    if args.max_lignes_export is not None and len(df_suivi) > args.max_lignes_export:
+        print(f"  {'exporter_suivi_excel':<34} {'ignoré':>15}  (> --max-lignes-export)")
+    else:
+        mesurer("exporter_suivi_excel",
+                lambda: dm.exporter_suivi_excel(df_suivi, df_equipements), lignes=len(df_suivi))
+
+    return resultats
+
+
+def comparer(resultats: dict, reference: dict, tolerance: float) -> list:
+    """
+    Compare les résultats à la référence
+
+    Args:
+        resultats (dict): {taille: {opération: mesure}}
+        reference (dict): Référence enregistrée (même structure)
+        tolerance (float): Dépassement de temps accepté (0.5 = +50 %)
+
+    Returns:
+        list: Messages de régression (vide si aucune)
+    """
+    regressions = []
+    for taille, operations in resultats.items():
+        for nom, mesure in operations.items():
+            ref = reference.get(taille, {}).get(nom)
+            # En dessous de 5 ms, l'écart relatif n'est pas significatif
+            if ref is None or mesure["ms"] < 5:
+                continue
+            if mesure["ms"] > ref["ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{nom} ({int(taille):,} lignes) : {mesure['ms']:.0f} ms "
+                    f"(référence {ref['ms']:.0f} ms)".replace(",", " ")
+                )
+    return regressions
+
+
+# =============================================================================
+# POINT D'ENTRÉE
+# =============================================================================
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tailles", type=int, nargs="+", default=list(TAILLES_DEFAUT))
+    parser.add_argument("--departements", type=int, default=6)
+    parser.add_argument("--equipements", type=int, default=8, help="Équipements par département")
+    parser.add_argument("--annees", type=float, default=3)
+    parser.add_argument("--graine", type=int, default=42)
+    parser.add_argument("--latence-ms", type=float, default=0.0,
+                        help="Latence simulée par requête Supabase")
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--max-lignes-export", type=int, default=None,
+                        help="Ignore l'export du suivi au-delà de ce nombre de lignes")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--sortie", help="Fichier JSON des résultats")
+    parser.add_argument("--mettre-a-jour", action="store_true",
+                        help="Enregistre les résultats comme nouvelle référence")
+    args = parser.parse_args()
+
+    resultats = {}
+    for taille in args.tailles:
+        print(f"\n{taille:,} mesures de suivi".replace(",", " "), flush=True)
+        resultats[str(taille)] = mesurer_taille(taille, args)
+
+    document = {
+        "parametres": {
+            "departements": args.departements, "equipements": args.equipements,
+            "annees": args.annees, "graine": args.graine, "latence_ms": args.latence_ms,
+            "python": platform.python_version(),
+        },
+        "resultats": resultats,
+    }
+
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+
+    if args.mettre_a_jour:
+        # Les tailles non mesurées cette fois sont conservées
+        if os.path.exists(FICHIER_REFERENCE):
+            with open(FICHIER_REFERENCE, encoding="utf-8") as f:
+                document["resultats"] = {**json.load(f)["resultats"], **resultats}
+        with open(FICHIER_REFERENCE, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"\nRéférence enregistrée : {FICHIER_REFERENCE}")
+        return 0
+
+    if not os.path.exists(FICHIER_REFERENCE):
+        print("\nAucune référence : lancer avec --mettre-a-jour")
+        return 0
+
+    with open(FICHIER_REFERENCE, encoding="utf-8") as f:
+        reference = json.load(f)["resultats"]
+
+    regressions = comparer(resultats, reference, args.tolerance)
+    for message in regressions:
+        print(f"❌ {message}")
+    if not regressions:
+        print("\n✅ Aucune régression par rapport à la référence")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Mesure du temps d'import des points d'entrée de l'application (démarrage à froid)
+
+Chaque module est importé dans un interpréteur neuf avec `python -X importtime`.
+Le script relève le temps cumulé de l'import et les dépendances lourdes
+chargées, puis compare à la référence versionnée (import_time_reference.json).
+
+Usage (depuis la racine du dépôt) :
+    python benchmarks/import_time.py                 # comparaison à la référence
+    python benchmarks/import_time.py --mettre-a-jour # enregistre une nouvelle référence
+
+Code de sortie 1 si un point d'entrée charge une dépendance lourde absente de
+la référence, ou si son temps dépasse la référence de plus de --tolerance
+(dépassement confirmé par une seconde série de mesures, la machine pouvant
+être momentanément chargée).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FICHIER_REFERENCE = os.path.join(RACINE, "benchmarks", "import_time_reference.json")
+
+# Points d'entrée mesurés : la page de connexion doit rester légère
+POINTS_ENTREE = {
+    "connexion": "auth.login_page",
+    "app": "app",
+    "donnees": "data.data_manager",
+    "page_observations": "ui.observations",
+    "page_fiabilite": "ui.fiabilite",
+    "page_exports": "ui.telechargements",
+}
+
+# Bibliothèques dont le chargement est surveillé (hors Streamlit, toujours présent)
+DEPENDANCES_LOURDES = ("pandas", "numpy", "plotly", "openpyxl", "supabase", "postgrest", "scipy")
+
+
+# =============================================================================
+# MESURE
+# =============================================================================
+
+def mesurer(module: str, repetitions: int) -> dict:
+    """
+    Importe un module dans un interpréteur neuf et relève les temps d'import
+
+    Args:
+        module (str): Nom du module à importer
+        repetitions (int): Nombre de mesures (le minimum est retenu)
+
+    Returns:
+        dict: cumule_ms (temps cumulé de l'import) et lourds (dépendances lourdes chargées)
+    """
+    env = dict(os.environ)
+    env.setdefault("SUPABASE_URL", "http://localhost:1")
+    env.setdefault("SUPABASE_KEY", "benchmark")
+
+    meilleur, lourds = None, set()
+    for _ in range(repetitions):
+        sortie = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=RACINE, env=env, capture_output=True, text=True
+        )
+        if sortie.returncode != 0:
+            raise RuntimeError(f"Import de {module} impossible :\n{sortie.stderr[-2000:]}")
+
+        cumule = None
+        for ligne in sortie.stderr.splitlines():
+            if not ligne.startswith("import time:") or "|" not in ligne:
+                continue
+            try:
+                _, cumul_us, nom = ligne.split("|")
+                cumul_us = int(cumul_us)
+            except ValueError:
+                continue  # ligne d'en-tête
+            nom = nom.strip()
+            if nom in DEPENDANCES_LOURDES:
+                lourds.add(nom)
+            if nom == module:
+                cumule = cumul_us
+
+        if cumule is not None and (meilleur is None or cumule < meilleur):
+            meilleur = cumule
+
+    return {"cumule_ms": round((meilleur or 0) / 1000, 1), "lourds": sorted(lourds)}
+
+
+def comparer(mesures: dict, reference: dict, tolerance: float) -> list:
+    """
+    Compare les mesures à la référence
+
+    Args:
+        mesures (dict): {point d'entrée: mesure}
+        reference (dict): Référence enregistrée
+        tolerance (float): Dépassement de temps accepté (0.5 = +50 %)
+
+    Returns:
+        list: Messages de régression (vide si aucune)
+    """
+    regressions = []
+    for nom, mesure in mesures.items():
+        ref = reference.get(nom)
+        if ref is None:
+            continue
+        nouvelles = sorted(set(mesure["lourds"]) - set(ref["lourds"]))
+        if nouvelles:
+            regressions.append(f"{nom} : nouvelles dépendances chargées {', '.join(nouvelles)}")
+        if mesure["cumule_ms"] > ref["cumule_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{nom} : {mesure['cumule_ms']:.0f} ms (référence {ref['cumule_ms']:.0f} ms)"
+            )
+    return regressions
+
+
+# =============================================================================
+# POINT D'ENTRÉE
+# =============================================================================
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--mettre-a-jour", action="store_true",
+                        help="Enregistre les mesures comme nouvelle référence")
+    args = parser.parse_args()
+
+    mesures = {}
+    print(f"{'Point d entrée':<20} {'Module':<24} {'Import (ms)':>12}  Dépendances lourdes")
+    for nom, module in POINTS_ENTREE.items():
+        mesures[nom] = mesurer(module, args.repetitions)
+        print(f"{nom:<20} {module:<24} {mesures[nom]['cumule_ms']:>12.1f}  "
+              f"{', '.join(mesures[nom]['lourds']) or '—'}")
+
+    if args.mettre_a_jour:
+        with open(FICHIER_REFERENCE, "w", encoding="utf-8") as f:
+            json.dump(mesures, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"\nRéférence enregistrée : {FICHIER_REFERENCE}")
+        return 0
+
+    if not os.path.exists(FICHIER_REFERENCE):
+        print("\nAucune référence : lancer avec --mettre-a-jour")
+        return 0
+
+    with open(FICHIER_REFERENCE, encoding="utf-8") as f:
+        reference = json.load(f)
+
+    regressions = comparer(mesures, reference, args.tolerance)
+    if regressions:
+        # Confirmation des dépassements de temps par une seconde série de mesures
+        for nom in [n for n in mesures if comparer({n: mesures[n]}, reference, args.tolerance)]:
+            nouvelle = mesurer(POINTS_ENTREE[nom], args.repetitions * 2)
+            nouvelle["cumule_ms"] = min(nouvelle["cumule_ms"], mesures[nom]["cumule_ms"])
+            mesures[nom] = nouvelle
+        regressions = comparer(mesures, reference, args.tolerance)
+
+    for message in regressions:
+        print(f"❌ {message}")
+    if not regressions:
+        print("\n✅ Aucune régression par rapport à la référence")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Générateur de données synthétiques à l'échelle d'une usine
+
+Produit les tables equipements, suivi_equipements et observations avec le
+schéma de la base Supabase (colonnes et formats renvoyés par PostgREST) :
+départements, équipements, les 16 points de mesure, relevés réguliers sur
+plusieurs années avec dérive vibratoire réaliste (usure progressive,
+remise à niveau après maintenance, bruit de mesure et pics isolés).
+
+Le générateur est déterministe pour une graine donnée.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Points de mesure (identiques au formulaire de saisie, ui/observations.py)
+POINTS_MESURE = [
+    "M-COA", "M-CA", "Entrée Réducteur", "Sortie Réducteur",
+    "P-CA", "P-COA", "A1-CA", "A1-COA", "A2-CA", "A2-COA",
+    "A3-CA", "A3-COA", "A4-CA", "A4-COA", "A5-CA", "A5-COA"
+]
+
+DEPARTEMENTS = [
+    "Broyage", "Concassage", "Convoyage", "Filtration", "Flottation",
+    "Pompage", "Séchage", "Stockage", "Traitement eaux", "Utilités",
+]
+
+ANALYSTES = ["A. Martin", "B. Durand", "C. Bernard", "D. Petit", "E. Moreau"]
+IMPORTANCES = ["Faible", "Moyenne", "Haute", "Critique", None]
+
+# Intervalle moyen entre deux maintenances (jours) : remise à niveau de l'usure
+INTERVALLE_MAINTENANCE_JOURS = 240
+
+# Date du premier relevé
+DATE_DEBUT = "2020-01-01"
+
+
+# =============================================================================
+# GÉNÉRATION
+# =============================================================================
+
+def dimensionner(nb_lignes: int, nb_departements: int, equipements_par_departement: int,
+                 annees: float) -> dict:
+    """
+    Calcule la cadence des relevés pour atteindre nb_lignes mesures
+
+    Le nombre de séries (équipement × point de mesure) est fixé par les
+    paramètres ; la période couverte est d'au moins `annees` ans, allongée si
+    un relevé quotidien ne suffit pas.
+
+    Returns:
+        dict: nb_series, releves_par_serie, pas_jours, nb_jours
+    """
+    nb_series = nb_departements * equipements_par_departement * len(POINTS_MESURE)
+    releves = max(math.ceil(nb_lignes / nb_series), 1)
+    nb_jours = max(int(annees * 365), releves)
+    return {
+        "nb_series": nb_series,
+        "releves_par_serie": releves,
+        "pas_jours": max(nb_jours // releves, 1),
+        "nb_jours": nb_jours,
+    }
+
+
+def generer(nb_lignes: int, nb_departements: int = 6, equipements_par_departement: int = 8,
+            annees: float = 3, graine: int = 42) -> dict:
+    """
+    Génère un jeu de données complet
+
+    Args:
+        nb_lignes (int): Nombre de mesures de suivi visé (arrondi au multiple
+            du nombre de séries)
+        nb_departements (int): Départements (au plus len(DEPARTEMENTS))
+        equipements_par_departement (int): Équipements par département
+        annees (float): Durée minimale couverte par les relevés
+        graine (int): Graine du générateur aléatoire
+
+    Returns:
+        dict: {nom de table: DataFrame} au format renvoyé par Supabase
+              (dates en chaînes ISO, colonne travaux_notes)
+    """
+    rng = np.random.default_rng(graine)
+    nb_departements = min(nb_departements, len(DEPARTEMENTS))
+    dims = dimensionner(nb_lignes, nb_departements, equipements_par_departement, annees)
+
+    # ── Référentiel ──────────────────────────────────────────────────────────
+    equipements = pd.DataFrame({
+        "id_equipement": [
+            f"{dept[:4].upper()}-{num:03d}"
+            for dept in DEPARTEMENTS[:nb_departements]
+            for num in range(1, equipements_par_departement + 1)
+        ],
+        "departement": np.repeat(DEPARTEMENTS[:nb_departements], equipements_par_departement),
+    })
+
+    # ── Suivi : une ligne par (équipement, point, relevé) ────────────────────
+    nb_series, releves = dims["nb_series"], dims["releves_par_serie"]
+    jours = np.arange(releves) * dims["pas_jours"]               # (releves,)
+    dates = pd.Timestamp(DATE_DEBUT) + pd.to_timedelta(jours, unit="D")
+
+    # Niveaux de base et vitesse d'usure propres à chaque série
+    base_rms = rng.lognormal(np.log(0.4), 0.35, nb_series)[:, None]
+    base_crest = rng.uniform(2.5, 3.5, nb_series)[:, None]
+    usure = rng.uniform(0.5, 2.0, nb_series)[:, None]            # hausse relative par cycle
+    rpm = rng.choice([750.0, 1000.0, 1500.0, 3000.0], nb_series)[:, None]
+    decalage = rng.uniform(0, INTERVALLE_MAINTENANCE_JOURS, nb_series)[:, None]
+
+    # Dents de scie : l'usure croît jusqu'à la maintenance puis retombe
+    cycle = ((jours[None, :] + decalage) % INTERVALLE_MAINTENANCE_JOURS) / INTERVALLE_MAINTENANCE_JOURS
+    forme = (nb_series, releves)
+    rms = base_rms * (1 + usure * cycle ** 2) * rng.lognormal(0, 0.08, forme)
+    pics = rng.random(forme) < 0.005
+    rms = np.where(pics, rms * rng.uniform(2, 4, forme), rms)
+    crest = base_crest * (1 + 0.3 * cycle) * rng.normal(1, 0.04, forme)
+    vitesse = rpm * rng.normal(1, 0.003, forme)
+
+    ids = np.repeat(equipements["id_equipement"].to_numpy(), len(POINTS_MESURE))
+    points = np.tile(POINTS_MESURE, len(equipements))
+    suivi = pd.DataFrame({
+        "id_equipement": np.repeat(ids, releves),
+        "point_mesure": np.repeat(points, releves),
+        "date": np.tile(dates.strftime("%Y-%m-%d").to_numpy(), nb_series),
+        "vitesse_rpm": vitesse.ravel().round(1),
+        "twf_rms_g": rms.ravel().round(4),
+        "crest_factor": crest.ravel().round(3),
+        "twf_peak_to_peak_g": (2 * rms * crest).ravel().round(4),
+    })
+
+    # ── Observations : environ une pour 20 relevés ───────────────────────────
+    nb_obs = max(len(suivi) // 20, 1)
+    lignes_obs = rng.integers(0, len(suivi), nb_obs)
+    observations = pd.DataFrame({
+        "id_equipement": suivi["id_equipement"].to_numpy()[lignes_obs],
+        "date": suivi["date"].to_numpy()[lignes_obs],
+        "observation": rng.choice([
+            "Niveau vibratoire stable", "Hausse du niveau global",
+            "Défaut de roulement suspecté", "Balourd probable", "Désalignement suspecté",
+        ], nb_obs),
+        "recommandation": rng.choice([
+            "Aucune action", "Surveillance rapprochée", "Graissage",
+            "Contrôle alignement", "Remplacement roulement",
+        ], nb_obs),
+        "travaux_notes": rng.choice(["", "Graissage effectué", "Roulement remplacé"], nb_obs),
+        "analyste": rng.choice(ANALYSTES, nb_obs),
+        "importance": rng.choice(np.array(IMPORTANCES, dtype=object), nb_obs),
+    })
+
+    return {
+        "equipements": equipements,
+        "suivi_equipements": suivi,
+        "observations": observations,
+    }
+
+
+def intervalles_maintenance(id_equipement: str, df_suivi: pd.DataFrame) -> list:
+    """
+    Intervalles de fonctionnement d'un équipement entre maintenances
+    (format attendu par ui.fiabilite.calculer_fiabilite)
+
+    Args:
+        id_equipement (str): Équipement
+        df_suivi (DataFrame): Suivi généré (dates en chaînes ISO)
+
+    Returns:
+        list: [{"debut": date, "fin": date}, ...]
+    """
+    dates = pd.to_datetime(df_suivi.loc[df_suivi["id_equipement"] == id_equipement, "date"])
+    if dates.empty:
+        return []
+    bornes = pd.date_range(dates.min(), dates.max(), freq=f"{INTERVALLE_MAINTENANCE_JOURS}D")
+    bornes = list(bornes.date) + [dates.max().date()]
+    return [{"debut": d, "fin": f} for d, f in zip(bornes[:-1], bornes[1:]) if f > d]
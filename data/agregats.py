@@ -0,0 +1,409 @@
+"""
+Agrégats pré-calculés des séries de suivi (couche de synthèse)
+Par (équipement, point de mesure, variable) et par période (mois ou semaine) :
+effectif, somme, somme des carrés, min, max et sketch t-digest pour les quantiles.
+
+Les statistiques d'une plage de dates quelconque sont obtenues en fusionnant les
+périodes entièrement couvertes ; seules les périodes partielles aux bornes sont
+recalculées à partir des valeurs de la série (recherche dichotomique). Une série
+agrégée vaut pour une version de la table suivi_equipements (data/magasin.py).
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Granularité des agrégats : "M" (mensuel) ou "W" (hebdomadaire)
+FREQUENCE_AGREGATS = os.getenv("FREQUENCE_AGREGATS", "M")
+
+# Au-delà de ce nombre de lignes, l'onglet Statistiques interroge les agrégats
+SEUIL_AGREGATS = int(os.getenv("SEUIL_AGREGATS_LIGNES", "5000"))
+
+# Paramètre de compression du t-digest (nombre maximal de centroïdes ≈ COMPRESSION)
+COMPRESSION_TDIGEST = 100
+
+
+# =============================================================================
+# T-DIGEST
+# =============================================================================
+
+class TDigest:
+    """
+    Sketch t-digest compact (centroïdes moyenne/poids) pour quantiles approchés
+
+    Les centroïdes sont regroupés selon la fonction d'échelle k1 (arcsin) :
+    précision élevée près des extrémités, fusion exacte de deux sketches.
+    """
+
+    def __init__(self, moyennes=None, poids=None):
+        self.moyennes = np.asarray(moyennes if moyennes is not None else [], dtype=float)
+        self.poids = np.asarray(poids if poids is not None else [], dtype=float)
+
+    @classmethod
+    def depuis_valeurs(cls, valeurs) -> "TDigest":
+        """
+        Construit un sketch à partir de valeurs brutes
+
+        Args:
+            valeurs (array-like): Valeurs (sans NaN)
+
+        Returns:
+            TDigest: Sketch compressé
+        """
+        x = np.asarray(valeurs, dtype=float)
+        return cls(x, np.ones_like(x))._compresser()
+
+    def fusionner(self, autre: "TDigest") -> "TDigest":
+        """
+        Fusionne deux sketches
+
+        Args:
+            autre (TDigest): Sketch à fusionner
+
+        Returns:
+            TDigest: Nouveau sketch compressé
+        """
+        return TDigest(
+            np.concatenate([self.moyennes, autre.moyennes]),
+            np.concatenate([self.poids, autre.poids])
+        )._compresser()
+
+    def _compresser(self) -> "TDigest":
+        if self.moyennes.size <= 1:
+            return self
+
+        ordre = np.argsort(self.moyennes, kind="stable")
+        m, w = self.moyennes[ordre], self.poids[ordre]
+        total = w.sum()
+
+        # Position relative (milieu de chaque centroïde) → indice de centroïde (échelle k1)
+        q = (np.cumsum(w) - w / 2) / total
+        k = COMPRESSION_TDIGEST * (np.arcsin(2 * q - 1) / np.pi + 0.5)
+        groupe = np.floor(k).astype(int)
+        _, groupe = np.unique(groupe, return_inverse=True)
+
+        poids = np.bincount(groupe, weights=w)
+        moyennes = np.bincount(groupe, weights=m * w) / poids
+        return TDigest(moyennes, poids)
+
+    def quantiles(self, qs, minimum: float, maximum: float) -> list:
+        """
+        Estime des quantiles par interpolation entre centroïdes
+
+        Args:
+            qs (list): Quantiles demandés, entre 0 et 1
+            minimum (float): Minimum exact de la distribution
+            maximum (float): Maximum exact de la distribution
+
+        Returns:
+            list: Valeurs estimées
+        """
+        if self.poids.size == 0:
+            return [float("nan")] * len(qs)
+
+        total = self.poids.sum()
+        centres = np.cumsum(self.poids) - self.poids / 2
+        # Même convention que l'interpolation linéaire de pandas : rang q × (n − 1)
+        xp = np.concatenate([[0.0], centres - 0.5, [total - 1]])
+        fp = np.concatenate([[minimum], self.moyennes, [maximum]])
+        return np.interp(np.asarray(qs, dtype=float) * (total - 1), xp, fp).tolist()
+
+
+# =============================================================================
+# AGRÉGAT D'UNE PÉRIODE
+# =============================================================================
+
+class Agregat:
+    """Résumé fusionnable d'un ensemble de valeurs."""
+
+    __slots__ = ("n", "somme", "somme2", "min", "max", "digest")
+
+    def __init__(self, valeurs=None):
+        x = np.asarray(valeurs if valeurs is not None else [], dtype=float)
+        self.n = int(x.size)
+        self.somme = float(x.sum())
+        self.somme2 = float(np.dot(x, x))
+        self.min = float(x.min()) if x.size else float("inf")
+        self.max = float(x.max()) if x.size else float("-inf")
+        self.digest = TDigest.depuis_valeurs(x)
+
+    def fusionner(self, autre: "Agregat") -> "Agregat":
+        return Agregat.fusion([self, autre])
+
+    @staticmethod
+    def fusion(agregats: list) -> "Agregat":
+        """
+        Fusionne plusieurs agrégats (une seule compression du sketch)
+
+        Args:
+            agregats (list): Agrégats à fusionner
+
+        Returns:
+            Agregat: Agrégat combiné
+        """
+        resultat = Agregat()
+        if not agregats:
+            return resultat
+        resultat.n = sum(a.n for a in agregats)
+        resultat.somme = sum(a.somme for a in agregats)
+        resultat.somme2 = sum(a.somme2 for a in agregats)
+        resultat.min = min(a.min for a in agregats)
+        resultat.max = max(a.max for a in agregats)
+        resultat.digest = TDigest(
+            np.concatenate([a.digest.moyennes for a in agregats]),
+            np.concatenate([a.digest.poids for a in agregats])
+        )._compresser()
+        return resultat
+
+    def statistiques(self, quantiles: tuple) -> dict:
+        """
+        Convertit l'agrégat au format de data.statistiques.calculer_statistiques()
+
+        Args:
+            quantiles (tuple): Quantiles à estimer
+
+        Returns:
+            dict: Statistiques (quantiles approchés)
+        """
+        if self.n == 0:
+            return {"n": 0}
+
+        n = self.n
+        moyenne = self.somme / n
+        variance = (
+            max(self.somme2 - self.somme * self.somme / n, 0.0) / (n - 1)
+            if n > 1 else float("nan")
+        )
+        qs = sorted(set(quantiles) | {0.5})
+        table_q = dict(zip(qs, self.digest.quantiles(qs, self.min, self.max)))
+
+        return {
+            "n": n,
+            "moyenne": moyenne,
+            "mediane": table_q[0.5],
+            "min": self.min,
+            "max": self.max,
+            "variance": variance,
+            "ecart_type": float(np.sqrt(variance)),
+            "rms": float(np.sqrt(max(self.somme2, 0.0) / n)),
+            "plage": self.max - self.min,
+            "quantiles": {q: table_q[q] for q in quantiles},
+            "approche": True,
+        }
+
+
+# =============================================================================
+# STOCKAGE DES SÉRIES AGRÉGÉES
+# =============================================================================
+# _series[(id_equipement, point_mesure, variable)] = {
+#     "periodes": {Period: Agregat},
+#     "dates":    dates des mesures renseignées (datetime64[ns], triées),
+#     "valeurs":  valeurs correspondantes (périodes partielles et recalculs),
+#     "version":  version de la table suivi_equipements (data/magasin.py) dont
+#                 la série est issue ; None après une écriture de l'application
+#                 répercutée en place (adoptée par la lecture suivante)
+# }
+# Une entrée n'est jamais modifiée en place : les mises à jour la remplacent,
+# les interrogations en cours gardent la précédente.
+
+_series: dict = {}
+_verrou = threading.Lock()
+
+
+def _periode(date) -> pd.Period:
+    return pd.Timestamp(date).to_period(FREQUENCE_AGREGATS)
+
+
+def _instant(date) -> np.datetime64:
+    return np.datetime64(pd.Timestamp(date).as_unit("ns").to_datetime64(), "ns")
+
+
+def _tranche(serie: dict, debut, fin) -> np.ndarray:
+    """Valeurs de la série datées dans [debut, fin[ (recherche dichotomique)."""
+    dates = serie["dates"]
+    i, j = np.searchsorted(dates, [_instant(debut), _instant(fin)], side="left")
+    return serie["valeurs"][i:j]
+
+
+def _construire_serie(lignes: pd.DataFrame, variable: str, version) -> dict:
+    """Construit toutes les périodes d'une série en un seul groupby."""
+    valeurs = lignes[["date", variable]].dropna().sort_values("date", kind="stable")
+    periodes = valeurs["date"].dt.to_period(FREQUENCE_AGREGATS)
+    return {
+        "periodes": {
+            periode: Agregat(groupe.to_numpy())
+            for periode, groupe in valeurs[variable].groupby(periodes, sort=False)
+        },
+        "dates": valeurs["date"].to_numpy(dtype="datetime64[ns]"),
+        "valeurs": valeurs[variable].to_numpy(dtype=float),
+        "version": version,
+    }
+
+
+def _serie_a_jour(lignes: pd.DataFrame, cle: tuple, version) -> dict:
+    """
+    Retourne la série agrégée, reconstruite si absente ou issue d'une autre
+    version de la table
+
+    Args:
+        lignes (DataFrame): Mesures brutes de la série (date + variable)
+        cle (tuple): (id_equipement, point_mesure, variable)
+        version (int): Version de la table suivi_equipements dont proviennent
+            les lignes ; None (table non mémorisée) : série construite sans
+            être conservée
+
+    Returns:
+        dict: Série agrégée (à ne pas modifier)
+    """
+    if version is None:
+        return _construire_serie(lignes, cle[2], None)
+
+    with _verrou:
+        serie = _series.get(cle)
+        if serie is not None and serie["version"] is None:
+            # Écritures de l'application déjà répercutées : la série correspond
+            # à la première version relue après elles
+            serie = _series[cle] = {**serie, "version": version}
+        if serie is not None and serie["version"] == version:
+            return serie
+
+    serie = _construire_serie(lignes, cle[2], version)
+    with _verrou:
+        _series[cle] = serie
+    return serie
+
+
+# =============================================================================
+# MISE À JOUR INCRÉMENTALE (appelée par data_manager)
+# =============================================================================
+
+def enregistrer_mesure(id_equipement, point_mesure, date, valeurs: dict):
+    """
+    Ajoute une mesure aux agrégats déjà construits (après sauvegarde)
+
+    Args:
+        id_equipement (str): ID équipement
+        point_mesure (str): Point de mesure
+        date (date): Date de la mesure
+        valeurs (dict): {variable: valeur}
+    """
+    periode = _periode(date)
+    instant = _instant(date)
+
+    with _verrou:
+        for variable, valeur in valeurs.items():
+            cle = (id_equipement, point_mesure, variable)
+            serie = _series.get(cle)
+            if serie is None or valeur is None or pd.isna(valeur):
+                continue
+            nouvel = Agregat([valeur])
+            existant = serie["periodes"].get(periode)
+            position = np.searchsorted(serie["dates"], instant, side="right")
+            _series[cle] = {
+                "periodes": {**serie["periodes"],
+                             periode: existant.fusionner(nouvel) if existant else nouvel},
+                "dates": np.insert(serie["dates"], position, instant),
+                "valeurs": np.insert(serie["valeurs"], position, float(valeur)),
+                "version": None,
+            }
+
+
+def invalider_mesure(id_equipement, point_mesure=None, date=None):
+    """
+    Retire des agrégats les mesures d'une date modifiée ou supprimée
+
+    Les min/max et sketches ne se soustraient pas : la période touchée est
+    recalculée depuis les valeurs conservées de la série. Sans point de
+    mesure ni date, les séries de l'équipement sont reconstruites à la
+    prochaine interrogation.
+
+    Args:
+        id_equipement (str): ID équipement
+        point_mesure (str, optional): Point de mesure (tous si None)
+        date (date, optional): Date de la mesure (toute la série si None)
+    """
+    with _verrou:
+        for cle in list(_series):
+            if cle[0] != id_equipement or (point_mesure is not None and cle[1] != point_mesure):
+                continue
+            if date is None:
+                del _series[cle]
+                continue
+            serie = _series[cle]
+            instant = _instant(date)
+            i, j = np.searchsorted(serie["dates"], [instant, instant + np.timedelta64(1, "D")])
+            dates = np.delete(serie["dates"], np.s_[i:j])
+            valeurs = np.delete(serie["valeurs"], np.s_[i:j])
+            periode = _periode(date)
+            periodes = dict(serie["periodes"])
+            restantes = _tranche({"dates": dates, "valeurs": valeurs},
+                                 periode.start_time, (periode + 1).start_time)
+            if restantes.size:
+                periodes[periode] = Agregat(restantes)
+            else:
+                periodes.pop(periode, None)
+            _series[cle] = {"periodes": periodes, "dates": dates, "valeurs": valeurs,
+                            "version": None}
+
+
+def vider_agregats():
+    """
+    Supprime tous les agrégats (reconstruits à la demande)
+    """
+    with _verrou:
+        _series.clear()
+
+
+# =============================================================================
+# INTERROGATION
+# =============================================================================
+
+def statistiques_periode(df_serie: pd.DataFrame, cle: tuple, date_debut, date_fin,
+                         version=None,
+                         quantiles: tuple = (0.10, 0.25, 0.50, 0.75, 0.90)) -> dict:
+    """
+    Statistiques d'une série sur une plage de dates, par fusion des agrégats
+
+    Args:
+        df_serie (DataFrame): Mesures brutes de la série (colonnes date + variable),
+            toutes dates confondues ; lues seulement pour (re)construire la série
+        cle (tuple): (id_equipement, point_mesure, variable)
+        date_debut (date): Début de la plage (incluse)
+        date_fin (date): Fin de la plage (incluse)
+        version (int, optional): Version de la table suivi_equipements, ex.
+            ctx.version("suivi_equipements") : la série agrégée est réutilisée
+            tant qu'elle ne change pas
+        quantiles (tuple): Quantiles à estimer
+
+    Returns:
+        dict: Statistiques au format calculer_statistiques() ; les quantiles
+              sont approchés (clé "approche")
+    """
+    serie = _serie_a_jour(df_serie, cle, version)
+
+    debut = pd.Timestamp(date_debut)
+    fin = pd.Timestamp(date_fin) + pd.Timedelta(days=1)
+    p_debut, p_fin = _periode(debut), _periode(fin - pd.Timedelta(days=1))
+
+    completes = []
+
+    for periode, agregat in serie["periodes"].items():
+        if periode < p_debut or periode > p_fin:
+            continue
+        if periode.start_time >= debut and periode.end_time < fin:
+            completes.append(agregat)
+        else:
+            # Période partiellement couverte : valeurs exactes de la tranche
+            valeurs = _tranche(serie, max(debut, periode.start_time),
+                               min(fin, (periode + 1).start_time))
+            if valeurs.size:
+                completes.append(Agregat(valeurs))
+
+    return Agregat.fusion(completes).statistiques(quantiles)
@@ -0,0 +1,123 @@
+"""
+Contexte de données d'une exécution de l'application
+Chaque table est lue au plus une fois par interaction : le contexte est créé
+au début de chaque exécution de app.py et transmis aux pages (render(ctx)).
+Les tables viennent du magasin partagé par les sessions (data/magasin.py)
+"""
+
+import threading
+
+from data import magasin, referentiel
+
+
+# Tables lues par le contexte, et fonctions de chargement (data_manager)
+TABLES_CONTEXTE = ("equipements", "observations", "suivi_equipements")
+
+# Contexte de l'exécution en cours (Streamlit exécute chaque session dans son thread)
+_courant = threading.local()
+
+
+class ContexteDonnees:
+    """
+    Résultats des chargements d'une exécution, mémorisés à la première lecture
+
+    Toute écriture réussie sur une table (via le client Supabase, voir
+    data/resilience.py) invalide l'entrée correspondante : une page qui
+    enregistre puis relit voit ses propres modifications.
+    """
+
+    def __init__(self):
+        self._tables = {}
+        self._versions = {}
+        self.nb_chargements = 0
+
+    def _lire(self, table: str, charger, validite: float = None):
+        if table not in self._tables:
+            # Vue de la table partagée : une même version pour toute l'exécution
+            self._tables[table], self._versions[table] = magasin.lire(table, charger, validite)
+            self.nb_chargements += 1
+        # Copie superficielle (copy-on-write) : une page qui ajoute ou remplace
+        # une colonne ne modifie pas le résultat servi aux lectures suivantes
+        return self._tables[table].copy(deep=False)
+
+    def equipements(self):
+        """
+        Returns:
+            DataFrame: Résultat de charger_equipements() pour cette exécution
+        """
+        from data.data_manager import charger_equipements
+        # Référentiel : validité longue, compteur de version en base sondé
+        referentiel.sonder()
+        return self._lire("equipements", charger_equipements, referentiel.DUREE_VALIDITE_REFERENTIEL)
+
+    def referentiel(self) -> referentiel.Referentiel:
+        """
+        Returns:
+            Referentiel: Dictionnaires du référentiel équipements lu par cette
+                exécution (instance partagée, à ne pas modifier)
+        """
+        df = self.equipements()
+        return referentiel.pour_version(df, self._versions.get("equipements"))
+
+    def observations(self):
+        """
+        Returns:
+            DataFrame: Résultat de charger_observations() pour cette exécution
+        """
+        from data.data_manager import charger_observations
+        return self._lire("observations", charger_observations)
+
+    def suivi(self):
+        """
+        Returns:
+            DataFrame: Résultat de charger_suivi() pour cette exécution
+        """
+        from data.data_manager import charger_suivi
+        return self._lire("suivi_equipements", charger_suivi)
+
+    def version(self, table: str) -> int:
+        """
+        Args:
+            table (str): Nom de la table
+
+        Returns:
+            int: Version (magasin partagé) de la table lue par cette exécution,
+                utilisable comme clé de cache ; None si non lue ou non mémorisée
+        """
+        return self._versions.get(table)
+
+    def invalider(self, *tables: str):
+        """
+        Oublie les tables indiquées (toutes si aucune)
+
+        Args:
+            *tables (str): Noms des tables modifiées
+        """
+        for table in tables or TABLES_CONTEXTE:
+            self._tables.pop(table, None)
+            self._versions.pop(table, None)
+
+
+def ouvrir_contexte() -> ContexteDonnees:
+    """
+    Crée le contexte de l'exécution en cours (appelé au début de app.py)
+
+    Returns:
+        ContexteDonnees: Nouveau contexte, vide
+    """
+    _courant.contexte = ContexteDonnees()
+    return _courant.contexte
+
+
+def invalider(*tables: str):
+    """
+    Invalide des tables dans le magasin partagé et dans le contexte de
+    l'exécution en cours, s'il existe
+
+    Args:
+        *tables (str): Noms des tables modifiées (toutes si aucune)
+    """
+    magasin.invalider(*tables)
+    contexte = getattr(_courant, "contexte", None)
+    if contexte is not None:
+        contexte.invalider(*tables)
@@ -5,44 +5,54 @@ Migration de CSV/Excel vers PostgreSQL via Supabase
 
 import pandas as pd
 import os
+import random
+import time
+from collections import Counter
 from datetime import datetime
 from io import BytesIO
-from openpyxl import load_workbook
-from openpyxl.chart import LineChart, Reference
-from openpyxl.chart.label import DataLabelList
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.chart.series import SeriesLabel
-from supabase import create_client, Client
 import streamlit as st
+from data import magasin, referentiel
+from data.agregats import enregistrer_mesure, invalider_mesure
+from data.instrumentation import instrumenter
+from data.sante import verifier_en_arriere_plan
+from data.resilience import (
+    ClientSurveille,
+    configuration_supabase,
+    creer_client,
+    est_erreur_transitoire,
+    est_objet_absent,
+    memoriser_instantane,
+    dernier_instantane
+)
 
 # =============================================================================
 # CONFIGURATION SUPABASE
 # =============================================================================
 
-# Récupération des credentials depuis les variables d'environnement
-SUPABASE_URL = os.getenv("SUPABASE_URL") or st.secrets.get("SUPABASE_URL", "")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY") or st.secrets.get("SUPABASE_KEY", "")
+# Client Supabase global (credentials lus à sa création, voir
+# resilience.configuration_supabase : variables d'environnement, puis secrets)
+_supabase_client: ClientSurveille = None
 
-# Validation des credentials
-if not SUPABASE_URL or not SUPABASE_KEY:
-    st.error("⚠️ Configuration Supabase manquante. Vérifiez vos variables d'environnement.")
 
-# Client Supabase global
-_supabase_client: Client = None
-
-
-def get_supabase_client() -> Client:
+def get_supabase_client() -> ClientSurveille:
     """
     Retourne le client Supabase (singleton)
 
+    Chaque requête a un délai maximal et passe par le coupe-circuit de sa
+    table (voir data/resilience.py). La configuration est lue au premier
+    appel, pas à l'import du module.
+
     Returns:
-        Client: Instance du client Supabase
+        ClientSurveille: Instance du client Supabase
     """
     global _supabase_client
 
     if _supabase_client is None:
+        url, cle = configuration_supabase()
+        if not url or not cle:
+            st.error("⚠️ Configuration Supabase manquante. Vérifiez vos variables d'environnement.")
         try:
-            _supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
+            _supabase_client = creer_client(url, cle)
         except Exception as e:
             st.error(f"❌ Erreur de connexion Supabase : {e}")
             raise
@@ -50,6 +60,69 @@ def get_supabase_client() -> Client:
     return _supabase_client
 
 
+def _est_conflit_unicite(erreur: Exception) -> bool:
+    """
+    Indique si une erreur Supabase/PostgreSQL est une violation de contrainte UNIQUE
+
+    Args:
+        erreur (Exception): Exception levée par le client
+
+    Returns:
+        bool: True si doublon de clé (code PostgreSQL 23505)
+    """
+    message = str(erreur).lower()
+    return (
+        getattr(erreur, "code", None) == "23505"
+        or "duplicate key value" in message
+        or "unique constraint" in message
+    )
+
+
+def _est_erreur_ligne(erreur: Exception) -> bool:
+    """
+    Indique si une erreur PostgreSQL est due au contenu d'une ligne (classe 23 :
+    doublon, clé étrangère, NOT NULL, CHECK), et non à la requête entière
+
+    Args:
+        erreur (Exception): Exception levée par le client
+
+    Returns:
+        bool: True pour un code 23xxx
+    """
+    return str(getattr(erreur, "code", "") or "").startswith("23") or _est_conflit_unicite(erreur)
+
+
+def _lecture_secours(nom: str, libelle: str, erreur: Exception, colonnes: list) -> pd.DataFrame:
+    """
+    Résultat de secours d'une lecture en échec : dernier résultat valide de la
+    table s'il existe (avec avertissement), sinon DataFrame vide (avec erreur)
+
+    Args:
+        nom (str): Table lue
+        libelle (str): Libellé des données pour les messages
+        erreur (Exception): Erreur rencontrée
+        colonnes (list): Colonnes du DataFrame vide
+
+    Returns:
+        DataFrame: Dernier instantané ou DataFrame vide
+    """
+    # Résultat de secours : jamais mémorisé dans le magasin partagé
+    magasin.invalider(nom)
+
+    instantane = dernier_instantane(nom)
+    if instantane is None:
+        st.error(f"❌ Erreur chargement {libelle} : {erreur}")
+        return pd.DataFrame(columns=colonnes)
+
+    horodatage, df = instantane
+    st.warning(
+        f"⚠️ Base indisponible : affichage des dernières données lues ({libelle}, "
+        f"{datetime.fromtimestamp(horodatage).strftime('%H:%M:%S')}) — {erreur}"
+    )
+    # Copie superficielle (copy-on-write) : l'instantané reste intact
+    return df.copy(deep=False)
+
+
 # =============================================================================
 # SCHÉMA DES DONNÉES (pour compatibilité avec le code existant)
 # =============================================================================
@@ -71,22 +144,18 @@ SUIVI_COLS = [
 
 def initialiser_fichiers():
     """
-    Fonction maintenue pour compatibilité avec app.py
-    Ne crée plus de fichiers, mais pourrait initialiser des données par défaut
+    Fonction maintenue pour compatibilité
+    Ne crée plus de fichiers : lance la vérification de la connexion Supabase
+    en arrière-plan (voir data/sante.py), sans bloquer l'affichage
     """
-    # Cette fonction peut rester vide ou vérifier la connexion Supabase
-    try:
-        client = get_supabase_client()
-        # Tester la connexion
-        client.table("equipements").select("id_equipement").limit(1).execute()
-    except Exception as e:
-        st.warning(f"⚠️ Vérification Supabase : {e}")
+    verifier_en_arriere_plan()
 
 
 # =============================================================================
 # LECTURE DES DONNÉES - ÉQUIPEMENTS
 # =============================================================================
 
+@instrumenter()
 def charger_equipements():
     """
     Charge la liste des équipements depuis Supabase
@@ -102,14 +171,15 @@ def charger_equipements():
         ).order("departement", desc=False).execute()
 
         if response.data:
-            df = pd.DataFrame(response.data)
-            return df[EQUIPEMENTS_COLS]
+            df = pd.DataFrame(response.data)[EQUIPEMENTS_COLS]
         else:
-            return pd.DataFrame(columns=EQUIPEMENTS_COLS)
+            df = pd.DataFrame(columns=EQUIPEMENTS_COLS)
+
+        memoriser_instantane("equipements", df.copy(deep=False))
+        return df
 
     except Exception as e:
-        st.error(f"❌ Erreur chargement équipements : {e}")
-        return pd.DataFrame(columns=EQUIPEMENTS_COLS)
+        return _lecture_secours("equipements", "équipements", e, EQUIPEMENTS_COLS)
 
 
 # =============================================================================
@@ -149,6 +219,7 @@ def charger_observations():
         st.error(f"❌ Erreur chargement observations : {e}")
         return pd.DataFrame(columns=OBSERVATIONS_COLS)
 """
+@instrumenter()
 def charger_observations():
     """
     Charge l'historique des observations depuis Supabase (toutes les lignes, sans limite)
@@ -166,7 +237,7 @@ def charger_observations():
         while True:
             response = client.table("observations").select(
                 "id_equipement, date, observation, recommandation, travaux_notes, analyste, importance"
-            ).order("date", desc=True).range(offset, offset + page_size).execute()
+            ).order("date", desc=True).range(offset, offset + page_size - 1).execute()
 
             if not response.data:
                 break
@@ -182,13 +253,15 @@ def charger_observations():
             df = pd.DataFrame(all_data)
             df.rename(columns={"travaux_notes": "Travaux effectués & Notes"}, inplace=True)
             df['date'] = pd.to_datetime(df['date'])
-            return df[OBSERVATIONS_COLS]
+            df = df[OBSERVATIONS_COLS]
         else:
-            return pd.DataFrame(columns=OBSERVATIONS_COLS)
+            df = pd.DataFrame(columns=OBSERVATIONS_COLS)
+
+        memoriser_instantane("observations", df.copy(deep=False))
+        return df
 
     except Exception as e:
-        st.error(f"❌ Erreur chargement observations : {e}")
-        return pd.DataFrame(columns=OBSERVATIONS_COLS)
+        return _lecture_secours("observations", "observations", e, OBSERVATIONS_COLS)
 # =============================================================================
 # LECTURE DES DONNÉES - SUIVI
 # =============================================================================
@@ -229,6 +302,7 @@ def charger_suivi():
 # LECTURE DES DONNÉES - SUIVI
 # =============================================================================
 
+@instrumenter()
 def charger_suivi():
     """
     Charge les données de suivi des équipements depuis Supabase (toutes les lignes, sans limite)
@@ -262,17 +336,20 @@ def charger_suivi():
         if all_data:
             df = pd.DataFrame(all_data)
             df['date'] = pd.to_datetime(df['date'])
-            return df[SUIVI_COLS]
+            df = df[SUIVI_COLS]
         else:
-            return pd.DataFrame(columns=SUIVI_COLS)
+            df = pd.DataFrame(columns=SUIVI_COLS)
+
+        memoriser_instantane("suivi_equipements", df.copy(deep=False))
+        return df
 
     except Exception as e:
-        st.error(f"❌ Erreur chargement suivi : {e}")
-        return pd.DataFrame(columns=SUIVI_COLS)
+        return _lecture_secours("suivi_equipements", "suivis", e, SUIVI_COLS)
 # =============================================================================
 # ÉCRITURE DES DONNÉES - OBSERVATIONS
 # =============================================================================
 
+@instrumenter()
 def sauvegarder_observation(id_equipement, date, observation, recommandation, trav_notes, analyste, importance=None):
     """
     Enregistre une nouvelle observation dans Supabase
@@ -319,6 +396,7 @@ def sauvegarder_observation(id_equipement, date, observation, recommandation, tr
 # ÉCRITURE DES DONNÉES - SUIVI
 # =============================================================================
 
+@instrumenter()
 def sauvegarder_suivi(id_equipement, point_mesure, date, vitesse_rpm, twf_rms_g, crest_factor, twf_peak_to_peak_g):
     """
     Enregistre une nouvelle mesure de suivi dans Supabase
@@ -353,13 +431,17 @@ def sauvegarder_suivi(id_equipement, point_mesure, date, vitesse_rpm, twf_rms_g,
         response = client.table("suivi_equipements").insert(data).execute()
 
         if response.data:
+            # Mise à jour incrémentale des agrégats de synthèse
+            enregistrer_mesure(id_equipement, point_mesure, data["date"], {
+                k: data[k] for k in ("vitesse_rpm", "twf_rms_g", "crest_factor", "twf_peak_to_peak_g")
+            })
             return True, "✅ Mesure de suivi enregistrée avec succès"
         else:
             return False, "❌ Erreur lors de l'enregistrement"
 
     except Exception as e:
         # Gestion de l'erreur de doublon (contrainte UNIQUE)
-        if "duplicate key value" in str(e).lower() or "unique constraint" in str(e).lower():
+        if _est_conflit_unicite(e):
             return False, f"⚠️ Une mesure existe déjà pour cet équipement, point de mesure et date"
         return False, f"❌ Erreur lors de la sauvegarde : {e}"
 
@@ -367,6 +449,7 @@ def sauvegarder_suivi(id_equipement, point_mesure, date, vitesse_rpm, twf_rms_g,
 # ÉCRITURE DES DONNÉES - ÉQUIPEMENTS
 # =============================================================================
 
+@instrumenter()
 def sauvegarder_equipement(id_equipement, departement):
     """
     Ajoute un nouvel équipement dans Supabase
@@ -381,15 +464,7 @@ def sauvegarder_equipement(id_equipement, departement):
     try:
         client = get_supabase_client()
 
-        # Vérifier si l'équipement existe déjà
-        existing = client.table("equipements").select("id_equipement").eq(
-            "id_equipement", id_equipement
-        ).execute()
-
-        if existing.data:
-            return False, f"⚠️ L'équipement '{id_equipement}' existe déjà"
-
-        # Insérer le nouvel équipement
+        # Insérer directement : un doublon est refusé par la clé primaire
         data = {
             "id_equipement": id_equipement,
             "departement": departement
@@ -403,8 +478,241 @@ def sauvegarder_equipement(id_equipement, departement):
             return False, "❌ Erreur lors de l'ajout"
 
     except Exception as e:
+        if _est_conflit_unicite(e):
+            return False, f"⚠️ L'équipement '{id_equipement}' existe déjà"
         return False, f"❌ Erreur lors de l'ajout : {e}"
 #--------------------------------------------------------------------------------+++++++++
+# =============================================================================
+# ÉCRITURE PAR LOTS (imports, migrations, jeux de données de test)
+# =============================================================================
+
+# Nombre de lignes par requête multi-lignes
+TAILLE_LOT_INSERTION = int(os.getenv("TAILLE_LOT_INSERTION", "500"))
+
+# Nombre de tentatives par lot en cas d'erreur transitoire (réseau, 5xx, 429)
+NB_TENTATIVES_INSERTION = int(os.getenv("NB_TENTATIVES_INSERTION", "3"))
+
+# Délai initial de la reprise exponentielle (secondes)
+DELAI_REPRISE_INSERTION = 0.5
+
+# Clés naturelles des tables (contraintes UNIQUE de data/supabase.sql)
+CLE_SUIVI = "id_equipement,point_mesure,date"
+CLE_OBSERVATIONS = "id_equipement,date"
+
+# Erreur rapportée pour une ligne dont la clé existe déjà (lot sans mise à jour)
+MESSAGE_DOUBLON_LOT = "Doublon (une ligne existe déjà pour cette clé)"
+
+
+def _lignes_ignorees(lot: list, inserees: list, on_conflict: str) -> list:
+    """Positions des lignes du lot absentes de la réponse (clé déjà en base)."""
+    colonnes = on_conflict.split(",")
+
+    def cle(ligne):
+        # Dates comparées au jour (la réponse peut les renvoyer avec l'heure)
+        return tuple(str(ligne[c])[:10] if c == "date" else ligne[c] for c in colonnes)
+
+    restantes = Counter(cle(ligne) for ligne in inserees)
+    positions = []
+    for position, ligne in enumerate(lot):
+        if restantes[cle(ligne)]:
+            restantes[cle(ligne)] -= 1
+        else:
+            positions.append(position)
+    return positions
+
+
+def _inserer_lot(client, table: str, lot: list, on_conflict: str,
+                 ignorer_doublons: bool = False) -> list:
+    """
+    Écrit un lot par UPSERT sur la clé naturelle, repris avec délai
+    exponentiel (+ gigue) sur erreur transitoire
+
+    L'UPSERT rend la reprise idempotente : si la réponse est perdue après
+    l'écriture, la nouvelle tentative ne crée aucun doublon.
+
+    Args:
+        client (Client): Client Supabase
+        table (str): Nom de la table
+        lot (list): Enregistrements (dicts)
+        on_conflict (str): Colonnes de la clé naturelle
+        ignorer_doublons (bool): True pour une insertion (ON CONFLICT DO
+            NOTHING : les lignes existantes ne sont pas modifiées) ; False
+            pour une mise à jour des lignes existantes
+
+    Returns:
+        list: Positions dans le lot des lignes ignorées car leur clé existait
+            déjà (insertion réussie dès la première tentative seulement : après
+            une reprise, une ligne absente de la réponse a pu être écrite par la
+            tentative perdue)
+
+    Raises:
+        Exception: Erreur non transitoire, ou transitoire après la dernière tentative
+    """
+    for tentative in range(NB_TENTATIVES_INSERTION):
+        try:
+            reponse = client.table(table).upsert(
+                lot, on_conflict=on_conflict, ignore_duplicates=ignorer_doublons
+            ).execute()
+        except Exception as e:
+            if tentative == NB_TENTATIVES_INSERTION - 1 or not est_erreur_transitoire(e):
+                raise
+            time.sleep(DELAI_REPRISE_INSERTION * 2 ** tentative * (1 + random.random()))
+        else:
+            if not ignorer_doublons or tentative:
+                return []
+            return _lignes_ignorees(lot, getattr(reponse, "data", None) or [], on_conflict)
+
+
+def _inserer_par_lots(table: str, enregistrements: list, index: list, on_conflict: str,
+                      taille_lot: int = None, progression=None,
+                      ignorer_doublons: bool = False) -> list:
+    """
+    Écrit des enregistrements par requêtes multi-lignes (voir _inserer_lot)
+
+    Un lot rejeté à cause d'une ligne (erreur 23xxx : contrainte, NOT NULL...)
+    est coupé en deux récursivement pour isoler les lignes fautives : les
+    autres lignes du lot sont tout de même écrites. Toute autre erreur fait
+    échouer le lot entier, sans nouvelle requête.
+
+    Args:
+        table (str): Nom de la table
+        enregistrements (list): Enregistrements (dicts) prêts à écrire
+        index (list): Identifiant de chaque enregistrement (pour le rapport)
+        on_conflict (str): Colonnes de la clé naturelle
+        taille_lot (int, optional): Lignes par requête (TAILLE_LOT_INSERTION par défaut)
+        progression (callable, optional): progression(nb_traites, total) après chaque lot
+        ignorer_doublons (bool): Insertion seule ; les lignes dont la clé
+            existe déjà sont rapportées en échec (MESSAGE_DOUBLON_LOT)
+
+    Returns:
+        list: Échecs [(index, message)]
+    """
+    client = get_supabase_client()
+    taille_lot = taille_lot or TAILLE_LOT_INSERTION
+    total = len(enregistrements)
+    echecs = []
+
+    def inserer(debut, fin):
+        try:
+            ignorees = _inserer_lot(client, table, enregistrements[debut:fin], on_conflict,
+                                    ignorer_doublons)
+            echecs.extend((index[debut + i], MESSAGE_DOUBLON_LOT) for i in ignorees)
+        except Exception as e:
+            if fin - debut == 1 or not _est_erreur_ligne(e):
+                echecs.extend((index[i], str(e)) for i in range(debut, fin))
+            else:
+                milieu = (debut + fin) // 2
+                inserer(debut, milieu)
+                inserer(milieu, fin)
+
+    for debut in range(0, total, taille_lot):
+        fin = min(debut + taille_lot, total)
+        inserer(debut, fin)
+        if progression:
+            progression(fin, total)
+
+    return echecs
+
+
+def _rapport_lots(df: pd.DataFrame, echecs: list, libelle: str) -> tuple:
+    """Construit le tuple (success, message, DataFrame des échecs)."""
+    df_echecs = pd.DataFrame(echecs, columns=["index", "erreur"]).set_index("index")
+    nb_inserees = len(df) - len(df_echecs)
+
+    if df_echecs.empty:
+        return True, f"✅ {nb_inserees} {libelle} enregistrée(s)", df_echecs
+    if nb_inserees:
+        return False, f"⚠️ {nb_inserees} {libelle} enregistrée(s), {len(df_echecs)} en échec", df_echecs
+    return False, f"❌ Aucun enregistrement ({len(df_echecs)} {libelle} en échec)", df_echecs
+
+
+def _valeurs_json(df: pd.DataFrame) -> list:
+    """Convertit un DataFrame en dicts JSON-compatibles (NaN → None)."""
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+@instrumenter()
+def sauvegarder_suivis_batch(df_suivis: pd.DataFrame, taille_lot: int = None, progression=None):
+    """
+    Enregistre un ensemble de mesures de suivi par requêtes multi-lignes
+
+    Args:
+        df_suivis (DataFrame): Mesures avec les colonnes SUIVI_COLS (colonnes
+            supplémentaires ignorées)
+        taille_lot (int, optional): Lignes par requête (TAILLE_LOT_INSERTION par défaut)
+        progression (callable, optional): progression(nb_traites, total) après chaque lot
+
+    Returns:
+        tuple: (success: bool, message: str, echecs: DataFrame indexé comme
+                df_suivis avec la colonne 'erreur')
+    """
+    if df_suivis.empty:
+        return True, "ℹ️ Aucune mesure à enregistrer", pd.DataFrame(columns=["erreur"])
+
+    try:
+        df = df_suivis[SUIVI_COLS].copy()
+        df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
+        for col in SUIVI_COLS[3:]:
+            df[col] = pd.to_numeric(df[col]).astype(float)
+
+        echecs = _inserer_par_lots(
+            "suivi_equipements", _valeurs_json(df), list(df.index), CLE_SUIVI,
+            taille_lot, progression, ignorer_doublons=True
+        )
+    except Exception as e:
+        return False, f"❌ Erreur lors de la sauvegarde : {e}", \
+            pd.DataFrame({"erreur": str(e)}, index=df_suivis.index)
+
+    # Agrégats des équipements touchés reconstruits à la prochaine lecture
+    for id_equipement in df["id_equipement"].unique():
+        invalider_mesure(id_equipement)
+
+    return _rapport_lots(df, echecs, "mesure(s) de suivi")
+
+
+@instrumenter()
+def sauvegarder_observations_batch(df_observations: pd.DataFrame, taille_lot: int = None,
+                                   progression=None):
+    """
+    Enregistre un ensemble d'observations par requêtes multi-lignes
+
+    Args:
+        df_observations (DataFrame): Observations avec les colonnes OBSERVATIONS_COLS
+            (la colonne des travaux peut s'appeler "Travaux effectués & Notes" ou
+            "travaux_notes" ; "importance" est optionnelle)
+        taille_lot (int, optional): Lignes par requête (TAILLE_LOT_INSERTION par défaut)
+        progression (callable, optional): progression(nb_traites, total) après chaque lot
+
+    Returns:
+        tuple: (success: bool, message: str, echecs: DataFrame indexé comme
+                df_observations avec la colonne 'erreur')
+    """
+    if df_observations.empty:
+        return True, "ℹ️ Aucune observation à enregistrer", pd.DataFrame(columns=["erreur"])
+
+    try:
+        df = df_observations.rename(columns={"Travaux effectués & Notes": "travaux_notes"})
+        if "importance" not in df.columns:
+            df = df.assign(importance=None)
+        colonnes = [
+            "id_equipement", "date", "observation", "recommandation",
+            "travaux_notes", "analyste", "importance"
+        ]
+        df = df[colonnes].copy()
+        df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
+        df["importance"] = df["importance"].replace("", None)
+
+        echecs = _inserer_par_lots(
+            "observations", _valeurs_json(df), list(df.index), CLE_OBSERVATIONS,
+            taille_lot, progression, ignorer_doublons=True
+        )
+    except Exception as e:
+        return False, f"❌ Erreur lors de la sauvegarde : {e}", \
+            pd.DataFrame({"erreur": str(e)}, index=df_observations.index)
+
+    return _rapport_lots(df, echecs, "observation(s)")
+
+
 # =============================================================================
 # MODIFICATIONS
 # =============================================================================
@@ -422,6 +730,10 @@ def modifier_observation(
     """
     Modifie une observation existante
 
+    Mise à jour en place sur la clé naturelle (id_equipement, date) : une seule
+    requête, la ligne n'est jamais supprimée. Un changement de date vers une
+    date déjà occupée est refusé par la contrainte d'unicité.
+
     Args:
         id_equipement (str): ID de l'équipement
         date_originale (date): Date originale de l'observation
@@ -436,66 +748,36 @@ def modifier_observation(
         tuple: (success: bool, message: str)
     """
     try:
-        from supabase import create_client
-        import os
-
-        # Connexion Supabase
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_KEY")
-        supabase = create_client(supabase_url, supabase_key)
+        client = get_supabase_client()
 
         # Convertir les dates en string pour Supabase
-        import pandas as pd
         date_originale_str = pd.to_datetime(date_originale).strftime('%Y-%m-%d')
         nouvelle_date_str = pd.to_datetime(nouvelle_date).strftime('%Y-%m-%d')
 
-        # Vérifier que l'observation existe
-        result = supabase.table('observations') \
-            .select('*') \
-            .eq('id_equipement', id_equipement) \
-            .eq('date', date_originale_str) \
-            .execute()
-
-        if not result.data:
-            return False, "⚠️ Observation non trouvée"
-
-        # Si la date a changé, vérifier qu'il n'y a pas déjà une observation à la nouvelle date
-        if date_originale_str != nouvelle_date_str:
-            check_result = supabase.table('observations') \
-                .select('*') \
-                .eq('id_equipement', id_equipement) \
-                .eq('date', nouvelle_date_str) \
-                .execute()
-
-            if check_result.data:
-                return False, f"⚠️ Une observation existe déjà pour cet équipement à la date {nouvelle_date}"
-
-        # Supprimer l'ancienne observation
-        supabase.table('observations') \
-            .delete() \
-            .eq('id_equipement', id_equipement) \
-            .eq('date', date_originale_str) \
-            .execute()
-
-        # Créer la nouvelle observation avec les nouvelles données
-        nouvelle_obs = {
-            'id_equipement': id_equipement,
+        modifications = {
             'date': nouvelle_date_str,
             'observation': observation,
             'recommandation': recommandation,
             'travaux_notes': travaux_notes,
-            'analyste': analyste
+            'analyste': analyste,
+            'importance': importance if importance else None
         }
 
-        # Ajouter l'importance si fournie
-        if importance:
-            nouvelle_obs['importance'] = importance
+        # UPDATE ... WHERE clé naturelle RETURNING * (un seul aller-retour)
+        response = client.table('observations') \
+            .update(modifications) \
+            .eq('id_equipement', id_equipement) \
+            .eq('date', date_originale_str) \
+            .execute()
 
-        supabase.table('observations').insert(nouvelle_obs).execute()
+        if not response.data:
+            return False, "⚠️ Observation non trouvée"
 
         return True, "✅ Observation modifiée avec succès"
 
     except Exception as e:
+        if _est_conflit_unicite(e):
+            return False, f"⚠️ Une observation existe déjà pour cet équipement à la date {nouvelle_date}"
         return False, f"❌ Erreur lors de la modification : {e}"
 
 
@@ -512,6 +794,10 @@ def modifier_suivi(
     """
     Modifie un suivi de mesure existant
 
+    Mise à jour en place sur la clé naturelle (id_equipement, point_mesure, date) :
+    une seule requête, la ligne n'est jamais supprimée. Un changement de date vers
+    une date déjà occupée est refusé par la contrainte d'unicité.
+
     Args:
         id_equipement (str): ID de l'équipement
         point_mesure_original (str): Point de mesure original
@@ -526,54 +812,13 @@ def modifier_suivi(
         tuple: (success: bool, message: str)
     """
     try:
-        from supabase import create_client
-        import os
-
-        # Connexion Supabase
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_KEY")
-        supabase = create_client(supabase_url, supabase_key)
+        client = get_supabase_client()
 
         # Convertir les dates en string pour Supabase
-        import pandas as pd
         date_originale_str = pd.to_datetime(date_originale).strftime('%Y-%m-%d')
         nouvelle_date_str = pd.to_datetime(nouvelle_date).strftime('%Y-%m-%d')
 
-        # Vérifier que le suivi existe
-        result = supabase.table('suivi_equipements') \
-            .select('*') \
-            .eq('id_equipement', id_equipement) \
-            .eq('point_mesure', point_mesure_original) \
-            .eq('date', date_originale_str) \
-            .execute()
-
-        if not result.data:
-            return False, "⚠️ Suivi de mesure non trouvé"
-
-        # Si la date a changé, vérifier qu'il n'y a pas déjà un suivi à la nouvelle date
-        if date_originale_str != nouvelle_date_str:
-            check_result = supabase.table('suivi_equipements') \
-                .select('*') \
-                .eq('id_equipement', id_equipement) \
-                .eq('point_mesure', point_mesure_original) \
-                .eq('date', nouvelle_date_str) \
-                .execute()
-
-            if check_result.data:
-                return False, f"⚠️ Un suivi existe déjà pour cet équipement, ce point de mesure et la date {nouvelle_date}"
-
-        # Supprimer l'ancien suivi
-        supabase.table('suivi_equipements') \
-            .delete() \
-            .eq('id_equipement', id_equipement) \
-            .eq('point_mesure', point_mesure_original) \
-            .eq('date', date_originale_str) \
-            .execute()
-
-        # Créer le nouveau suivi avec les nouvelles données
-        nouveau_suivi = {
-            'id_equipement': id_equipement,
-            'point_mesure': point_mesure_original,
+        modifications = {
             'date': nouvelle_date_str,
             'vitesse_rpm': vitesse_rpm,
             'twf_rms_g': twf_rms_g,
@@ -581,11 +826,28 @@ def modifier_suivi(
             'twf_peak_to_peak_g': twf_peak_to_peak_g
         }
 
-        supabase.table('suivi_equipements').insert(nouveau_suivi).execute()
+        # UPDATE ... WHERE clé naturelle RETURNING * (un seul aller-retour)
+        response = client.table('suivi_equipements') \
+            .update(modifications) \
+            .eq('id_equipement', id_equipement) \
+            .eq('point_mesure', point_mesure_original) \
+            .eq('date', date_originale_str) \
+            .execute()
+
+        if not response.data:
+            return False, "⚠️ Suivi de mesure non trouvé"
+
+        # Agrégats : anciennes valeurs retirées, nouvelles ajoutées
+        invalider_mesure(id_equipement, point_mesure_original, date_originale_str)
+        enregistrer_mesure(id_equipement, point_mesure_original, nouvelle_date_str, {
+            k: modifications[k] for k in ("vitesse_rpm", "twf_rms_g", "crest_factor", "twf_peak_to_peak_g")
+        })
 
         return True, "✅ Suivi de mesure modifié avec succès"
 
     except Exception as e:
+        if _est_conflit_unicite(e):
+            return False, f"⚠️ Un suivi existe déjà pour cet équipement, ce point de mesure et la date {nouvelle_date}"
         return False, f"❌ Erreur lors de la modification : {e}"
 #--------------------------------------------------------------------------------+++++++++
 
@@ -611,23 +873,15 @@ def supprimer_observation(id_equipement, date):
         # Convertir la date au format ISO
         date_str = pd.to_datetime(date).strftime("%Y-%m-%d")
 
-        # Vérifier l'existence
-        existing = client.table("observations").select("id").eq(
-            "id_equipement", id_equipement
-        ).eq("date", date_str).execute()
-
-        if not existing.data:
-            return False, "⚠️ Aucune observation trouvée pour cet équipement et cette date"
-
-        # Supprimer
+        # Supprimer (DELETE ... RETURNING : aucune ligne renvoyée = introuvable)
         response = client.table("observations").delete().eq(
             "id_equipement", id_equipement
         ).eq("date", date_str).execute()
 
-        if response.data or response.count is not None:
+        if response.data:
             return True, "✅ Observation supprimée avec succès"
         else:
-            return False, "❌ Erreur lors de la suppression"
+            return False, "⚠️ Aucune observation trouvée pour cet équipement et cette date"
 
     except Exception as e:
         return False, f"❌ Erreur lors de la suppression : {e}"
@@ -637,50 +891,73 @@ def supprimer_observation(id_equipement, date):
 # SUPPRESSIONS - ÉQUIPEMENTS
 # =============================================================================
 
+# Fonction SQL de suppression en cascade (data/supabase.sql) ; passe à False si
+# elle n'est pas installée sur la base, pour ne plus tenter l'appel
+_rpc_suppression_cascade = True
+
+
 def supprimer_equipement(id_equipement):
     """
     Supprime un équipement ET toutes ses observations/suivis associés de Supabase
     (grâce aux contraintes CASCADE définies dans le schéma SQL)
 
+    Un seul appel à la fonction SQL supprimer_equipement_cascade, qui renvoie le
+    nombre d'enregistrements associés supprimés. Si la fonction n'est pas
+    installée : comptages puis DELETE (sans vérification préalable d'existence).
+
     Args:
         id_equipement (str): ID équipement à supprimer
 
     Returns:
         tuple: (success: bool, message: str)
     """
+    global _rpc_suppression_cascade
+
     try:
         client = get_supabase_client()
-
-        # Vérifier l'existence
-        existing = client.table("equipements").select("id_equipement").eq(
-            "id_equipement", id_equipement
-        ).execute()
-
-        if not existing.data:
+        resultat = None
+
+        if _rpc_suppression_cascade:
+            try:
+                resultat = client.rpc(
+                    "supprimer_equipement_cascade", {"p_id_equipement": id_equipement}
+                ).execute().data
+            except Exception as e:
+                if not est_objet_absent(e):
+                    raise
+                _rpc_suppression_cascade = False
+
+        if resultat is None:
+            # Repli : comptages (pour le message) puis suppression en cascade
+            obs_count = client.table("observations").select("id", count="exact").eq(
+                "id_equipement", id_equipement
+            ).limit(1).execute()
+
+            suivi_count = client.table("suivi_equipements").select("id", count="exact").eq(
+                "id_equipement", id_equipement
+            ).limit(1).execute()
+
+            response = client.table("equipements").delete().eq(
+                "id_equipement", id_equipement
+            ).execute()
+
+            resultat = {
+                "supprime": bool(response.data),
+                "nb_observations": obs_count.count or 0,
+                "nb_suivis": suivi_count.count or 0,
+            }
+
+        if isinstance(resultat, list):
+            resultat = resultat[0] if resultat else {}
+
+        if not resultat.get("supprime"):
             return False, "⚠️ Équipement non trouvé"
 
-        # Compter les observations et suivis associés (pour le message)
-        obs_count = client.table("observations").select("id", count="exact").eq(
-            "id_equipement", id_equipement
-        ).execute()
-
-        suivi_count = client.table("suivi_equipements").select("id", count="exact").eq(
-            "id_equipement", id_equipement
-        ).execute()
-
-        nb_obs = obs_count.count or 0
-        nb_suivi = suivi_count.count or 0
-
-        # Supprimer l'équipement (CASCADE supprimera automatiquement les observations/suivis)
-        response = client.table("equipements").delete().eq(
-            "id_equipement", id_equipement
-        ).execute()
-
-        if response.data or response.count is not None:
-            msg = f"✅ Équipement supprimé ({nb_obs} observation(s) et {nb_suivi} suivi(s) associé(s) supprimé(s))"
-            return True, msg
-        else:
-            return False, "❌ Erreur lors de la suppression"
+        invalider_mesure(id_equipement)
+        nb_obs = resultat.get("nb_observations", 0)
+        nb_suivi = resultat.get("nb_suivis", 0)
+        msg = f"✅ Équipement supprimé ({nb_obs} observation(s) et {nb_suivi} suivi(s) associé(s) supprimé(s))"
+        return True, msg
 
     except Exception as e:
         return False, f"❌ Erreur lors de la suppression : {e}"
@@ -708,40 +985,274 @@ def supprimer_suivi(id_equipement, point_mesure, date):
         # Convertir la date au format ISO
         date_str = pd.to_datetime(date).strftime("%Y-%m-%d")
 
-        # Vérifier l'existence
-        existing = client.table("suivi_equipements").select("id").eq(
+        # Supprimer (DELETE ... RETURNING : aucune ligne renvoyée = introuvable)
+        response = client.table("suivi_equipements").delete().eq(
             "id_equipement", id_equipement
         ).eq("point_mesure", point_mesure).eq("date", date_str).execute()
 
-        if not existing.data:
+        if response.data:
+            invalider_mesure(id_equipement, point_mesure, date_str)
+            return True, "✅ Suivi supprimé avec succès"
+        else:
             return False, "⚠️ Aucun suivi trouvé pour ces critères"
 
-        # Supprimer
-        response = client.table("suivi_equipements").delete().eq(
+    except Exception as e:
+        return False, f"❌ Erreur lors de la suppression : {e}"
+
+
+# =============================================================================
+# OPÉRATIONS EN MASSE (suppressions et modifications groupées)
+# =============================================================================
+
+def supprimer_suivis_periode(id_equipement, date_debut, date_fin, points_mesure=None):
+    """
+    Supprime toutes les mesures d'un équipement sur une période (une seule requête)
+
+    Args:
+        id_equipement (str): ID équipement
+        date_debut (date): Début de période (incluse)
+        date_fin (date): Fin de période (incluse)
+        points_mesure (list, optional): Points de mesure concernés (tous si None)
+
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    try:
+        client = get_supabase_client()
+
+        requete = client.table("suivi_equipements").delete().eq(
             "id_equipement", id_equipement
-        ).eq("point_mesure", point_mesure).eq("date", date_str).execute()
+        ).gte(
+            "date", pd.to_datetime(date_debut).strftime("%Y-%m-%d")
+        ).lte(
+            "date", pd.to_datetime(date_fin).strftime("%Y-%m-%d")
+        )
+        if points_mesure:
+            requete = requete.in_("point_mesure", list(points_mesure))
 
-        if response.data or response.count is not None:
-            return True, "✅ Suivi supprimé avec succès"
-        else:
-            return False, "❌ Erreur lors de la suppression"
+        try:
+            response = requete.execute()
+        finally:
+            # Agrégats reconstruits même si la réponse est perdue après la suppression
+            invalider_mesure(id_equipement)
+        nb = len(response.data or [])
+
+        if not nb:
+            return False, "⚠️ Aucun suivi trouvé sur cette période"
+        return True, f"✅ {nb} suivi(s) supprimé(s)"
+
+    except Exception as e:
+        return False, f"❌ Erreur lors de la suppression : {e}"
+
+
+def supprimer_suivis_selection(df_cles: pd.DataFrame):
+    """
+    Supprime une sélection de mesures : une requête DELETE par couple
+    (équipement, point de mesure), filtrée sur la liste des dates
+
+    Args:
+        df_cles (DataFrame): Colonnes id_equipement, point_mesure, date
+
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    if df_cles.empty:
+        return False, "⚠️ Aucun suivi sélectionné"
+
+    nb = 0
+    touches = set()
+    try:
+        client = get_supabase_client()
+        cles = df_cles.assign(date=pd.to_datetime(df_cles["date"]).dt.strftime("%Y-%m-%d"))
+
+        for (id_equipement, point_mesure), groupe in cles.groupby(["id_equipement", "point_mesure"]):
+            touches.add(id_equipement)
+            response = client.table("suivi_equipements").delete().eq(
+                "id_equipement", id_equipement
+            ).eq("point_mesure", point_mesure).in_(
+                "date", groupe["date"].unique().tolist()
+            ).execute()
+            nb += len(response.data or [])
+
+        if not nb:
+            return False, "⚠️ Aucun suivi trouvé pour cette sélection"
+        return True, f"✅ {nb} suivi(s) supprimé(s)"
+
+    except Exception as e:
+        return False, (f"❌ Erreur lors de la suppression ({nb} suivi(s) supprimé(s) "
+                       f"avant l'erreur) : {e}")
+
+    finally:
+        # Agrégats des équipements touchés reconstruits, y compris après une
+        # erreur sur un groupe suivant (les groupes précédents sont supprimés)
+        for id_equipement in touches:
+            invalider_mesure(id_equipement)
+
+
+def supprimer_observations_periode(id_equipement, date_debut, date_fin):
+    """
+    Supprime toutes les observations d'un équipement sur une période (une seule requête)
+
+    Args:
+        id_equipement (str): ID équipement
+        date_debut (date): Début de période (incluse)
+        date_fin (date): Fin de période (incluse)
+
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    try:
+        client = get_supabase_client()
+
+        response = client.table("observations").delete().eq(
+            "id_equipement", id_equipement
+        ).gte(
+            "date", pd.to_datetime(date_debut).strftime("%Y-%m-%d")
+        ).lte(
+            "date", pd.to_datetime(date_fin).strftime("%Y-%m-%d")
+        ).execute()
+        nb = len(response.data or [])
+
+        if not nb:
+            return False, "⚠️ Aucune observation trouvée sur cette période"
+        return True, f"✅ {nb} observation(s) supprimée(s)"
 
     except Exception as e:
         return False, f"❌ Erreur lors de la suppression : {e}"
 
 
+def supprimer_observations_selection(df_cles: pd.DataFrame):
+    """
+    Supprime une sélection d'observations : une requête DELETE par équipement,
+    filtrée sur la liste des dates
+
+    Args:
+        df_cles (DataFrame): Colonnes id_equipement, date
+
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    if df_cles.empty:
+        return False, "⚠️ Aucune observation sélectionnée"
+
+    nb = 0
+    try:
+        client = get_supabase_client()
+        cles = df_cles.assign(date=pd.to_datetime(df_cles["date"]).dt.strftime("%Y-%m-%d"))
+
+        for id_equipement, groupe in cles.groupby("id_equipement"):
+            response = client.table("observations").delete().eq(
+                "id_equipement", id_equipement
+            ).in_("date", groupe["date"].unique().tolist()).execute()
+            nb += len(response.data or [])
+
+        if not nb:
+            return False, "⚠️ Aucune observation trouvée pour cette sélection"
+        return True, f"✅ {nb} observation(s) supprimée(s)"
+
+    except Exception as e:
+        return False, (f"❌ Erreur lors de la suppression ({nb} observation(s) supprimée(s) "
+                       f"avant l'erreur) : {e}")
+
+
+def modifier_suivis_batch(df_suivis: pd.DataFrame, taille_lot: int = None):
+    """
+    Met à jour un ensemble de mesures existantes par UPSERT multi-lignes sur la
+    clé naturelle (id_equipement, point_mesure, date)
+
+    Args:
+        df_suivis (DataFrame): Mesures modifiées (colonnes SUIVI_COLS)
+        taille_lot (int, optional): Lignes par requête (TAILLE_LOT_INSERTION par défaut)
+
+    Returns:
+        tuple: (success: bool, message: str, echecs: DataFrame)
+    """
+    if df_suivis.empty:
+        return True, "ℹ️ Aucune modification à enregistrer", pd.DataFrame(columns=["erreur"])
+
+    try:
+        df = df_suivis[SUIVI_COLS].copy()
+        df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
+        for col in SUIVI_COLS[3:]:
+            df[col] = pd.to_numeric(df[col]).astype(float)
+
+        echecs = _inserer_par_lots(
+            "suivi_equipements", _valeurs_json(df), list(df.index), CLE_SUIVI, taille_lot
+        )
+    except Exception as e:
+        return False, f"❌ Erreur lors de la modification : {e}", \
+            pd.DataFrame({"erreur": str(e)}, index=df_suivis.index)
+
+    for id_equipement in df["id_equipement"].unique():
+        invalider_mesure(id_equipement)
+
+    return _rapport_lots(df, echecs, "mesure(s) de suivi")
+
+
+def modifier_observations_batch(df_observations: pd.DataFrame, taille_lot: int = None):
+    """
+    Met à jour un ensemble d'observations existantes par UPSERT multi-lignes sur
+    la clé naturelle (id_equipement, date)
+
+    Args:
+        df_observations (DataFrame): Observations modifiées (colonnes OBSERVATIONS_COLS)
+        taille_lot (int, optional): Lignes par requête (TAILLE_LOT_INSERTION par défaut)
+
+    Returns:
+        tuple: (success: bool, message: str, echecs: DataFrame)
+    """
+    if df_observations.empty:
+        return True, "ℹ️ Aucune modification à enregistrer", pd.DataFrame(columns=["erreur"])
+
+    try:
+        df = df_observations.rename(columns={"Travaux effectués & Notes": "travaux_notes"})
+        df = df[[
+            "id_equipement", "date", "observation", "recommandation",
+            "travaux_notes", "analyste", "importance"
+        ]].copy()
+        df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
+        df["importance"] = df["importance"].replace("", None)
+
+        echecs = _inserer_par_lots(
+            "observations", _valeurs_json(df), list(df.index), CLE_OBSERVATIONS, taille_lot
+        )
+    except Exception as e:
+        return False, f"❌ Erreur lors de la modification : {e}", \
+            pd.DataFrame({"erreur": str(e)}, index=df_observations.index)
+
+    return _rapport_lots(df, echecs, "observation(s)")
+
+
 # =============================================================================
 # EXPORTS EXCEL (inchangés - utilisent les DataFrames retournés par les fonctions ci-dessus)
 # =============================================================================
 
-def exporter_observations_excel(df_observations, df_equipements):
+def _departement_de(df_equipements=None) -> dict:
+    """
+    Table équipement → département pour enrichir un export
+
+    Args:
+        df_equipements (DataFrame, optional): Référentiel fourni par l'appelant ;
+            à défaut, dictionnaire du référentiel partagé (construit une fois par version)
+
+    Returns:
+        dict: {id_equipement: departement}
+    """
+    if df_equipements is None:
+        return referentiel.referentiel().departement_de
+    return dict(zip(df_equipements['id_equipement'], df_equipements['departement']))
+
+
+@instrumenter()
+def exporter_observations_excel(df_observations, df_equipements=None):
     """
     Génère un fichier Excel avec observations enrichies
     Format professionnel avec tableau Excel et formatage
 
     Args:
         df_observations (DataFrame): Observations filtrées
-        df_equipements (DataFrame): Référentiel équipements
+        df_equipements (DataFrame, optional): Référentiel équipements
+            (référentiel partagé par défaut)
 
     Returns:
         BytesIO: Buffer contenant fichier Excel
@@ -749,11 +1260,9 @@ def exporter_observations_excel(df_observations, df_equipements):
     from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
     from openpyxl.utils import get_column_letter
 
-    # Fusion
-    df_export = df_observations.merge(
-        df_equipements[['id_equipement', 'departement']],
-        on='id_equipement',
-        how='left'
+    # Département de chaque équipement (table de hachage du référentiel)
+    df_export = df_observations.assign(
+        departement=df_observations['id_equipement'].map(_departement_de(df_equipements))
     )
 
     # Colonnes export
@@ -848,6 +1357,7 @@ def exporter_observations_excel(df_observations, df_equipements):
     return buffer
 
 
+@instrumenter()
 def exporter_equipements_excel(df_equipements):
     """
     Génère un fichier Excel avec liste équipements
@@ -878,7 +1388,8 @@ def exporter_equipements_excel(df_equipements):
     return buffer
 
 
-def exporter_suivi_excel(df_suivi, df_equipements):
+@instrumenter()
+def exporter_suivi_excel(df_suivi, df_equipements=None):
     """
     Génère un fichier Excel professionnel avec suivi de mesures
     - Un onglet par ID équipement
@@ -886,7 +1397,8 @@ def exporter_suivi_excel(df_suivi, df_equipements):
 
     Args:
         df_suivi (DataFrame): Données de suivi filtrées
-        df_equipements (DataFrame): Référentiel équipements
+        df_equipements (DataFrame, optional): Référentiel équipements
+            (référentiel partagé par défaut)
 
     Returns:
         BytesIO: Buffer contenant fichier Excel
@@ -899,11 +1411,9 @@ def exporter_suivi_excel(df_suivi, df_equipements):
 
     buffer = BytesIO()
 
-    # Fusion avec départements
-    df_export = df_suivi.merge(
-        df_equipements[['id_equipement', 'departement']],
-        on='id_equipement',
-        how='left'
+    # Département de chaque équipement (table de hachage du référentiel)
+    df_export = df_suivi.assign(
+        departement=df_suivi['id_equipement'].map(_departement_de(df_equipements))
     )
 
     with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
@@ -0,0 +1,408 @@
+"""
+Import en masse des mesures de suivi (CSV / Excel)
+Lecture par blocs, validation vectorisée, dédoublonnage par index de clés
+et insertion par lots multi-lignes (sauvegarder_suivis_batch)
+"""
+
+import csv
+import io
+import os
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from data.data_manager import (
+    SUIVI_COLS,
+    get_supabase_client,
+    sauvegarder_suivis_batch
+)
+from data.referentiel import referentiel
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Nombre de lignes lues et validées à la fois
+TAILLE_BLOC_LECTURE = int(os.getenv("TAILLE_BLOC_IMPORT", "5000"))
+
+VARIABLES_NUMERIQUES = ["vitesse_rpm", "twf_rms_g", "crest_factor", "twf_peak_to_peak_g"]
+
+ERREURS_COLS = ["ligne", "id_equipement", "point_mesure", "date", "erreur"]
+
+
+# =============================================================================
+# LECTURE PAR BLOCS
+# =============================================================================
+
+def _contenu(fichier) -> bytes:
+    """Contenu binaire d'un fichier téléversé ou d'un flux."""
+    if hasattr(fichier, "getvalue"):
+        return fichier.getvalue()
+    fichier.seek(0)
+    return fichier.read()
+
+
+def compter_lignes(fichier, nom_fichier: str) -> int:
+    """
+    Estime le nombre de lignes de données (pour la barre de progression)
+
+    Args:
+        fichier (file-like): Fichier téléversé
+        nom_fichier (str): Nom du fichier (extension .csv / .xlsx)
+
+    Returns:
+        int: Nombre de lignes hors en-tête
+    """
+    if nom_fichier.lower().endswith((".xlsx", ".xlsm")):
+        wb = load_workbook(io.BytesIO(_contenu(fichier)), read_only=True)
+        try:
+            return max((wb.active.max_row or 1) - 1, 0)
+        finally:
+            wb.close()
+
+    contenu = _contenu(fichier).rstrip(b"\r\n")
+    return contenu.count(b"\n") if contenu else 0
+
+
+def lire_par_blocs(fichier, nom_fichier: str, taille_bloc: int = TAILLE_BLOC_LECTURE):
+    """
+    Lit un fichier CSV ou Excel bloc par bloc (mémoire bornée)
+
+    Toutes les colonnes sont lues en texte ; la conversion est faite par
+    valider_bloc() pour pouvoir signaler les valeurs invalides ligne par ligne.
+
+    Args:
+        fichier (file-like): Fichier téléversé
+        nom_fichier (str): Nom du fichier (extension .csv / .xlsx)
+        taille_bloc (int): Nombre de lignes par bloc
+
+    Yields:
+        DataFrame: Bloc de lignes brutes
+    """
+    if nom_fichier.lower().endswith((".xlsx", ".xlsm")):
+        wb = load_workbook(io.BytesIO(_contenu(fichier)), read_only=True, data_only=True)
+        try:
+            lignes = wb.active.iter_rows(values_only=True)
+            entete = [str(c).strip() if c is not None else "" for c in next(lignes, [])]
+            bloc = []
+            for ligne in lignes:
+                if all(v is None for v in ligne):
+                    continue
+                bloc.append(ligne)
+                if len(bloc) >= taille_bloc:
+                    yield pd.DataFrame(bloc, columns=entete).astype(object)
+                    bloc = []
+            if bloc:
+                yield pd.DataFrame(bloc, columns=entete).astype(object)
+        finally:
+            wb.close()
+        return
+
+    contenu = _contenu(fichier)
+    premiere_ligne = contenu.split(b"\n", 1)[0].decode("utf-8-sig", errors="replace")
+    separateur = csv.Sniffer().sniff(premiere_ligne, delimiters=",;\t").delimiter \
+        if premiere_ligne else ","
+
+    lecteur = pd.read_csv(
+        io.BytesIO(contenu), sep=separateur, dtype=str, encoding="utf-8-sig",
+        chunksize=taille_bloc, skipinitialspace=True, keep_default_na=False
+    )
+    for bloc in lecteur:
+        bloc.columns = [str(c).strip() for c in bloc.columns]
+        yield bloc
+
+
+# =============================================================================
+# VALIDATION
+# =============================================================================
+
+def colonnes_manquantes(bloc: pd.DataFrame) -> list:
+    """
+    Liste les colonnes obligatoires absentes du fichier
+
+    Args:
+        bloc (DataFrame): Premier bloc lu
+
+    Returns:
+        list: Colonnes manquantes (vide si le format est correct)
+    """
+    return [c for c in SUIVI_COLS if c not in bloc.columns]
+
+
+def convertir_dates(brut: pd.Series) -> pd.Series:
+    """
+    Convertit une colonne de dates : ISO 8601 (AAAA-MM-JJ) d'abord, puis jour
+    en premier (JJ/MM/AAAA) pour les seules valeurs non ISO
+
+    Args:
+        brut (Series): Dates lues (texte, ou datetime pour Excel)
+
+    Returns:
+        Series: Dates (NaT si invalides)
+    """
+    dates = pd.to_datetime(brut, errors="coerce", format="ISO8601")
+    reste = dates.isna() & brut.notna() & (brut.astype("string").str.strip() != "")
+    if reste.any():
+        dates.loc[reste] = pd.to_datetime(
+            brut[reste], errors="coerce", format="mixed", dayfirst=True
+        )
+    return dates
+
+
+def valider_bloc(bloc: pd.DataFrame, ids_connus: set, premiere_ligne: int):
+    """
+    Valide et normalise un bloc de lignes (contrôles vectorisés)
+
+    Args:
+        bloc (DataFrame): Lignes brutes
+        ids_connus (set): ID équipements du référentiel (set ou frozenset)
+        premiere_ligne (int): Numéro (dans le fichier) de la première ligne du bloc
+
+    Returns:
+        tuple: (DataFrame valides au format SUIVI_COLS avec colonne 'ligne',
+                DataFrame erreurs au format ERREURS_COLS)
+    """
+    n = len(bloc)
+    numeros = np.arange(premiere_ligne, premiere_ligne + n)
+
+    id_equip = bloc["id_equipement"].astype("string").str.strip().fillna("")
+    point = bloc["point_mesure"].astype("string").str.strip().fillna("")
+    dates = convertir_dates(bloc["date"])
+
+    valeurs = {}
+    for col in VARIABLES_NUMERIQUES:
+        brut = bloc[col]
+        if not pd.api.types.is_numeric_dtype(brut):
+            brut = brut.astype("string").str.strip().str.replace(",", ".", regex=False)
+        valeurs[col] = pd.to_numeric(brut, errors="coerce")
+
+    # Chaque règle → (masque des lignes en erreur, message)
+    regles = [
+        (id_equip == "", "ID équipement manquant"),
+        ((id_equip != "") & ~id_equip.isin(ids_connus), "Équipement inconnu du référentiel"),
+        (point == "", "Point de mesure manquant"),
+        (dates.isna(), "Date invalide"),
+    ]
+    for col, serie in valeurs.items():
+        regles.append((serie.isna(), f"{col} non numérique"))
+        regles.append((serie < 0, f"{col} négatif"))
+
+    messages = pd.Series("", index=bloc.index, dtype=object)
+    for masque, message in regles:
+        masque = masque.fillna(False).to_numpy(dtype=bool)
+        messages.loc[masque] = messages.loc[masque] + "; " + message
+
+    en_erreur = (messages != "").to_numpy()
+
+    erreurs = pd.DataFrame({
+        "ligne": numeros[en_erreur],
+        "id_equipement": id_equip[en_erreur].to_numpy(),
+        "point_mesure": point[en_erreur].to_numpy(),
+        "date": bloc["date"][en_erreur].astype(str).to_numpy(),
+        "erreur": messages[en_erreur].str[2:].to_numpy(),
+    }, columns=ERREURS_COLS)
+
+    ok = ~en_erreur
+    valides = pd.DataFrame({
+        "ligne": numeros[ok],
+        "id_equipement": id_equip[ok].to_numpy(),
+        "point_mesure": point[ok].to_numpy(),
+        "date": dates[ok].dt.strftime("%Y-%m-%d").to_numpy(),
+        **{col: valeurs[col][ok].astype(float).to_numpy() for col in VARIABLES_NUMERIQUES},
+    })
+
+    return valides, erreurs
+
+
+# =============================================================================
+# DÉDOUBLONNAGE
+# =============================================================================
+
+def charger_cles_existantes(ids_equipements) -> set:
+    """
+    Charge l'index des clés (id_equipement, point_mesure, date) déjà en base
+    pour les équipements concernés (colonnes de clé uniquement, paginé)
+
+    Args:
+        ids_equipements (iterable): ID équipements présents dans le fichier
+
+    Returns:
+        set: Clés existantes (date au format YYYY-MM-DD)
+    """
+    client = get_supabase_client()
+    ids = sorted(set(ids_equipements))
+    cles = set()
+    page_size = 1000
+
+    # Filtre IN par paquets pour garder des URL de taille raisonnable
+    for i in range(0, len(ids), 100):
+        paquet = ids[i:i + 100]
+        offset = 0
+        while True:
+            response = client.table("suivi_equipements").select(
+                "id_equipement, point_mesure, date"
+            ).in_("id_equipement", paquet).order("id").range(
+                offset, offset + page_size - 1
+            ).execute()
+
+            if not response.data:
+                break
+
+            cles.update(
+                (r["id_equipement"], r["point_mesure"], str(r["date"])[:10])
+                for r in response.data
+            )
+
+            if len(response.data) < page_size:
+                break
+            offset += page_size
+
+    return cles
+
+
+def dedoublonner(valides: pd.DataFrame, cles_vues: set):
+    """
+    Écarte les lignes dont la clé est déjà en base ou déjà vue dans le fichier
+
+    cles_vues n'est pas modifié : les clés des lignes retenues n'y sont
+    ajoutées qu'une fois insérées (voir cles_inserees), pour qu'une ligne
+    rejetée par la base ne fasse pas passer une ligne suivante de même clé
+    pour un doublon.
+
+    Args:
+        valides (DataFrame): Lignes validées
+        cles_vues (set): Index des clés (base + lignes déjà insérées)
+
+    Returns:
+        tuple: (DataFrame lignes retenues, DataFrame doublons au format ERREURS_COLS)
+    """
+    cles = list(zip(valides["id_equipement"], valides["point_mesure"], valides["date"]))
+    retenir = np.empty(len(cles), dtype=bool)
+    cles_bloc = set()
+
+    for i, cle in enumerate(cles):
+        retenir[i] = cle not in cles_vues and cle not in cles_bloc
+        cles_bloc.add(cle)
+
+    doublons = valides.loc[~retenir, ["ligne", "id_equipement", "point_mesure", "date"]]
+    doublons = doublons.assign(erreur="Doublon (mesure déjà existante pour cette clé)")
+
+    return valides[retenir], doublons[ERREURS_COLS]
+
+
+def cles_inserees(retenues: pd.DataFrame, echecs: pd.DataFrame) -> set:
+    """
+    Args:
+        retenues (DataFrame): Lignes envoyées à sauvegarder_suivis_batch
+        echecs (DataFrame): Échecs renvoyés (indexés comme retenues)
+
+    Returns:
+        set: Clés (id_equipement, point_mesure, date) des lignes insérées
+    """
+    inserees = retenues.drop(index=echecs.index)
+    return set(zip(inserees["id_equipement"], inserees["point_mesure"], inserees["date"]))
+
+
+# =============================================================================
+# PIPELINE COMPLET
+# =============================================================================
+
+def importer_mesures(fichier, nom_fichier: str, progression=None) -> dict:
+    """
+    Importe un fichier de mesures : lecture par blocs → validation →
+    dédoublonnage → insertion par lots
+
+    Args:
+        fichier (file-like): Fichier CSV ou Excel (colonnes de SUIVI_COLS)
+        nom_fichier (str): Nom du fichier (détermine le format)
+        progression (callable, optional): progression(fraction, texte) appelée
+            après chaque lot
+
+    Returns:
+        dict: Rapport {success, message, lues, inserees, doublons, invalides,
+              erreurs (DataFrame au format ERREURS_COLS)}
+    """
+    rapport = {
+        "success": False, "message": "", "lues": 0, "inserees": 0,
+        "doublons": 0, "invalides": 0,
+        "erreurs": pd.DataFrame(columns=ERREURS_COLS),
+    }
+
+    try:
+        total = max(compter_lignes(fichier, nom_fichier), 1)
+        blocs = lire_par_blocs(fichier, nom_fichier)
+        premier = next(blocs, None)
+
+        if premier is None or premier.empty:
+            rapport["message"] = "⚠️ Le fichier ne contient aucune ligne de données"
+            return rapport
+
+        manquantes = colonnes_manquantes(premier)
+        if manquantes:
+            rapport["message"] = f"❌ Colonnes manquantes : {', '.join(manquantes)}"
+            return rapport
+
+        ids_connus = referentiel().ids
+        cles_vues = set()
+        ids_indexes = set()
+        erreurs = []
+        ligne_courante = 2  # ligne 1 = en-tête
+
+        def tous_les_blocs():
+            yield premier
+            yield from blocs
+
+        for bloc in tous_les_blocs():
+            valides, invalides = valider_bloc(bloc, ids_connus, ligne_courante)
+            ligne_courante += len(bloc)
+            rapport["lues"] += len(bloc)
+            rapport["invalides"] += len(invalides)
+            erreurs.append(invalides)
+
+            # Index des clés existantes, chargé une seule fois par équipement
+            nouveaux = set(valides["id_equipement"]) - ids_indexes
+            if nouveaux:
+                cles_vues |= charger_cles_existantes(nouveaux)
+                ids_indexes |= nouveaux
+
+            retenues, doublons = dedoublonner(valides, cles_vues)
+            rapport["doublons"] += len(doublons)
+            erreurs.append(doublons)
+
+            deja_lues = rapport["lues"] - len(bloc)
+
+            def progression_lot(nb_traites, nb_total):
+                if progression:
+                    fraction = (deja_lues + len(bloc) * nb_traites / nb_total) / total
+                    progression(min(fraction, 1.0), f"{rapport['lues']} ligne(s) lue(s) — insertion en cours...")
+
+            _, _, echecs = sauvegarder_suivis_batch(retenues, progression=progression_lot)
+            rapport["inserees"] += len(retenues) - len(echecs)
+            cles_vues |= cles_inserees(retenues, echecs)
+            if not echecs.empty:
+                erreurs.append(
+                    retenues.loc[echecs.index, ["ligne", "id_equipement", "point_mesure", "date"]]
+                    .assign(erreur="Rejetée par la base : " + echecs["erreur"])[ERREURS_COLS]
+                )
+
+            if progression:
+                progression(min(rapport["lues"] / total, 1.0),
+                            f"{rapport['inserees']} mesure(s) importée(s) / {rapport['lues']} lue(s)")
+
+        erreurs = [e for e in erreurs if not e.empty]
+        if erreurs:
+            rapport["erreurs"] = pd.concat(erreurs, ignore_index=True).sort_values("ligne")
+
+        rapport["success"] = rapport["inserees"] > 0
+        rapport["message"] = (
+            f"✅ {rapport['inserees']} mesure(s) importée(s) sur {rapport['lues']} ligne(s)"
+            if rapport["success"]
+            else "⚠️ Aucune mesure importée"
+        )
+        return rapport
+
+    except Exception as e:
+        rapport["message"] = f"❌ Erreur lors de l'import : {e}"
+        return rapport
@@ -0,0 +1,271 @@
+"""
+Instrumentation des performances
+Durée, lignes et octets de chaque opération (pages, chargements, écritures,
+exports, requêtes Supabase...), agrégés par opération en percentiles et
+exportables en JSON ou au format texte Prometheus
+"""
+
+import functools
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from io import BytesIO
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Désactivation globale (INSTRUMENTATION=0) : les mesures ne sont plus relevées
+INSTRUMENTATION_ACTIVE = os.getenv("INSTRUMENTATION", "1") != "0"
+
+# Durées conservées par opération pour le calcul des percentiles (les plus récentes)
+TAILLE_ECHANTILLON_MESURES = int(os.getenv("TAILLE_ECHANTILLON_MESURES", "1000"))
+
+# Percentiles publiés
+PERCENTILES = (50, 95, 99)
+
+# Préfixe des métriques Prometheus
+PREFIXE_PROMETHEUS = "maintenancepro"
+
+
+# =============================================================================
+# AGRÉGATS PAR OPÉRATION
+# =============================================================================
+
+class _Operation:
+    """Compteurs cumulés d'une opération et échantillon de ses dernières durées."""
+
+    __slots__ = ("nb", "echecs", "duree_totale", "duree_max", "lignes", "octets", "durees")
+
+    def __init__(self):
+        self.nb = 0
+        self.echecs = 0
+        self.duree_totale = 0.0
+        self.duree_max = 0.0
+        self.lignes = 0
+        self.octets = 0
+        self.durees = deque(maxlen=TAILLE_ECHANTILLON_MESURES)
+
+
+_verrou = threading.Lock()
+_operations = {}
+_depuis = time.time()
+
+
+def _percentile(valeurs_triees: list, p: float) -> float:
+    """Percentile par rang le plus proche (liste triée, non vide)."""
+    rang = max(math.ceil(p / 100 * len(valeurs_triees)), 1)
+    return valeurs_triees[rang - 1]
+
+
+def enregistrer(operation: str, duree_s: float, lignes: int = 0, octets: int = 0,
+                echec: bool = False):
+    """
+    Ajoute une mesure aux agrégats de l'opération
+
+    Args:
+        operation (str): Nom de l'opération (ex. "charger_suivi", "page:ui.fiabilite")
+        duree_s (float): Durée mesurée (secondes)
+        lignes (int): Lignes lues, écrites ou exportées
+        octets (int): Volume produit ou transféré
+        echec (bool): True si l'opération a échoué
+    """
+    if not INSTRUMENTATION_ACTIVE:
+        return
+    with _verrou:
+        stats = _operations.get(operation)
+        if stats is None:
+            stats = _operations[operation] = _Operation()
+        stats.nb += 1
+        stats.echecs += bool(echec)
+        stats.duree_totale += duree_s
+        stats.duree_max = max(stats.duree_max, duree_s)
+        stats.lignes += int(lignes or 0)
+        stats.octets += int(octets or 0)
+        stats.durees.append(duree_s)
+
+
+class Mesure:
+    """Mesure en cours : le code mesuré peut renseigner lignes, octets et echec."""
+
+    __slots__ = ("operation", "lignes", "octets", "echec")
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.lignes = 0
+        self.octets = 0
+        self.echec = False
+
+
+@contextmanager
+def mesure(operation: str):
+    """
+    Mesure la durée d'un bloc de code
+
+    Une exception (hors arrêt/relance Streamlit) compte comme un échec et est
+    propagée.
+
+    Args:
+        operation (str): Nom de l'opération
+
+    Yields:
+        Mesure: Objet à compléter (lignes, octets, echec)
+    """
+    m = Mesure(operation)
+    debut = time.perf_counter()
+    try:
+        yield m
+    except Exception:
+        m.echec = True
+        raise
+    finally:
+        enregistrer(operation, time.perf_counter() - debut, m.lignes, m.octets, m.echec)
+
+
+def _volume(m: Mesure, resultat, args: tuple):
+    """Déduit lignes, octets et échec du résultat (ou du DataFrame reçu)."""
+    if isinstance(resultat, tuple) and resultat and isinstance(resultat[0], bool):
+        # Convention (succès, message, ...) des fonctions d'écriture
+        m.echec = not resultat[0]
+    if isinstance(resultat, BytesIO):
+        m.octets = resultat.getbuffer().nbytes
+    elif hasattr(resultat, "memory_usage") and hasattr(resultat, "columns"):
+        m.lignes = len(resultat)
+        m.octets = int(resultat.memory_usage(deep=False).sum())
+        return
+    # Sinon : taille du DataFrame traité (export, insertion par lots, figure)
+    if args and hasattr(args[0], "columns"):
+        m.lignes = len(args[0])
+
+
+def instrumenter(operation: str = None):
+    """
+    Décorateur : mesure chaque appel de la fonction
+
+    Lignes et octets sont déduits du résultat (DataFrame, BytesIO) ou du
+    DataFrame passé en premier argument ; un résultat (False, message, ...)
+    compte comme un échec.
+
+    Args:
+        operation (str, optional): Nom de l'opération (nom de la fonction par défaut)
+    """
+    def decorateur(fonction):
+        nom = operation or fonction.__name__
+
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            if not INSTRUMENTATION_ACTIVE:
+                return fonction(*args, **kwargs)
+            with mesure(nom) as m:
+                resultat = fonction(*args, **kwargs)
+                _volume(m, resultat, args)
+                return resultat
+
+        return enveloppe
+
+    return decorateur
+
+
+# =============================================================================
+# CONSULTATION ET EXPORT
+# =============================================================================
+
+def synthese() -> list:
+    """
+    Agrégats de toutes les opérations mesurées
+
+    Returns:
+        list: Un dict par opération (triées par durée totale décroissante) :
+              operation, nb, echecs, moyenne_ms, p50_ms, p95_ms, p99_ms, max_ms,
+              total_s, lignes, octets
+    """
+    with _verrou:
+        instantane = [
+            (nom, s.nb, s.echecs, s.duree_totale, s.duree_max, s.lignes, s.octets, sorted(s.durees))
+            for nom, s in _operations.items()
+        ]
+
+    lignes_synthese = []
+    for nom, nb, echecs, total, maxi, lignes, octets, durees in instantane:
+        ligne = {"operation": nom, "nb": nb, "echecs": echecs,
+                 "moyenne_ms": round(total / nb * 1000, 2)}
+        for p in PERCENTILES:
+            ligne[f"p{p}_ms"] = round(_percentile(durees, p) * 1000, 2)
+        ligne.update({"max_ms": round(maxi * 1000, 2), "total_s": round(total, 6),
+                      "lignes": lignes, "octets": octets})
+        lignes_synthese.append(ligne)
+
+    return sorted(lignes_synthese, key=lambda l: l["total_s"], reverse=True)
+
+
+def reinitialiser():
+    """Efface toutes les mesures."""
+    global _depuis
+    with _verrou:
+        _operations.clear()
+        _depuis = time.time()
+
+
+def mesures_depuis() -> float:
+    """
+    Returns:
+        float: time.time() du démarrage (ou de la dernière réinitialisation) des mesures
+    """
+    return _depuis
+
+
+def exporter_json() -> str:
+    """
+    Returns:
+        str: Synthèse au format JSON (avec horodatages de début et d'export)
+    """
+    return json.dumps({
+        "depuis": _depuis,
+        "exporte_le": time.time(),
+        "percentiles": list(PERCENTILES),
+        "operations": synthese(),
+    }, ensure_ascii=False, indent=2)
+
+
+def _etiquette(valeur: str) -> str:
+    return valeur.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def exporter_prometheus() -> str:
+    """
+    Returns:
+        str: Synthèse au format texte d'exposition Prometheus (summary des
+             durées en secondes, compteurs d'échecs, de lignes et d'octets)
+    """
+    p = PREFIXE_PROMETHEUS
+    ops = synthese()
+    lignes = [
+        f"# HELP {p}_operation_duree_secondes Durée des opérations",
+        f"# TYPE {p}_operation_duree_secondes summary",
+    ]
+    for op in ops:
+        etiquette = f'operation="{_etiquette(op["operation"])}"'
+        for q in PERCENTILES:
+            lignes.append(
+                f'{p}_operation_duree_secondes{{{etiquette},quantile="{q / 100:g}"}} '
+                f'{op[f"p{q}_ms"] / 1000:.6f}'
+            )
+        lignes.append(f"{p}_operation_duree_secondes_sum{{{etiquette}}} {op['total_s']:.6f}")
+        lignes.append(f"{p}_operation_duree_secondes_count{{{etiquette}}} {op['nb']}")
+
+    for metrique, cle, aide in (
+        ("operation_echecs_total", "echecs", "Opérations en échec"),
+        ("operation_lignes_total", "lignes", "Lignes lues, écrites ou exportées"),
+        ("operation_octets_total", "octets", "Octets produits ou transférés"),
+    ):
+        lignes.append(f"# HELP {p}_{metrique} {aide}")
+        lignes.append(f"# TYPE {p}_{metrique} counter")
+        for op in ops:
+            lignes.append(f'{p}_{metrique}{{operation="{_etiquette(op["operation"])}"}} {op[cle]}')
+
+    return "\n".join(lignes) + "\n"
@@ -0,0 +1,166 @@
+"""
+Magasin de données partagé par toutes les sessions du processus
+Une seule copie de chaque table en mémoire, versionnée, servie en lecture
+seule (vues copy-on-write) : la mémoire d'une session ne dépend plus que de
+sa sélection, pas de l'historique complet
+"""
+
+import os
+import threading
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Durée pendant laquelle une table lue est servie sans relecture (secondes).
+# Les écritures faites par l'application invalident immédiatement la table ;
+# ce délai borne l'attente pour les modifications faites hors de l'application.
+DUREE_VALIDITE_MAGASIN = float(os.getenv("DUREE_VALIDITE_MAGASIN_S", "30"))
+
+
+# =============================================================================
+# ÉTAT DU PROCESSUS
+# =============================================================================
+
+class _Entree:
+    """Table mémorisée : DataFrame de référence (jamais modifié) et métadonnées."""
+
+    __slots__ = ("version", "charge_le", "df", "_octets")
+
+    def __init__(self, version: int, df: "pd.DataFrame"):
+        self.version = version
+        self.charge_le = time.time()
+        self.df = df
+        self._octets = None
+
+    def octets(self) -> int:
+        # Calculé à la demande (memory_usage(deep=True) parcourt les chaînes)
+        if self._octets is None:
+            self._octets = int(self.df.memory_usage(deep=True).sum())
+        return self._octets
+
+
+_verrou = threading.Lock()
+_entrees = {}           # table → _Entree
+_versions = {}          # table → compteur incrémenté à chaque chargement ou invalidation
+_verrous_chargement = {}  # table → verrou (une seule lecture Supabase à la fois par table)
+
+
+def _nouvelle_version(table: str) -> int:
+    _versions[table] = _versions.get(table, 0) + 1
+    return _versions[table]
+
+
+def _valide(entree: _Entree, validite: float) -> bool:
+    return entree is not None and time.time() - entree.charge_le < validite
+
+
+def _activer_copy_on_write():
+    # Les vues servies reposent sur le copy-on-write (par défaut depuis pandas 3).
+    # Import différé : la page de connexion ne charge pas pandas.
+    import pandas as pd
+    if int(pd.__version__.split(".")[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
+
+
+# =============================================================================
+# API
+# =============================================================================
+
+def lire(table: str, charger, validite: float = None) -> tuple:
+    """
+    Retourne une vue de la table partagée et sa version, chargée au besoin
+
+    Si la table est absente ou périmée, un seul appel à charger() est fait pour
+    tout le processus : les sessions concurrentes attendent son résultat.
+    Un résultat dont la table a été invalidée pendant le chargement (écriture
+    concurrente, lecture de secours) est servi mais pas mémorisé.
+
+    Args:
+        table (str): Nom de la table
+        charger (callable): Fonction sans argument retournant le DataFrame complet
+        validite (float, optional): Durée de validité propre à la table
+            (DUREE_VALIDITE_MAGASIN par défaut ; voir data/referentiel.py)
+
+    Returns:
+        tuple: (DataFrame, version). Le DataFrame est une copie superficielle
+            (copy-on-write) : le modifier ne touche pas la table partagée.
+            Version None si le résultat n'a pas été mémorisé
+    """
+    validite = DUREE_VALIDITE_MAGASIN if validite is None else validite
+    with _verrou:
+        entree = _entrees.get(table)
+        if _valide(entree, validite):
+            return entree.df.copy(deep=False), entree.version
+        verrou_table = _verrous_chargement.setdefault(table, threading.Lock())
+
+    with verrou_table:
+        with _verrou:
+            entree = _entrees.get(table)
+            if _valide(entree, validite):
+                return entree.df.copy(deep=False), entree.version
+            version = _versions.get(table, 0)
+
+        _activer_copy_on_write()
+        df = charger()
+
+        with _verrou:
+            if _versions.get(table, 0) != version:
+                return df.copy(deep=False), None
+            entree = _Entree(_nouvelle_version(table), df)
+            _entrees[table] = entree
+        return df.copy(deep=False), entree.version
+
+
+def invalider(*tables: str):
+    """
+    Retire des tables du magasin (la prochaine lecture relit la base)
+
+    Args:
+        *tables (str): Noms des tables (toutes si aucune)
+    """
+    with _verrou:
+        for table in tables or tuple(set(_entrees) | set(_versions) | set(_verrous_chargement)):
+            _entrees.pop(table, None)
+            _nouvelle_version(table)
+
+
+def version(table: str) -> int:
+    """
+    Args:
+        table (str): Nom de la table
+
+    Returns:
+        int: Version courante de la table (change à chaque relecture ou
+            invalidation ; utilisable comme clé de cache)
+    """
+    with _verrou:
+        return _versions.get(table, 0)
+
+
+def empreinte_memoire() -> list:
+    """
+    Occupation mémoire des tables partagées
+
+    Returns:
+        list: Un dict par table : table, version, lignes, octets, age_s
+    """
+    with _verrou:
+        entrees = list(_entrees.items())
+    maintenant = time.time()
+    return [
+        {
+            "table": table,
+            "version": entree.version,
+            "lignes": len(entree.df),
+            "octets": entree.octets(),
+            "age_s": round(maintenant - entree.charge_le, 1),
+        }
+        for table, entree in sorted(entrees, key=lambda e: e[0])
+    ]
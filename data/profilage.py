@@ -0,0 +1,279 @@
+"""
+Profilage mémoire (mode opt-in, PROFILAGE_MEMOIRE=1)
+Instantanés tracemalloc autour du rendu de chaque page (pic, croissance nette,
+principaux allocateurs) et empreinte de l'état de session de chaque session,
+pour dimensionner le déploiement depuis la page Performance
+"""
+
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Mode opt-in : tracemalloc garde une trace par bloc alloué et les instantanés
+# parcourent toutes ces traces (pages allouant beaucoup, comme les exports
+# Excel, plusieurs fois plus lentes) ; à n'activer que le temps d'une campagne
+PROFILAGE_MEMOIRE_ACTIF = os.getenv("PROFILAGE_MEMOIRE", "0") == "1"
+
+# Trames de pile conservées par allocation (1 : ligne qui alloue)
+PROFONDEUR_PILE_PROFILAGE = int(os.getenv("PROFONDEUR_PILE_PROFILAGE", "1"))
+
+# Principaux allocateurs conservés par page
+NB_ALLOCATEURS = 15
+
+# Une session sans rendu depuis ce délai est retirée du relevé (secondes)
+DUREE_SESSION_INACTIVE = 3600
+
+# Clés détaillées par session (les plus volumineuses)
+NB_CLES_SESSION = 5
+
+
+# =============================================================================
+# ÉTAT DU PROCESSUS
+# =============================================================================
+
+class _Page:
+    """Relevés d'une page : pics et croissances nettes, derniers allocateurs."""
+
+    __slots__ = ("nb", "pic_max", "pic_dernier", "croissance_totale", "allocateurs")
+
+    def __init__(self):
+        self.nb = 0
+        self.pic_max = 0
+        self.pic_dernier = 0
+        self.croissance_totale = 0
+        self.allocateurs = []
+
+
+_verrou = threading.Lock()
+# tracemalloc est global au processus : un seul rendu profilé à la fois
+_verrou_profilage = threading.Lock()
+_pages = {}      # module de page → _Page
+_sessions = {}   # identifiant de session → dict (voir empreinte_sessions)
+
+
+# =============================================================================
+# EMPREINTE DES VALEURS
+# =============================================================================
+
+def taille_valeur(valeur, profondeur: int = 0) -> int:
+    """
+    Mémoire occupée par une valeur (octets)
+
+    DataFrame et Series : memory_usage(deep=True) ; tableaux numpy : nbytes ;
+    fichiers (BytesIO, UploadedFile) : taille du tampon ; conteneurs : somme
+    récursive (3 niveaux) ; autres objets : sys.getsizeof.
+
+    Args:
+        valeur: Valeur de l'état de session
+        profondeur (int): Niveau de récursion courant
+
+    Returns:
+        int: Taille estimée
+    """
+    if hasattr(valeur, "memory_usage"):
+        usage = valeur.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if hasattr(valeur, "nbytes"):
+        return int(valeur.nbytes)
+    if hasattr(valeur, "getbuffer"):
+        return valeur.getbuffer().nbytes
+    taille = sys.getsizeof(valeur)
+    if profondeur < 3:
+        if isinstance(valeur, dict):
+            taille += sum(taille_valeur(k, profondeur + 1) + taille_valeur(v, profondeur + 1)
+                          for k, v in valeur.items())
+        elif isinstance(valeur, (list, tuple, set, frozenset)):
+            taille += sum(taille_valeur(v, profondeur + 1) for v in valeur)
+    return taille
+
+
+def empreinte_etat(etat: dict) -> list:
+    """
+    Taille de chaque entrée d'un état de session
+
+    Args:
+        etat (dict): Contenu de st.session_state
+
+    Returns:
+        list: [{"cle", "type", "octets"}, ...] par taille décroissante
+    """
+    detail = [
+        {"cle": str(cle), "type": type(valeur).__name__, "octets": taille_valeur(valeur)}
+        for cle, valeur in etat.items()
+    ]
+    return sorted(detail, key=lambda d: d["octets"], reverse=True)
+
+
+# =============================================================================
+# PROFILAGE DES PAGES
+# =============================================================================
+
+def _demarrer():
+    import tracemalloc
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(PROFONDEUR_PILE_PROFILAGE)
+
+
+def _emplacement(fichier: str, ligne: int) -> str:
+    """Fichier:ligne abrégé (relatif au dépôt ou au dossier des bibliothèques)."""
+    racine = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if fichier.startswith(racine + os.sep):
+        fichier = os.path.relpath(fichier, racine)
+    elif "site-packages" + os.sep in fichier:
+        fichier = fichier.split("site-packages" + os.sep, 1)[1]
+    return f"{fichier}:{ligne}"
+
+
+def _allocateurs(avant, apres) -> list:
+    """Lignes dont l'occupation a le plus augmenté entre deux instantanés."""
+    import tracemalloc
+    # Allocations du profileur lui-même exclues
+    filtres = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    ecarts = apres.filter_traces(filtres).compare_to(avant.filter_traces(filtres), "lineno")
+    return [
+        {
+            "emplacement": _emplacement(e.traceback[0].filename, e.traceback[0].lineno),
+            "octets": e.size_diff,
+            "blocs": e.count_diff,
+            "total_octets": e.size,
+        }
+        for e in ecarts[:NB_ALLOCATEURS]
+        if e.size_diff > 0
+    ]
+
+
+def _enregistrer_page(page: str, pic: int, croissance: int, allocateurs: list):
+    with _verrou:
+        stats = _pages.get(page)
+        if stats is None:
+            stats = _pages[page] = _Page()
+        stats.nb += 1
+        stats.pic_max = max(stats.pic_max, pic)
+        stats.pic_dernier = pic
+        stats.croissance_totale += croissance
+        stats.allocateurs = allocateurs
+
+
+def _enregistrer_session(page: str):
+    """Relève l'empreinte de l'état de la session en cours."""
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    detail = empreinte_etat(st.session_state.to_dict())
+    maintenant = time.time()
+    with _verrou:
+        _sessions[ctx.session_id] = {
+            "utilisateur": st.session_state.get("user_email") or "-",
+            "page": page,
+            "octets": sum(d["octets"] for d in detail),
+            "nb_cles": len(detail),
+            "cles": detail[:NB_CLES_SESSION],
+            "releve_le": maintenant,
+        }
+        for session_id in [s for s, e in _sessions.items()
+                           if maintenant - e["releve_le"] > DUREE_SESSION_INACTIVE]:
+            del _sessions[session_id]
+
+
+@contextmanager
+def profiler_page(page: str):
+    """
+    Profile la mémoire d'un rendu de page (sans effet si le mode est inactif)
+
+    Pic et croissance nette sont mesurés par tracemalloc entre l'entrée et la
+    sortie du bloc ; l'empreinte de l'état de session est relevée à la fin du
+    rendu, y compris après st.stop() ou st.rerun(). tracemalloc étant global,
+    les rendus profilés sont sérialisés ; les allocations des autres sessions
+    hors rendu de page (barre latérale, connexion) restent comptées.
+
+    Args:
+        page (str): Module de la page (ex. "ui.fiabilite")
+    """
+    if not PROFILAGE_MEMOIRE_ACTIF:
+        yield
+        return
+
+    import tracemalloc
+
+    with _verrou_profilage:
+        _demarrer()
+        avant = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        try:
+            yield
+        finally:
+            courant, pic = tracemalloc.get_traced_memory()
+            apres = tracemalloc.take_snapshot()
+            _enregistrer_page(page, pic - base, courant - base, _allocateurs(avant, apres))
+            _enregistrer_session(page)
+
+
+# =============================================================================
+# CONSULTATION
+# =============================================================================
+
+def profil_pages() -> list:
+    """
+    Returns:
+        list: Un dict par page (pic décroissant) : page, nb, pic_max_octets,
+              pic_dernier_octets, croissance_moyenne_octets, allocateurs
+              (principaux allocateurs du dernier rendu)
+    """
+    with _verrou:
+        pages = [
+            {
+                "page": page,
+                "nb": s.nb,
+                "pic_max_octets": s.pic_max,
+                "pic_dernier_octets": s.pic_dernier,
+                "croissance_moyenne_octets": s.croissance_totale // s.nb,
+                "allocateurs": list(s.allocateurs),
+            }
+            for page, s in _pages.items()
+        ]
+    return sorted(pages, key=lambda p: p["pic_max_octets"], reverse=True)
+
+
+def empreinte_sessions() -> list:
+    """
+    Returns:
+        list: Un dict par session active (taille décroissante) : session,
+              utilisateur, page, octets, nb_cles, cles (entrées les plus
+              volumineuses), age_s
+    """
+    maintenant = time.time()
+    with _verrou:
+        sessions = [
+            {"session": session_id[:8], **{k: v for k, v in e.items() if k != "releve_le"},
+             "age_s": round(maintenant - e["releve_le"], 1)}
+            for session_id, e in _sessions.items()
+        ]
+    return sorted(sessions, key=lambda s: s["octets"], reverse=True)
+
+
+def memoire_tracee() -> tuple:
+    """
+    Returns:
+        tuple: (mémoire tracée actuelle, pic depuis le dernier rendu) en
+               octets, (0, 0) si tracemalloc est inactif
+    """
+    import tracemalloc
+    return tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+
+
+def reinitialiser():
+    """Efface les relevés de pages et de sessions."""
+    with _verrou:
+        _pages.clear()
+        _sessions.clear()
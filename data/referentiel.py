@@ -0,0 +1,178 @@
+"""
+Référentiel des équipements, mémorisé longtemps
+Le référentiel (département → équipements, équipement → département) ne change
+que par sauvegarder_equipement / supprimer_equipement (ou la page
+Modifications) : il est gardé dans le magasin partagé bien au-delà des autres
+tables, invalidé par toute écriture sur la table equipements faite par
+l'application (data/resilience.py) et par un compteur de version en base,
+sondé à faible coût pour les modifications faites hors de l'application
+"""
+
+import os
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from data import magasin
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Durée de validité du référentiel dans le magasin partagé (secondes)
+DUREE_VALIDITE_REFERENTIEL = float(os.getenv("DUREE_VALIDITE_REFERENTIEL_S", "3600"))
+
+# Intervalle minimal entre deux lectures du compteur de version en base (secondes)
+INTERVALLE_SONDAGE_REFERENTIEL = float(os.getenv("INTERVALLE_SONDAGE_REFERENTIEL_S", "15"))
+
+# Table du compteur (voir data/supabase.sql, incrémenté par trigger)
+TABLE_VERSIONS = "versions_referentiel"
+
+
+# =============================================================================
+# RÉFÉRENTIEL
+# =============================================================================
+
+class Referentiel:
+    """
+    Dictionnaires du référentiel équipements, construits une fois par version
+
+    Attributs (à ne pas modifier : instance partagée entre les sessions) :
+        version (int): Version magasin de la table equipements (None si non mémorisée)
+        df (DataFrame): Table equipements
+        departements (list): Départements triés
+        equipements_par_departement (dict): Département → liste triée des équipements
+        departement_de (dict): Équipement → département (fusions des exports)
+        ids (frozenset): Équipements connus
+    """
+
+    __slots__ = ("version", "df", "departements", "equipements_par_departement",
+                 "departement_de", "ids")
+
+    def __init__(self, df: "pd.DataFrame", version: int = None):
+        self.version = version
+        self.df = df
+        ids = df["id_equipement"].tolist()
+        depts = df["departement"].tolist()
+        self.departement_de = dict(zip(ids, depts))
+        par_departement = {}
+        for id_equipement, departement in self.departement_de.items():
+            par_departement.setdefault(departement, []).append(id_equipement)
+        self.equipements_par_departement = {
+            dept: sorted(equips) for dept, equips in sorted(par_departement.items())
+        }
+        self.departements = list(self.equipements_par_departement)
+        self.ids = frozenset(self.departement_de)
+
+    def equipements(self, departements=None) -> list:
+        """
+        Args:
+            departements (list, optional): Départements retenus (tous si vide)
+
+        Returns:
+            list: Équipements triés des départements indiqués
+        """
+        if not departements:
+            return sorted(self.ids)
+        return sorted(
+            equip for dept in departements
+            for equip in self.equipements_par_departement.get(dept, [])
+        )
+
+
+_verrou = threading.Lock()
+_courant: Referentiel = None
+
+
+def pour_version(df: "pd.DataFrame", version: int = None) -> Referentiel:
+    """
+    Référentiel d'une table equipements, réutilisé tant que la version est la même
+
+    Args:
+        df (DataFrame): Table equipements (lue dans le magasin)
+        version (int): Version magasin correspondante ; None (résultat non
+            mémorisé, lecture de secours) : référentiel construit sans cache
+
+    Returns:
+        Referentiel: Instance partagée
+    """
+    global _courant
+    with _verrou:
+        if version is not None and _courant is not None and _courant.version == version:
+            return _courant
+    referentiel = Referentiel(df, version)
+    if version is not None:
+        with _verrou:
+            _courant = referentiel
+    return referentiel
+
+
+# =============================================================================
+# COMPTEUR DE VERSION EN BASE
+# =============================================================================
+
+_verrou_sondage = threading.Lock()
+_version_base = None
+_sonde_le = 0.0
+_sondage_disponible = True
+
+
+def sonder():
+    """
+    Compare le compteur de version en base à la dernière valeur lue et
+    invalide le référentiel s'il a changé
+
+    Au plus une requête par INTERVALLE_SONDAGE_REFERENTIEL pour tout le
+    processus ; les sessions qui arrivent pendant un sondage ne l'attendent
+    pas. Sans la table du compteur (script SQL non appliqué), le sondage est
+    abandonné : seules la durée de validité et les écritures de
+    l'application renouvellent le référentiel. Une erreur de lecture garde
+    le référentiel en place.
+    """
+    global _version_base, _sonde_le, _sondage_disponible
+
+    if not _sondage_disponible or time.monotonic() - _sonde_le < INTERVALLE_SONDAGE_REFERENTIEL:
+        return
+    if not _verrou_sondage.acquire(blocking=False):
+        return
+    try:
+        _sonde_le = time.monotonic()
+        from data.data_manager import get_supabase_client
+        from data.resilience import est_objet_absent
+        try:
+            lignes = get_supabase_client().table(TABLE_VERSIONS).select("version").eq(
+                "nom", "equipements"
+            ).limit(1).execute().data
+        except Exception as e:
+            if est_objet_absent(e):
+                _sondage_disponible = False
+            return
+        if not lignes:
+            return
+        version = lignes[0]["version"]
+        if _version_base is not None and version != _version_base:
+            magasin.invalider("equipements")
+        _version_base = version
+    finally:
+        _verrou_sondage.release()
+
+
+# =============================================================================
+# ACCÈS
+# =============================================================================
+
+def referentiel() -> Referentiel:
+    """
+    Référentiel courant, hors contexte d'exécution (exports, imports) ; les
+    pages passent par ContexteDonnees.referentiel()
+
+    Returns:
+        Referentiel: Instance partagée (à ne pas modifier)
+    """
+    from data.data_manager import charger_equipements
+    sonder()
+    return pour_version(*magasin.lire("equipements", charger_equipements, DUREE_VALIDITE_REFERENTIEL))
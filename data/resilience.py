@@ -0,0 +1,327 @@
+"""
+Résilience des appels Supabase
+Délai maximal par requête, reprise exponentielle avec gigue pour les lectures,
+coupe-circuit par table et derniers résultats valides servis en secours
+"""
+
+import os
+import random
+import threading
+import time
+
+from data import contexte, sante
+from data.instrumentation import mesure
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Délai maximal d'une requête PostgREST (secondes)
+DELAI_REQUETE = float(os.getenv("DELAI_REQUETE_S", "10"))
+
+# Tentatives d'une lecture (SELECT) en cas d'erreur transitoire
+NB_TENTATIVES_LECTURE = int(os.getenv("NB_TENTATIVES_LECTURE", "3"))
+
+# Délai initial de la reprise exponentielle (secondes)
+DELAI_REPRISE_LECTURE = 0.3
+
+# Échecs transitoires consécutifs ouvrant le coupe-circuit d'une table
+SEUIL_ECHECS_TABLE = int(os.getenv("SEUIL_ECHECS_TABLE", "3"))
+
+# Durée d'ouverture du coupe-circuit d'une table (secondes)
+PAUSE_TABLE = float(os.getenv("PAUSE_TABLE_S", "30"))
+
+
+class ServiceIndisponible(Exception):
+    """Appel refusé sans requête : le coupe-circuit de la table est ouvert."""
+
+
+def est_erreur_transitoire(erreur: Exception) -> bool:
+    """
+    Indique si une erreur mérite une nouvelle tentative (réseau, surcharge)
+
+    Args:
+        erreur (Exception): Exception levée par le client
+
+    Returns:
+        bool: True pour les erreurs réseau, délais dépassés, HTTP 429 / 5xx,
+              coupe-circuit ouvert
+    """
+    if isinstance(erreur, (ConnectionError, TimeoutError, ServiceIndisponible)):
+        return True
+    code = str(getattr(erreur, "code", "") or "")
+    message = str(erreur).lower()
+    return (
+        code in ("429", "500", "502", "503", "504")
+        or any(m in message for m in (
+            "timeout", "timed out", "connection", "temporarily", "too many requests"
+        ))
+    )
+
+
+def est_objet_absent(erreur: Exception) -> bool:
+    """
+    Indique si une erreur signale une fonction SQL ou une table absente du
+    schéma (script data/supabase.sql non appliqué)
+
+    Args:
+        erreur (Exception): Exception levée par le client
+
+    Returns:
+        bool: True pour les codes PostgREST PGRST202 (fonction) et PGRST205 (table)
+    """
+    return str(getattr(erreur, "code", "") or "") in ("PGRST202", "PGRST205")
+
+
+# =============================================================================
+# COUPE-CIRCUIT PAR TABLE
+# =============================================================================
+
+class CoupeCircuit:
+    """
+    Coupe-circuit d'une table
+
+    Fermé : les appels passent. Après SEUIL_ECHECS_TABLE échecs transitoires
+    consécutifs, il s'ouvre pendant PAUSE_TABLE secondes : les appels sont
+    refusés immédiatement (ServiceIndisponible). Ensuite un seul appel d'essai
+    est autorisé : son succès referme le coupe-circuit, son échec le rouvre.
+    """
+
+    def __init__(self, nom: str):
+        self.nom = nom
+        self._verrou = threading.Lock()
+        self.echecs = 0
+        self.ouvert_jusqua = 0.0
+        self._essai_en_cours = False
+
+    def autoriser(self):
+        """Lève ServiceIndisponible si l'appel doit être refusé."""
+        with self._verrou:
+            if self.echecs < SEUIL_ECHECS_TABLE:
+                return
+            restant = self.ouvert_jusqua - time.monotonic()
+            if restant > 0 or self._essai_en_cours:
+                libelle = "fonction SQL" if self.nom.startswith("rpc:") else self.nom
+                raise ServiceIndisponible(
+                    f"Supabase indisponible ({libelle}) : nouvel essai dans {max(restant, 1):.0f} s"
+                )
+            self._essai_en_cours = True
+
+    def succes(self):
+        with self._verrou:
+            self.echecs = 0
+            self._essai_en_cours = False
+
+    def echec(self):
+        with self._verrou:
+            self.echecs += 1
+            self._essai_en_cours = False
+            if self.echecs >= SEUIL_ECHECS_TABLE:
+                self.ouvert_jusqua = time.monotonic() + PAUSE_TABLE
+
+    def est_ouvert(self) -> bool:
+        with self._verrou:
+            return self.echecs >= SEUIL_ECHECS_TABLE and time.monotonic() < self.ouvert_jusqua
+
+
+_coupe_circuits = {}
+_verrou_coupe_circuits = threading.Lock()
+
+
+def coupe_circuit(nom: str) -> CoupeCircuit:
+    """
+    Args:
+        nom (str): Table (ou fonction SQL « rpc:nom »)
+
+    Returns:
+        CoupeCircuit: Coupe-circuit de la table, créé au premier appel
+    """
+    with _verrou_coupe_circuits:
+        if nom not in _coupe_circuits:
+            _coupe_circuits[nom] = CoupeCircuit(nom)
+        return _coupe_circuits[nom]
+
+
+def executer(nom: str, appel, lecture: bool = False):
+    """
+    Exécute un appel Supabase sous la protection du coupe-circuit de la table
+
+    Les lectures sont retentées (reprise exponentielle + gigue) sur erreur
+    transitoire ; les écritures ne le sont pas (un INSERT dont la réponse est
+    perdue a pu être appliqué).
+
+    Args:
+        nom (str): Table concernée
+        appel (callable): Fonction sans argument exécutant la requête
+        lecture (bool): True pour une requête sans effet de bord (SELECT, ou
+            fonction SQL de lecture)
+
+    Returns:
+        Résultat de l'appel
+
+    Raises:
+        ServiceIndisponible: Coupe-circuit ouvert (aucune requête envoyée)
+        Exception: Erreur de l'appel (après les tentatives pour une lecture)
+    """
+    disjoncteur = coupe_circuit(nom)
+    tentatives = NB_TENTATIVES_LECTURE if lecture else 1
+
+    with mesure(f"supabase:{nom}") as m:
+        for tentative in range(tentatives):
+            disjoncteur.autoriser()
+            debut = time.perf_counter()
+            try:
+                resultat = appel()
+            except Exception as e:
+                if not est_erreur_transitoire(e):
+                    disjoncteur.succes()  # la base a répondu (erreur applicative)
+                    raise
+                disjoncteur.echec()
+                sante.signaler_echec(e)
+                if tentative == tentatives - 1 or disjoncteur.est_ouvert():
+                    raise
+                time.sleep(DELAI_REPRISE_LECTURE * 2 ** tentative * (1 + random.random()))
+            else:
+                disjoncteur.succes()
+                sante.signaler_succes((time.perf_counter() - debut) * 1000)
+                donnees = getattr(resultat, "data", None)
+                m.lignes = len(donnees) if isinstance(donnees, list) else 0
+                if not lecture:
+                    # Écriture : les lectures mémorisées (magasin partagé et exécution
+                    # en cours) sont périmées (fonction SQL d'écriture ou équipements,
+                    # supprimés en cascade : tout est invalidé)
+                    tout = nom.startswith("rpc:") or nom == "equipements"
+                    contexte.invalider(*(() if tout else (nom,)))
+                return resultat
+
+
+# =============================================================================
+# CLIENT SURVEILLÉ
+# =============================================================================
+
+class _RequeteSurveillee:
+    """Enveloppe d'une requête PostgREST : execute() passe par executer()."""
+
+    def __init__(self, nom: str, requete, lecture: bool = None):
+        self._nom = nom
+        self._requete = requete
+        self._lecture = lecture
+
+    def __getattr__(self, attribut):
+        valeur = getattr(self._requete, attribut)
+
+        if attribut == "execute":
+            return lambda: executer(self._nom, valeur, lecture=bool(self._lecture))
+
+        # Le premier verbe de la chaîne (select, insert, update...) fixe la nature
+        lecture = (attribut == "select") if self._lecture is None else self._lecture
+
+        if not callable(valeur):
+            # Propriétés renvoyant une requête (ex. .not_)
+            return _RequeteSurveillee(self._nom, valeur, lecture) if hasattr(valeur, "execute") else valeur
+
+        def appel(*args, **kwargs):
+            resultat = valeur(*args, **kwargs)
+            if hasattr(resultat, "execute"):
+                return _RequeteSurveillee(self._nom, resultat, lecture)
+            return resultat
+
+        return appel
+
+
+class ClientSurveille:
+    """
+    Client Supabase dont toutes les requêtes de table (et les appels rpc)
+    passent par le coupe-circuit de la table concernée ; le reste (auth...)
+    est délégué tel quel au client d'origine
+    """
+
+    def __init__(self, client):
+        self._client = client
+
+    def table(self, nom: str):
+        return _RequeteSurveillee(nom, self._client.table(nom))
+
+    def rpc(self, fonction: str, params: dict = None, lecture: bool = False, **kwargs):
+        """
+        Args:
+            fonction (str): Fonction SQL
+            params (dict, optional): Paramètres de la fonction
+            lecture (bool): True pour une fonction sans effet de bord (retentée,
+                sans invalidation) ; par défaut écriture (tout est invalidé)
+        """
+        return _RequeteSurveillee(
+            f"rpc:{fonction}", self._client.rpc(fonction, params or {}, **kwargs), lecture
+        )
+
+    def __getattr__(self, attribut):
+        return getattr(self._client, attribut)
+
+
+def configuration_supabase() -> tuple:
+    """
+    URL et clé d'API Supabase : variables d'environnement, sinon secrets
+    Streamlit (.streamlit/secrets.toml), lues à l'appel et non à l'import
+
+    Returns:
+        tuple: (url, cle), chaînes vides si absentes
+    """
+    url, cle = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
+    if not url or not cle:
+        import streamlit as st
+        try:
+            url = url or st.secrets.get("SUPABASE_URL", "")
+            cle = cle or st.secrets.get("SUPABASE_KEY", "")
+        except Exception:
+            pass  # aucun fichier de secrets
+    return url or "", cle or ""
+
+
+def creer_client(url: str, cle: str) -> ClientSurveille:
+    """
+    Crée un client Supabase avec délai maximal par requête et coupe-circuits
+
+    Args:
+        url (str): URL du projet Supabase
+        cle (str): Clé d'API
+
+    Returns:
+        ClientSurveille: Client enveloppé
+    """
+    from supabase import create_client, ClientOptions
+    return ClientSurveille(create_client(
+        url, cle, options=ClientOptions(postgrest_client_timeout=DELAI_REQUETE)
+    ))
+
+
+# =============================================================================
+# DERNIERS RÉSULTATS VALIDES
+# =============================================================================
+
+_instantanes = {}
+_verrou_instantanes = threading.Lock()
+
+
+def memoriser_instantane(nom: str, valeur):
+    """
+    Conserve le dernier résultat valide d'une lecture (servi si la base tombe)
+
+    Args:
+        nom (str): Identifiant de la lecture (ex. nom de table)
+        valeur: Résultat (ex. DataFrame)
+    """
+    with _verrou_instantanes:
+        _instantanes[nom] = (time.time(), valeur)
+
+
+def dernier_instantane(nom: str):
+    """
+    Args:
+        nom (str): Identifiant de la lecture
+
+    Returns:
+        tuple: (horodatage time.time(), valeur) ou None si jamais lu avec succès
+    """
+    with _verrou_instantanes:
+        return _instantanes.get(nom)
@@ -0,0 +1,154 @@
+"""
+État de santé de la connexion Supabase
+Sonde exécutée en arrière-plan (une à la fois par processus) et statut mis en
+cache avec durée de validité ; les échecs répétés sont gérés par les
+coupe-circuits par table de data/resilience.py, qui alimentent aussi ce statut
+"""
+
+import os
+import threading
+import time
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Durée de validité d'un statut avant nouvelle sonde (secondes)
+DUREE_VALIDITE_SANTE = float(os.getenv("DUREE_VALIDITE_SANTE_S", "60"))
+
+# Table interrogée par la sonde (son coupe-circuit suspend les sondes)
+TABLE_SONDE = "equipements"
+
+# Latence au-delà de laquelle la base est signalée lente (millisecondes)
+SEUIL_LATENCE_SANTE_MS = float(os.getenv("SEUIL_LATENCE_SANTE_MS", "1500"))
+
+# Statuts possibles
+INCONNU = "inconnu"
+OK = "ok"
+LENT = "lent"
+INDISPONIBLE = "indisponible"
+
+
+# =============================================================================
+# ÉTAT DU PROCESSUS
+# =============================================================================
+
+_verrou = threading.Lock()
+_etat = {
+    "statut": INCONNU,
+    "latence_ms": None,
+    "message": "",
+    "verifie_le": None,        # time.time() de la dernière sonde terminée
+    "echecs_consecutifs": 0,
+}
+_sonde_en_cours = False
+_client = None
+
+
+def _sonder():
+    """
+    Exécute une sonde (thread d'arrière-plan) ; la requête passe par le
+    coupe-circuit de la table, qui signale lui-même succès et échecs
+    transitoires
+    """
+    global _sonde_en_cours, _client
+    from data.resilience import (
+        ServiceIndisponible, configuration_supabase, creer_client, est_erreur_transitoire
+    )
+
+    try:
+        if _client is None:
+            _client = creer_client(*configuration_supabase())
+        _client.table(TABLE_SONDE).select("id_equipement").limit(1).execute()
+    except Exception as e:
+        # Coupe-circuit ouvert, erreur applicative ou client non créé : non signalés
+        if isinstance(e, ServiceIndisponible) or not est_erreur_transitoire(e):
+            signaler_echec(e)
+    finally:
+        with _verrou:
+            _sonde_en_cours = False
+
+
+def verifier_en_arriere_plan(forcer: bool = False):
+    """
+    Lance une sonde en arrière-plan si le statut est périmé (non bloquant)
+
+    Une seule sonde à la fois par processus ; aucune sonde tant que le
+    coupe-circuit de la table sondée est ouvert.
+
+    Args:
+        forcer (bool): Ignorer la durée de validité du statut
+    """
+    global _sonde_en_cours
+    from data.resilience import coupe_circuit
+
+    if coupe_circuit(TABLE_SONDE).est_ouvert():
+        return
+    with _verrou:
+        if _sonde_en_cours:
+            return
+        verifie_le = _etat["verifie_le"]
+        if not forcer and verifie_le is not None and time.time() - verifie_le < DUREE_VALIDITE_SANTE:
+            return
+        _sonde_en_cours = True
+
+    threading.Thread(target=_sonder, name="sonde-sante", daemon=True).start()
+
+
+# =============================================================================
+# SIGNALEMENTS (data/resilience.py)
+# =============================================================================
+
+def signaler_succes(latence_ms: float = None):
+    """
+    Enregistre un échange réussi avec la base
+
+    Args:
+        latence_ms (float, optional): Durée mesurée de l'échange
+    """
+    with _verrou:
+        lent = latence_ms is not None and latence_ms > SEUIL_LATENCE_SANTE_MS
+        _etat.update({
+            "statut": LENT if lent else OK,
+            "latence_ms": latence_ms,
+            "message": "",
+            "verifie_le": time.time(),
+            "echecs_consecutifs": 0,
+        })
+
+
+def signaler_echec(erreur: Exception):
+    """
+    Enregistre un échec d'échange avec la base
+
+    Args:
+        erreur (Exception): Erreur rencontrée
+    """
+    with _verrou:
+        echecs = _etat["echecs_consecutifs"] + 1
+        _etat.update({
+            "statut": INDISPONIBLE,
+            "latence_ms": None,
+            "message": str(erreur)[:200],
+            "verifie_le": time.time(),
+            "echecs_consecutifs": echecs,
+        })
+
+
+def etat_sante() -> dict:
+    """
+    Retourne le dernier statut connu (sans appel réseau) et relance une sonde
+    en arrière-plan s'il est périmé
+
+    Returns:
+        dict: statut (inconnu / ok / lent / indisponible), latence_ms, message,
+              verifie_le, echecs_consecutifs, coupe_circuit_ouvert (table sondée)
+    """
+    from data.resilience import coupe_circuit
+
+    verifier_en_arriere_plan()
+    with _verrou:
+        etat = dict(_etat)
+    etat["coupe_circuit_ouvert"] = coupe_circuit(TABLE_SONDE).est_ouvert()
+    return etat
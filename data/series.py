@@ -0,0 +1,116 @@
+"""
+Extraction et alignement des séries de mesures de suivi
+Utilisé par la visualisation des tendances et la comparaison multi-équipements
+"""
+
+import pandas as pd
+
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+VARIABLES_SUIVI = ["vitesse_rpm", "twf_rms_g", "crest_factor", "twf_peak_to_peak_g"]
+
+# Libellé affiché → fréquence pandas de rééchantillonnage (None = dates brutes)
+FREQUENCES_ALIGNEMENT = {
+    "Dates brutes": None,
+    "Hebdomadaire": "W",
+    "Mensuel": "MS",
+}
+
+
+# =============================================================================
+# EXTRACTION
+# =============================================================================
+
+def extraire_series(df_suivi: pd.DataFrame, cles: list, variables: list = None,
+                    frequence: str = None) -> pd.DataFrame:
+    """
+    Extrait en une seule passe toutes les séries (équipement, point de mesure)
+    demandées et les aligne sur un axe temporel commun
+
+    Un seul filtrage + un seul groupby pour l'ensemble des séries : le coût est
+    quasi indépendant du nombre d'équipements comparés. En cas de doublon de date
+    pour une même série, la première valeur renseignée est conservée.
+
+    Args:
+        df_suivi (DataFrame): Données de suivi complètes
+        cles (list): Couples (id_equipement, point_mesure) à extraire
+        variables (list, optional): Variables à conserver (toutes par défaut)
+        frequence (str, optional): Fréquence pandas de rééchantillonnage (moyenne
+            par période), ex. "W" ou "MS" ; None conserve les dates brutes
+
+    Returns:
+        DataFrame: Index = date, colonnes MultiIndex (id_equipement, point_mesure, variable)
+    """
+    variables = variables or VARIABLES_SUIVI
+    colonnes = pd.MultiIndex.from_tuples(
+        [], names=["id_equipement", "point_mesure", "variable"]
+    )
+
+    if df_suivi.empty or not cles:
+        return pd.DataFrame(columns=colonnes, index=pd.DatetimeIndex([], name="date"))
+
+    index_cles = pd.MultiIndex.from_tuples(cles, names=["id_equipement", "point_mesure"])
+    masque = pd.MultiIndex.from_frame(
+        df_suivi[["id_equipement", "point_mesure"]]
+    ).isin(index_cles)
+
+    df = df_suivi.loc[masque, ["id_equipement", "point_mesure", "date"] + variables]
+    df = df.assign(date=pd.to_datetime(df["date"], errors="coerce")).dropna(subset=["date"])
+
+    if df.empty:
+        return pd.DataFrame(columns=colonnes, index=pd.DatetimeIndex([], name="date"))
+
+    large = (
+        df.groupby(["id_equipement", "point_mesure", "date"], sort=True)[variables]
+        .first()
+        .unstack(["id_equipement", "point_mesure"])
+    )
+    large.columns = large.columns.reorder_levels([1, 2, 0])
+    large.columns.names = ["id_equipement", "point_mesure", "variable"]
+    large = large.sort_index(axis=1)
+
+    if frequence:
+        large = large.resample(frequence).mean()
+
+    return large.dropna(how="all")
+
+
+# =============================================================================
+# FENÊTRES TEMPORELLES
+# =============================================================================
+
+def filtrer_periode(large: pd.DataFrame, date_debut, date_fin) -> pd.DataFrame:
+    """
+    Restreint un tableau de séries alignées à une période (bornes incluses)
+
+    Args:
+        large (DataFrame): Séries alignées (index = date)
+        date_debut (date): Date de début
+        date_fin (date): Date de fin
+
+    Returns:
+        DataFrame: Lignes comprises dans la période
+    """
+    debut = pd.Timestamp(date_debut)
+    fin = pd.Timestamp(date_fin) + pd.Timedelta(days=1)
+    return large[(large.index >= debut) & (large.index < fin)]
+
+
+def dernieres_valeurs(large: pd.DataFrame, n: int) -> pd.DataFrame:
+    """
+    Conserve les n dernières valeurs renseignées de chaque série, en une opération
+    vectorisée sur toutes les colonnes
+
+    Args:
+        large (DataFrame): Séries alignées (index = date)
+        n (int): Nombre de valeurs à conserver par série
+
+    Returns:
+        DataFrame: Séries tronquées (valeurs plus anciennes remplacées par NaN)
+    """
+    presentes = large.notna()
+    rang_depuis_fin = presentes.iloc[::-1].cumsum().iloc[::-1]
+    return large.where(presentes & (rang_depuis_fin <= n)).dropna(how="all")
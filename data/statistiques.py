@@ -0,0 +1,276 @@
+"""
+Statistiques descriptives des séries de mesures
+Calcul de tous les indicateurs en une passe, mémorisé par (série, fenêtre, version)
+Estimation de densité (KDE) par binning + FFT
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Quantiles calculés systématiquement (médiane incluse)
+QUANTILES_DEFAUT = (0.10, 0.25, 0.50, 0.75, 0.90)
+
+# Nombre maximal de jeux de statistiques conservés en mémoire (LRU)
+TAILLE_CACHE_STATS = int(os.getenv("TAILLE_CACHE_STATS", "256"))
+
+# Taille minimale et maximale de la grille de binning pour l'estimation de
+# densité (puissances de 2) ; entre les deux, la grille est dimensionnée pour
+# un pas d'au plus PAS_GRILLE_KDE largeur de bande
+TAILLE_GRILLE_KDE = 1024
+TAILLE_GRILLE_KDE_MAX = 1 << 16
+PAS_GRILLE_KDE = 0.25
+
+# Quantiles bornant la grille quand l'étendue des données est trop grande pour
+# la taille maximale (valeurs aberrantes) ; les valeurs hors bornes comptent
+# dans l'effectif mais ne sont pas tracées
+QUANTILES_GRILLE_KDE = (0.005, 0.995)
+
+_cache_stats: OrderedDict = OrderedDict()
+_verrou_cache = threading.Lock()
+
+
+# =============================================================================
+# CALCUL
+# =============================================================================
+
+def calculer_statistiques(valeurs, quantiles: tuple = QUANTILES_DEFAUT) -> dict:
+    """
+    Calcule tous les indicateurs descriptifs d'une série en une seule passe
+
+    Un seul tri sert au min, au max, à la médiane et à tous les quantiles
+    (interpolation linéaire, identique à pandas). Moyenne, variance, écart-type
+    et RMS dérivent des mêmes sommes (valeurs décalées de la médiane pour
+    limiter les erreurs d'arrondi).
+
+    Args:
+        valeurs (array-like): Valeurs de la série (les NaN sont ignorés)
+        quantiles (tuple): Quantiles à calculer, entre 0 et 1
+
+    Returns:
+        dict: n, moyenne, mediane, min, max, variance, ecart_type, rms,
+              plage et quantiles ({q: valeur}) ; {"n": 0} si série vide
+    """
+    x = np.asarray(valeurs, dtype=float)
+    x = np.sort(x[~np.isnan(x)])
+    n = int(x.size)
+
+    if n == 0:
+        return {"n": 0}
+
+    # ── Quantiles : un seul tri, interpolation linéaire ──────────────────────
+    q = np.asarray(sorted(set(quantiles) | {0.5}), dtype=float)
+    position = q * (n - 1)
+    bas = np.floor(position).astype(int)
+    haut = np.minimum(bas + 1, n - 1)
+    valeurs_q = x[bas] + (x[haut] - x[bas]) * (position - bas)
+    table_q = dict(zip(q.tolist(), valeurs_q.tolist()))
+
+    # ── Moments : sommes partagées ───────────────────────────────────────────
+    decalage = table_q[0.5]
+    d = x - decalage
+    somme_d = float(d.sum())
+    somme_d2 = float(np.dot(d, d))
+
+    moyenne = decalage + somme_d / n
+    ecarts2 = somme_d2 - somme_d * somme_d / n
+    variance = max(ecarts2, 0.0) / (n - 1) if n > 1 else float("nan")
+    somme_x2 = somme_d2 + 2 * decalage * somme_d + n * decalage * decalage
+
+    return {
+        "n": n,
+        "moyenne": moyenne,
+        "mediane": table_q[0.5],
+        "min": float(x[0]),
+        "max": float(x[-1]),
+        "variance": variance,
+        "ecart_type": float(np.sqrt(variance)),
+        "rms": float(np.sqrt(max(somme_x2, 0.0) / n)),
+        "plage": float(x[-1] - x[0]),
+        "quantiles": {qq: table_q[qq] for qq in quantiles},
+    }
+
+
+# =============================================================================
+# MÉMORISATION
+# =============================================================================
+
+def statistiques_serie(serie: pd.Series, cle, fenetre=None, version=None,
+                       quantiles: tuple = QUANTILES_DEFAUT) -> dict:
+    """
+    Retourne les statistiques d'une série, recalculées seulement si la série,
+    la fenêtre ou la version des données ont changé
+
+    Args:
+        serie (Series): Valeurs de la série (déjà restreinte à la fenêtre)
+        cle (tuple): Identifiant de la série, ex. (id_equipement, point_mesure, variable)
+        fenetre (hashable, optional): Description de la fenêtre (dates, filtres...)
+        version (hashable, optional): Version de la table source, ex.
+            ctx.version("suivi_equipements") ; None (table non mémorisée) :
+            calcul direct, sans mémorisation
+        quantiles (tuple): Quantiles à calculer
+
+    Returns:
+        dict: Voir calculer_statistiques()
+    """
+    if version is None:
+        return calculer_statistiques(serie, quantiles)
+
+    return _memoriser(
+        (cle, fenetre, version, tuple(quantiles)),
+        lambda: calculer_statistiques(serie, quantiles)
+    )
+
+
+def _memoriser(cle_cache, calcul):
+    """Retourne la valeur mémorisée pour cle_cache, ou la calcule et la stocke."""
+    with _verrou_cache:
+        if cle_cache in _cache_stats:
+            _cache_stats.move_to_end(cle_cache)
+            return _cache_stats[cle_cache]
+
+    valeur = calcul()
+
+    with _verrou_cache:
+        _cache_stats[cle_cache] = valeur
+        while len(_cache_stats) > TAILLE_CACHE_STATS:
+            _cache_stats.popitem(last=False)
+
+    return valeur
+
+
+def vider_cache_statistiques():
+    """
+    Vide le cache des statistiques (ex. après une modification des données)
+    """
+    with _verrou_cache:
+        _cache_stats.clear()
+
+
+# =============================================================================
+# DENSITÉ DE PROBABILITÉ (KDE)
+# =============================================================================
+
+def largeur_bande_scott(valeurs) -> float:
+    """
+    Largeur de bande gaussienne selon la règle de Scott (identique à
+    scipy.stats.gaussian_kde par défaut) : σ × n^(-1/5)
+
+    Args:
+        valeurs (array-like): Valeurs (sans NaN)
+
+    Returns:
+        float: Largeur de bande (0 si la série est constante ou trop courte)
+    """
+    x = np.asarray(valeurs, dtype=float)
+    if x.size < 2:
+        return 0.0
+    return float(np.std(x, ddof=1) * x.size ** (-1 / 5))
+
+
+def _taille_grille(etendue: float, h: float) -> int:
+    """Nombre de nœuds (puissance de 2 bornée) pour un pas d'au plus PAS_GRILLE_KDE × h."""
+    noeuds = etendue / (PAS_GRILLE_KDE * h) + 1
+    taille = 1 << int(np.ceil(np.log2(max(noeuds, 2))))
+    return int(min(max(taille, TAILLE_GRILLE_KDE), TAILLE_GRILLE_KDE_MAX))
+
+
+def calculer_kde(valeurs, nb_points: int = 300, largeur_bande: float = None):
+    """
+    Estime la densité par noyau gaussien via binning linéaire + convolution FFT
+
+    Coût O(n + m log m) (m = taille de la grille) au lieu de O(n × nb_points)
+    pour une évaluation directe. La grille est assez fine pour échantillonner
+    le noyau (pas ≤ PAS_GRILLE_KDE × h) ; si l'étendue l'interdit, elle est
+    restreinte aux QUANTILES_GRILLE_KDE des données.
+
+    Args:
+        valeurs (array-like): Valeurs (les NaN sont ignorés)
+        nb_points (int): Nombre de points d'évaluation sur l'étendue tracée
+        largeur_bande (float, optional): Largeur de bande ; règle de Scott par défaut
+
+    Returns:
+        tuple: (x, densite) en ndarrays, ou None si la densité n'est pas définie
+    """
+    x = np.asarray(valeurs, dtype=float)
+    x = x[~np.isnan(x)]
+    h = largeur_bande_scott(x) if largeur_bande is None else largeur_bande
+
+    if x.size < 2 or not h > 0:
+        return None
+
+    # ── Étendue tracée : toutes les données, ou les quantiles centraux ───────
+    n = x.size
+    x_min, x_max = x.min(), x.max()
+    if (x_max - x_min + 8 * h) / (PAS_GRILLE_KDE * h) + 1 > TAILLE_GRILLE_KDE_MAX:
+        x_min, x_max = np.quantile(x, QUANTILES_GRILLE_KDE)
+        x = x[(x >= x_min - 4 * h) & (x <= x_max + 4 * h)]
+
+    # ── Grille couvrant l'étendue + 4 largeurs de bande de chaque côté ───────
+    bas, haut = x_min - 4 * h, x_max + 4 * h
+    m = _taille_grille(haut - bas, h)
+    pas = (haut - bas) / (m - 1)
+
+    # ── Binning linéaire : chaque valeur répartie entre ses 2 nœuds voisins ──
+    position = (x - bas) / pas
+    indice = np.clip(np.floor(position).astype(int), 0, m - 2)
+    fraction = position - indice
+    poids = (
+        np.bincount(indice, weights=1 - fraction, minlength=m) +
+        np.bincount(indice + 1, weights=fraction, minlength=m)
+    )
+
+    # ── Convolution par le noyau gaussien échantillonné (FFT, sans repliement)
+    demi = min(int(np.ceil(4 * h / pas)), m - 1)
+    decalages = np.arange(-demi, demi + 1) * pas
+    noyau = np.exp(-0.5 * (decalages / h) ** 2)
+    # Noyau discret normalisé : masse conservée quel que soit le pas
+    noyau /= noyau.sum() * pas
+
+    taille_fft = 1 << int(np.ceil(np.log2(m + noyau.size - 1)))
+    convolution = np.fft.irfft(
+        np.fft.rfft(poids, taille_fft) * np.fft.rfft(noyau, taille_fft), taille_fft
+    )[demi:demi + m]
+    densite_grille = np.maximum(convolution, 0.0) / n
+
+    x_eval = np.linspace(x_min, x_max, nb_points)
+    grille = bas + np.arange(m) * pas
+    return x_eval, np.interp(x_eval, grille, densite_grille)
+
+
+def densite_serie(serie: pd.Series, cle, fenetre=None, version=None,
+                  nb_points: int = 300):
+    """
+    Densité KDE d'une série, mémorisée comme les statistiques ; la largeur de
+    bande est elle-même mémorisée par (série, fenêtre, version)
+
+    Args:
+        serie (Series): Valeurs de la série
+        cle (tuple): Identifiant de la série
+        fenetre (hashable, optional): Description de la fenêtre
+        version (hashable, optional): Version de la table source ; None :
+            calcul direct, sans mémorisation
+        nb_points (int): Nombre de points d'évaluation
+
+    Returns:
+        tuple: (x, densite) ou None
+    """
+    if version is None:
+        return calculer_kde(serie, nb_points)
+
+    largeur = _memoriser(
+        ("bande", cle, fenetre, version),
+        lambda: largeur_bande_scott(serie.dropna().to_numpy())
+    )
+    return _memoriser(
+        ("kde", cle, fenetre, version, nb_points),
+        lambda: calculer_kde(serie, nb_points, largeur)
+    )
@@ -0,0 +1,141 @@
+-- =============================================================================
+-- Compléments de schéma Supabase (à exécuter dans l'éditeur SQL du projet)
+-- Scripts idempotents : peuvent être rejoués sans effet de bord
+-- =============================================================================
+
+
+-- =============================================================================
+-- CONTRAINTES D'UNICITÉ (clés naturelles)
+-- modifier_observation / modifier_suivi font un UPDATE en place : un changement
+-- de date vers une date déjà occupée doit être refusé par la base (code 23505)
+-- =============================================================================
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'observations_equipement_date_key'
+    ) THEN
+        ALTER TABLE observations
+            ADD CONSTRAINT observations_equipement_date_key UNIQUE (id_equipement, date);
+    END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'suivi_equipements_equipement_point_date_key'
+    ) AND NOT EXISTS (
+        SELECT 1 FROM pg_indexes
+        WHERE tablename = 'suivi_equipements'
+          AND indexdef ILIKE '%UNIQUE%(id_equipement, point_mesure, date)%'
+    ) THEN
+        ALTER TABLE suivi_equipements
+            ADD CONSTRAINT suivi_equipements_equipement_point_date_key
+            UNIQUE (id_equipement, point_mesure, date);
+    END IF;
+END $$;
+
+
+-- =============================================================================
+-- SUPPRESSION D'UN ÉQUIPEMENT EN UN SEUL APPEL
+-- Utilisée par supprimer_equipement() : renvoie le nombre d'enregistrements
+-- associés supprimés par CASCADE, sans requêtes de comptage séparées
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION supprimer_equipement_cascade(p_id_equipement TEXT)
+RETURNS JSON
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_nb_observations INTEGER;
+    v_nb_suivis       INTEGER;
+    v_supprime        BOOLEAN;
+BEGIN
+    SELECT COUNT(*) INTO v_nb_observations
+    FROM observations WHERE id_equipement = p_id_equipement;
+
+    SELECT COUNT(*) INTO v_nb_suivis
+    FROM suivi_equipements WHERE id_equipement = p_id_equipement;
+
+    DELETE FROM equipements WHERE id_equipement = p_id_equipement;
+    v_supprime := FOUND;
+
+    RETURN json_build_object(
+        'supprime',        v_supprime,
+        'nb_observations', CASE WHEN v_supprime THEN v_nb_observations ELSE 0 END,
+        'nb_suivis',       CASE WHEN v_supprime THEN v_nb_suivis ELSE 0 END
+    );
+END;
+$$;
+
+
+-- =============================================================================
+-- INDEX DU JOURNAL D'AUDIT
+-- get_audit_logs() pagine par curseur (timestamp, id) (ORDER BY timestamp DESC,
+-- id DESC + (timestamp, id) < curseur) avec filtres optionnels utilisateur /
+-- action / table
+-- =============================================================================
+
+DROP INDEX IF EXISTS audit_log_timestamp_idx;
+DROP INDEX IF EXISTS audit_log_email_timestamp_idx;
+DROP INDEX IF EXISTS audit_log_action_timestamp_idx;
+
+CREATE INDEX IF NOT EXISTS audit_log_timestamp_id_idx
+    ON audit_log (timestamp DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS audit_log_email_timestamp_id_idx
+    ON audit_log (email, timestamp DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS audit_log_action_timestamp_id_idx
+    ON audit_log (action, timestamp DESC, id DESC);
+
+
+-- =============================================================================
+-- STATISTIQUES D'OBSERVATIONS PAR ANALYSTE
+-- Utilisée par la page Gestion des utilisateurs : un seul appel renvoie le
+-- nombre d'observations et la dernière date par analyste (GROUP BY en base)
+-- =============================================================================
+
+CREATE INDEX IF NOT EXISTS observations_analyste_idx
+    ON observations (lower(analyste));
+
+CREATE OR REPLACE FUNCTION stats_observations_par_analyste()
+RETURNS TABLE (analyste TEXT, nb_observations BIGINT, derniere_observation DATE)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT lower(o.analyste::TEXT), COUNT(*), MAX(o.date)::DATE
+    FROM observations o
+    GROUP BY lower(o.analyste::TEXT);
+$$;
+
+
+-- =============================================================================
+-- VERSION DU RÉFÉRENTIEL ÉQUIPEMENTS
+-- Sondée par data/referentiel.py (une petite lecture toutes les 15 s) : toute
+-- modification de la table equipements, y compris hors de l'application,
+-- incrémente le compteur et fait relire le référentiel mémorisé
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS versions_referentiel (
+    nom        TEXT PRIMARY KEY,
+    version    BIGINT NOT NULL DEFAULT 0,
+    modifie_le TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+INSERT INTO versions_referentiel (nom) VALUES ('equipements')
+ON CONFLICT (nom) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION incrementer_version_referentiel()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE versions_referentiel
+    SET version = version + 1, modifie_le = now()
+    WHERE nom = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS equipements_version_referentiel ON equipements;
+CREATE TRIGGER equipements_version_referentiel
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON equipements
+    FOR EACH STATEMENT EXECUTE FUNCTION incrementer_version_referentiel();
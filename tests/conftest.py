@@ -0,0 +1,18 @@
+"""
+Configuration commune des tests (pytest, depuis la racine du dépôt)
+Les modules de données sont importés sans base Supabase : les tests qui
+chargent des tables passent par des fonctions de chargement factices
+"""
+
+import os
+import sys
+import tempfile
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+os.environ.setdefault("SUPABASE_URL", "http://localhost:1")
+os.environ.setdefault("SUPABASE_KEY", "tests")
+# Journal d'audit de secours hors du dépôt
+os.environ.setdefault(
+    "FICHIER_SECOURS_AUDIT", os.path.join(tempfile.gettempdir(), "tests_audit_en_attente.jsonl")
+)
@@ -0,0 +1,132 @@
+"""
+Tests des agrégats par période (data/agregats.py) : t-digest, fusion,
+statistiques d'une plage de dates et fraîcheur par version de table
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data import agregats
+from data.agregats import Agregat, TDigest, statistiques_periode
+from data.statistiques import calculer_statistiques
+
+CLE = ("E1", "P1", "twf_rms_g")
+
+
+@pytest.fixture(autouse=True)
+def agregats_vides():
+    agregats.vider_agregats()
+    yield
+    agregats.vider_agregats()
+
+
+@pytest.fixture
+def df_serie():
+    rng = np.random.default_rng(1)
+    dates = pd.date_range("2023-01-01", "2024-12-31", freq="D")
+    return pd.DataFrame({"date": dates, "twf_rms_g": rng.gamma(2.0, 0.3, dates.size)})
+
+
+def _exactes(df, debut, fin):
+    dans = (df["date"] >= pd.Timestamp(debut)) & (df["date"] <= pd.Timestamp(fin))
+    return calculer_statistiques(df.loc[dans, "twf_rms_g"])
+
+
+# =============================================================================
+# T-DIGEST ET FUSION
+# =============================================================================
+
+def test_tdigest_quantiles_approches():
+    x = np.random.default_rng(2).normal(0, 1, 20000)
+    digest = TDigest.depuis_valeurs(x)
+    assert digest.moyennes.size <= agregats.COMPRESSION_TDIGEST
+    for q, estime in zip((0.1, 0.5, 0.9), digest.quantiles([0.1, 0.5, 0.9], x.min(), x.max())):
+        assert estime == pytest.approx(np.quantile(x, q), abs=0.02)
+
+
+def test_fusion_exacte_pour_les_moments():
+    x = np.random.default_rng(3).uniform(0, 10, 3000)
+    fusion = Agregat.fusion([Agregat(x[:1000]), Agregat(x[1000:2500]), Agregat(x[2500:])])
+    stats, exactes = fusion.statistiques((0.5,)), calculer_statistiques(x)
+    assert stats["n"] == exactes["n"]
+    for cle in ("moyenne", "variance", "rms", "min", "max"):
+        assert stats[cle] == pytest.approx(exactes[cle])
+    assert stats["mediane"] == pytest.approx(exactes["mediane"], abs=0.1)
+    assert stats["approche"]
+
+
+# =============================================================================
+# PLAGES DE DATES
+# =============================================================================
+
+@pytest.mark.parametrize("debut, fin", [
+    ("2023-01-01", "2024-12-31"),   # périodes complètes uniquement
+    ("2023-03-15", "2023-09-10"),   # bornes partielles
+    ("2024-02-10", "2024-02-20"),   # une seule période, partielle
+])
+def test_plage_identique_au_calcul_brut(df_serie, debut, fin):
+    stats = statistiques_periode(df_serie, CLE, pd.Timestamp(debut).date(),
+                                 pd.Timestamp(fin).date(), version=1)
+    exactes = _exactes(df_serie, debut, fin)
+    assert stats["n"] == exactes["n"]
+    for cle in ("moyenne", "ecart_type", "min", "max"):
+        assert stats[cle] == pytest.approx(exactes[cle])
+
+
+def test_plage_vide(df_serie):
+    assert statistiques_periode(df_serie, CLE, pd.Timestamp("2030-01-01").date(),
+                                pd.Timestamp("2030-02-01").date(), version=1) == {"n": 0}
+
+
+# =============================================================================
+# FRAÎCHEUR PAR VERSION
+# =============================================================================
+
+def test_meme_version_sans_relecture(df_serie):
+    debut, fin = pd.Timestamp("2023-01-01").date(), pd.Timestamp("2024-12-31").date()
+    premier = statistiques_periode(df_serie, CLE, debut, fin, version=1)
+    # Lignes ignorées tant que la version ne change pas
+    assert statistiques_periode(df_serie.iloc[:0], CLE, debut, fin, version=1) == premier
+
+
+def test_modification_hors_application_a_effectif_constant(df_serie):
+    debut, fin = pd.Timestamp("2023-01-01").date(), pd.Timestamp("2024-12-31").date()
+    statistiques_periode(df_serie, CLE, debut, fin, version=1)
+
+    modifie = df_serie.assign(twf_rms_g=df_serie["twf_rms_g"] * 2)
+    stats = statistiques_periode(modifie, CLE, debut, fin, version=2)
+    assert stats["moyenne"] == pytest.approx(_exactes(modifie, debut, fin)["moyenne"])
+
+
+def test_ecritures_de_l_application_incrementales(df_serie):
+    debut, fin = pd.Timestamp("2023-01-01").date(), pd.Timestamp("2025-01-31").date()
+    statistiques_periode(df_serie, CLE, debut, fin, version=1)
+
+    # Ajout, modification (retrait + ajout) et suppression répercutés en place
+    agregats.enregistrer_mesure("E1", "P1", "2025-01-10", {"twf_rms_g": 5.0})
+    agregats.invalider_mesure("E1", "P1", "2023-06-01")
+    agregats.enregistrer_mesure("E1", "P1", "2023-06-01", {"twf_rms_g": 7.0})
+    agregats.invalider_mesure("E1", "P1", "2024-03-03")
+
+    attendu = df_serie.set_index("date")["twf_rms_g"].copy()
+    attendu[pd.Timestamp("2025-01-10")] = 5.0
+    attendu[pd.Timestamp("2023-06-01")] = 7.0
+    attendu = attendu.drop(pd.Timestamp("2024-03-03")).sort_index().reset_index()
+
+    # Première lecture après les écritures : version adoptée sans relecture
+    stats = statistiques_periode(attendu.iloc[:0], CLE, debut, fin, version=2)
+    exactes = _exactes(attendu, debut, fin)
+    assert stats["n"] == exactes["n"]
+    assert stats["max"] == 7.0
+    assert stats["moyenne"] == pytest.approx(exactes["moyenne"])
+
+    partielle = statistiques_periode(attendu.iloc[:0], CLE, pd.Timestamp("2024-03-01").date(),
+                                     pd.Timestamp("2024-03-05").date(), version=2)
+    assert partielle["n"] == 4
+
+
+def test_sans_version_non_conservee(df_serie):
+    statistiques_periode(df_serie, CLE, pd.Timestamp("2023-01-01").date(),
+                         pd.Timestamp("2023-12-31").date())
+    assert not agregats._series
@@ -0,0 +1,92 @@
+"""
+Tests du journal d'audit (auth/audit.py) : seules les entrées non insérées
+vont au fichier de secours, et le rejeu ne duplique aucune entrée
+"""
+
+import json
+import os
+
+import pytest
+
+from auth import audit
+
+
+class ClientAudit:
+    """Client dont l'insertion numéro echec (1 = première) échoue."""
+
+    def __init__(self, echec: int = None):
+        self.echec = echec
+        self.nb_insertions = 0
+        self.inserees = []
+
+    def table(self, nom):
+        return self
+
+    def insert(self, lot):
+        self._lot = list(lot)
+        return self
+
+    def execute(self):
+        self.nb_insertions += 1
+        if self.nb_insertions == self.echec:
+            raise ConnectionError("connection reset")
+        self.inserees.extend(self._lot)
+
+
+@pytest.fixture
+def journal(monkeypatch, tmp_path):
+    monkeypatch.setattr(audit, "FICHIER_SECOURS_AUDIT", str(tmp_path / "audit.jsonl"))
+    monkeypatch.setattr(audit, "TAILLE_LOT_AUDIT", 2)
+
+    def installer(client):
+        j = audit.JournalAudit()
+        j._client = client
+        return j
+    return installer
+
+
+def _entrees(n):
+    return [{"action": f"a{i}"} for i in range(n)]
+
+
+def _secours():
+    with open(audit.FICHIER_SECOURS_AUDIT, encoding="utf-8") as f:
+        return [json.loads(ligne) for ligne in f]
+
+
+def test_second_sous_lot_en_echec(journal):
+    client = ClientAudit(echec=2)
+    assert journal(client)._envoyer(_entrees(5)) == 2
+
+    assert client.inserees == _entrees(2)
+    # Seules les entrées du sous-lot en échec et des suivants sont conservées
+    assert _secours() == _entrees(5)[2:]
+
+
+def test_rejeu_interrompu_sans_doublon(journal):
+    j = journal(ClientAudit())
+    j._ecrire_secours(_entrees(5))
+
+    j._client = ClientAudit(echec=2)
+    j._rejouer_secours()
+    assert j._client.inserees == _entrees(2)
+    assert _secours() == _entrees(5)[2:]
+
+    j._client = ClientAudit()
+    j._rejouer_secours()
+    assert j._client.inserees == _entrees(5)[2:]
+    assert not os.path.exists(audit.FICHIER_SECOURS_AUDIT)
+
+
+def test_rejeu_conserve_les_entrees_ajoutees_pendant_l_envoi(journal):
+    j = journal(ClientAudit())
+    j._ecrire_secours(_entrees(2))
+
+    class ClientAjout(ClientAudit):
+        def execute(self):
+            j._ecrire_secours([{"action": "pendant"}])
+            super().execute()
+
+    j._client = ClientAjout()
+    j._rejouer_secours()
+    assert _secours() == [{"action": "pendant"}]
@@ -0,0 +1,169 @@
+"""
+Tests de la connexion (auth/auth.py) : profil lu après l'authentification,
+par le client connecté, et mis en cache pour les seuls comptes authentifiés ;
+rafraîchissement du jeton d'accès
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+import streamlit as st
+
+from auth import auth
+
+
+class ClientConnexion:
+    """Client factice : journal des appels, authentification selon le mot de passe."""
+
+    def __init__(self, profils: dict):
+        self.profils = profils
+        self.appels = []
+        self.connecte = False
+        self.auth = SimpleNamespace(sign_in_with_password=self._connexion,
+                                    sign_out=lambda: self.appels.append("sign_out"))
+
+    def _connexion(self, identifiants):
+        self.appels.append("sign_in")
+        if identifiants["password"] != "secret":
+            raise Exception("Invalid login credentials")
+        self.connecte = True
+        session = SimpleNamespace(access_token="a", refresh_token="r", expires_at=None)
+        return SimpleNamespace(user={"email": identifiants["email"]}, session=session)
+
+    def table(self, nom):
+        return SimpleNamespace(
+            select=lambda *args: _Requete(self, f"select:{nom}"),
+            update=lambda *args: _Requete(self, f"update:{nom}"),
+        )
+
+
+class _Requete:
+    def __init__(self, client: ClientConnexion, operation: str):
+        self.client = client
+        self.operation = operation
+        self._email = None
+
+    def eq(self, colonne, valeur):
+        if colonne == "email":
+            self._email = valeur
+        return self
+
+    def execute(self):
+        etat = "connecte" if self.client.connecte else "anonyme"
+        self.client.appels.append(f"{self.operation}:{etat}")
+        profil = self.client.profils.get(self._email)
+        return SimpleNamespace(data=[profil] if profil else [])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    auth.invalidate_profile_cache()
+    st.session_state.clear()
+    auth.init_session_state()
+    client = ClientConnexion({"a@x.fr": {"id": 1, "role": "analyste", "nom_complet": "A"}})
+    monkeypatch.setattr(auth, "get_supabase_client", lambda: client)
+    monkeypatch.setattr(auth, "log_action", lambda *args, **kwargs: None)
+    yield client
+    auth.invalidate_profile_cache()
+    st.session_state.clear()
+
+
+def test_echec_sans_lecture_de_profil(client):
+    succes, message, profil = auth.login("a@x.fr", "faux")
+    assert not succes and profil is None
+    assert client.appels == ["sign_in"]
+    assert not auth._cache_profils
+
+
+def test_profil_lu_apres_connexion_par_le_client_connecte(client):
+    succes, _, profil = auth.login("a@x.fr", "secret")
+    assert succes and profil["role"] == "analyste"
+    assert client.appels[:2] == ["sign_in", "select:users:connecte"]
+    assert "a@x.fr" in auth._cache_profils
+
+    # Connexion suivante : profil servi par le cache
+    client.appels.clear()
+    auth.login("a@x.fr", "secret")
+    assert "select:users:connecte" not in client.appels
+
+
+def test_compte_sans_profil_refuse_et_non_mis_en_cache(client):
+    succes, message, _ = auth.login("inconnu@x.fr", "secret")
+    assert not succes and "désactivé" in message
+    assert "sign_out" in client.appels
+    assert not auth._cache_profils
+
+
+class ErreurAuth(Exception):
+    """Erreur du service Auth (statut HTTP comme AuthApiError)."""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+@pytest.fixture
+def session(client, monkeypatch):
+    """Utilisateur connecté dont le jeton expire dans expire_dans secondes."""
+    rafraichissements = []
+    erreurs = []
+    monkeypatch.setattr(st, "error", erreurs.append)
+    monkeypatch.setattr(st, "rerun", lambda: rafraichissements.append("rerun"))
+
+    def installer(expire_dans, erreur=None):
+        def rafraichir(jeton):
+            rafraichissements.append(jeton)
+            if erreur:
+                raise erreur
+            nouvelle = SimpleNamespace(access_token="a2", refresh_token="r2",
+                                       expires_at=time.time() + 3600)
+            return SimpleNamespace(session=nouvelle)
+
+        client.auth.refresh_session = rafraichir
+        st.session_state.authenticated = True
+        st.session_state.auth_session = {
+            "access_token": "a", "refresh_token": "r",
+            "expires_at": None if expire_dans is None else time.time() + expire_dans,
+        }
+        return rafraichissements, erreurs
+    return installer
+
+
+def test_sans_expiration_connue_pas_de_rafraichissement(session):
+    rafraichissements, _ = session(None)
+    auth.refresh_session_if_needed()
+    assert rafraichissements == []
+
+
+def test_jeton_rafraichi_avant_expiration(session):
+    rafraichissements, _ = session(10)
+    auth.refresh_session_if_needed()
+    assert rafraichissements == ["r"]
+    assert st.session_state.auth_session["refresh_token"] == "r2"
+
+    auth.refresh_session_if_needed()
+    assert rafraichissements == ["r"]
+
+
+def test_jeton_refuse_deconnecte(session):
+    rafraichissements, _ = session(10, ErreurAuth("Invalid Refresh Token: Already Used", 400))
+    auth.refresh_session_if_needed()
+    assert rafraichissements == ["r", "rerun"]
+    assert not auth.is_authenticated()
+    assert st.session_state.auth_session is None
+    assert "expiré" in st.session_state.message_connexion
+
+
+def test_echec_transitoire_reessaye_apres_la_pause(session):
+    rafraichissements, erreurs = session(10, ErreurAuth("Service Unavailable", 503))
+    auth.refresh_session_if_needed()
+    auth.refresh_session_if_needed()
+    assert rafraichissements == ["r"]
+    assert len(erreurs) == 1 and erreurs[0].startswith("❌")
+    assert auth.is_authenticated()
+
+    # Pause écoulée
+    st.session_state.auth_rafraichir_apres -= auth.PAUSE_RAFRAICHISSEMENT_JWT + 1
+    auth.refresh_session_if_needed()
+    assert rafraichissements == ["r", "r"]
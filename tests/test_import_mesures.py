@@ -0,0 +1,125 @@
+"""
+Tests de l'import des mesures (data/import_mesures.py) : lecture, conversion
+des dates, validation et dédoublonnage, sans accès à la base
+"""
+
+import io
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from data.import_mesures import (
+    ERREURS_COLS,
+    colonnes_manquantes,
+    compter_lignes,
+    cles_inserees,
+    convertir_dates,
+    dedoublonner,
+    lire_par_blocs,
+    valider_bloc,
+)
+
+FICHIER_REFERENCE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "suivi_equipements_enrichi.csv"
+)
+
+ENTETE = "id_equipement;point_mesure;date;vitesse_rpm;twf_rms_g;crest_factor;twf_peak_to_peak_g\n"
+
+
+def _bloc(*lignes):
+    fichier = io.BytesIO((ENTETE + "".join(l + "\n" for l in lignes)).encode("utf-8"))
+    return next(lire_par_blocs(fichier, "mesures.csv"))
+
+
+# =============================================================================
+# DATES
+# =============================================================================
+
+def test_dates_iso_et_jour_en_premier():
+    dates = convertir_dates(pd.Series(
+        ["2024-03-05", "05/03/2024", "2024-03-05 08:30:00", "31/12/2023", "2024-12-31"],
+        dtype=object,
+    ))
+    assert dates.dt.strftime("%Y-%m-%d").tolist() == [
+        "2024-03-05", "2024-03-05", "2024-03-05", "2023-12-31", "2024-12-31",
+    ]
+
+
+def test_dates_excel_et_invalides():
+    dates = convertir_dates(pd.Series([datetime(2024, 3, 5), "32/01/2024", "", None, "x"], dtype=object))
+    assert dates.iloc[0] == pd.Timestamp("2024-03-05")
+    assert dates.iloc[1:].isna().all()
+
+
+def test_fichier_de_reference_sans_inversion():
+    df = pd.read_csv(FICHIER_REFERENCE, dtype=str)
+    assert (convertir_dates(df["date"]).dt.strftime("%Y-%m-%d") == df["date"]).all()
+
+
+# =============================================================================
+# LECTURE ET VALIDATION
+# =============================================================================
+
+def test_lecture_csv_point_virgule():
+    contenu = io.BytesIO((ENTETE + "E1;P1;2024-01-01;1500;0,5;3;1\n").encode("utf-8"))
+    assert compter_lignes(contenu, "mesures.csv") == 1
+    bloc = next(lire_par_blocs(contenu, "mesures.csv"))
+    assert colonnes_manquantes(bloc) == []
+    assert bloc.loc[0, "twf_rms_g"] == "0,5"
+
+
+def test_validation_par_regle():
+    bloc = _bloc(
+        "E1;P1;05/03/2024;1500;0,5;3;1",
+        "E9;P1;2024-03-05;1500;0.5;3;1",
+        ";P1;2024-03-05;1500;0.5;3;1",
+        "E1;;pas une date;abc;-1;3;1",
+    )
+    valides, erreurs = valider_bloc(bloc, frozenset({"E1"}), premiere_ligne=2)
+
+    assert valides["ligne"].tolist() == [2]
+    assert valides.loc[0, "date"] == "2024-03-05"
+    assert valides.loc[0, "twf_rms_g"] == 0.5
+
+    assert list(erreurs.columns) == ERREURS_COLS
+    par_ligne = dict(zip(erreurs["ligne"], erreurs["erreur"]))
+    assert par_ligne[3] == "Équipement inconnu du référentiel"
+    assert par_ligne[4] == "ID équipement manquant"
+    assert par_ligne[5].split("; ") == [
+        "Point de mesure manquant", "Date invalide",
+        "vitesse_rpm non numérique", "twf_rms_g négatif",
+    ]
+
+
+def test_dedoublonnage_base_et_fichier():
+    bloc = _bloc(
+        "E1;P1;2024-03-05;1500;0.5;3;1",
+        "E1;P1;2024-03-06;1500;0.5;3;1",
+        "E1;P1;06/03/2024;1500;0.5;3;1",
+    )
+    valides, _ = valider_bloc(bloc, {"E1"}, premiere_ligne=2)
+    cles_vues = {("E1", "P1", "2024-03-05")}
+
+    retenues, doublons = dedoublonner(valides, cles_vues)
+    assert retenues["ligne"].tolist() == [3]
+    assert doublons["ligne"].tolist() == [2, 4]
+    assert cles_vues == {("E1", "P1", "2024-03-05")}
+
+
+def test_cle_rejetee_par_la_base_non_retenue_comme_vue():
+    bloc = _bloc(
+        "E1;P1;2024-03-06;1500;0.5;3;1",
+        "E1;P1;2024-03-07;1500;0.5;3;1",
+    )
+    valides, _ = valider_bloc(bloc, {"E1"}, premiere_ligne=2)
+    retenues, _ = dedoublonner(valides, set())
+    echecs = pd.DataFrame({"erreur": ["rejetée"]}, index=retenues.index[:1])
+
+    cles_vues = cles_inserees(retenues, echecs)
+    assert cles_vues == {("E1", "P1", "2024-03-07")}
+
+    # Bloc suivant : la clé rejetée est de nouveau proposée à l'insertion
+    retenues, doublons = dedoublonner(valides, cles_vues)
+    assert retenues["ligne"].tolist() == [2]
+    assert doublons["ligne"].tolist() == [3]
@@ -0,0 +1,99 @@
+"""
+Tests de l'écriture par lots (data/data_manager.py) : UPSERT idempotents
+repris sur erreur transitoire, doublons rapportés, découpage des lots limité
+aux erreurs de ligne
+"""
+
+import pytest
+from postgrest.exceptions import APIError
+
+import data.data_manager as dm
+
+
+def _erreur(code: str, message: str = "erreur") -> APIError:
+    return APIError({"code": code, "message": message, "details": None, "hint": None})
+
+
+class ClientFactice:
+    """
+    Client minimal : enregistre les requêtes, rejette selon regle(lot) ; avec
+    ignore_duplicates, renvoie seulement les lignes dont la clé est nouvelle
+    """
+
+    def __init__(self, regle, existantes=()):
+        self.regle = regle
+        self.requetes = []
+        self.lignes = list(existantes)
+
+    def table(self, nom):
+        return self
+
+    def upsert(self, lot, on_conflict=None, ignore_duplicates=False):
+        self._courante = (list(lot), on_conflict.split(","), ignore_duplicates)
+        return self
+
+    def execute(self):
+        lot, cle, ignorer = self._courante
+        self.requetes.append(("upsert", len(lot)))
+        erreur = self.regle(lot)
+        if erreur:
+            raise erreur
+        cles = {tuple(l[c] for c in cle) for l in self.lignes}
+        ecrites = [l for l in lot if not (ignorer and tuple(l[c] for c in cle) in cles)]
+        self.lignes.extend(ecrites)
+        return type("Reponse", (), {"data": ecrites})()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def installer(regle, existantes=()):
+        client = ClientFactice(regle, existantes)
+        monkeypatch.setattr(dm, "_supabase_client", client)
+        monkeypatch.setattr(dm, "DELAI_REPRISE_INSERTION", 0)
+        return client
+    return installer
+
+
+def _lignes(n):
+    return [{"n": i} for i in range(n)]
+
+
+def test_insertion_reprise_sur_erreur_transitoire(client):
+    reponses = iter([TimeoutError("timed out"), _erreur("503"), None])
+    c = client(lambda lot: next(reponses))
+    echecs = dm._inserer_par_lots("t", _lignes(10), list(range(10)), "n", taille_lot=10,
+                                  ignorer_doublons=True)
+    assert c.requetes == [("upsert", 10)] * 3
+    assert echecs == []
+    assert len(c.lignes) == 10
+
+
+def test_insertion_abandonnee_apres_la_derniere_tentative(client):
+    c = client(lambda lot: _erreur("429", "too many requests"))
+    echecs = dm._inserer_par_lots("t", _lignes(4), list(range(4)), "n", taille_lot=4,
+                                  ignorer_doublons=True)
+    assert c.requetes == [("upsert", 4)] * dm.NB_TENTATIVES_INSERTION
+    assert len(echecs) == 4
+
+
+def test_lignes_existantes_rapportees_en_doublon(client):
+    c = client(lambda lot: None, existantes=[{"n": 2}, {"n": 5}])
+    echecs = dm._inserer_par_lots("t", _lignes(8), list("abcdefgh"), "n", taille_lot=4,
+                                  ignorer_doublons=True)
+    assert echecs == [("c", dm.MESSAGE_DOUBLON_LOT), ("f", dm.MESSAGE_DOUBLON_LOT)]
+    assert len(c.lignes) == 8
+
+
+def test_lot_coupe_sur_erreur_de_ligne(client):
+    c = client(lambda lot: _erreur("23502", "null value in column") if {"n": 5} in lot else None)
+    echecs = dm._inserer_par_lots("t", _lignes(8), list(range(8)), "n", taille_lot=8,
+                                  ignorer_doublons=True)
+    assert [i for i, _ in echecs] == [5]
+    assert len(c.lignes) == 7
+
+
+def test_lot_entier_en_echec_sans_decoupage(client):
+    c = client(lambda lot: _erreur("PGRST204", "colonne inconnue"))
+    echecs = dm._inserer_par_lots("t", _lignes(8), list(range(8)), "n", taille_lot=4)
+    assert c.requetes == [("upsert", 4), ("upsert", 4)]
+    assert len(echecs) == 8
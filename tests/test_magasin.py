@@ -0,0 +1,94 @@
+"""
+Tests du magasin partagé (data/magasin.py) : une lecture par version, vues
+copy-on-write, résultat non mémorisé si la table est invalidée pendant le
+chargement
+"""
+
+import pandas as pd
+import pytest
+
+from data import magasin
+
+
+@pytest.fixture(autouse=True)
+def magasin_vide(monkeypatch):
+    monkeypatch.setattr(magasin, "_entrees", {})
+    monkeypatch.setattr(magasin, "_versions", {})
+    monkeypatch.setattr(magasin, "_verrous_chargement", {})
+
+
+class Chargeur:
+    """Fonction de chargement comptant ses appels."""
+
+    def __init__(self, pendant=None):
+        self.nb_appels = 0
+        self.pendant = pendant
+
+    def __call__(self):
+        self.nb_appels += 1
+        if self.pendant:
+            self.pendant()
+        return pd.DataFrame({"id_equipement": ["E1", "E2"], "valeur": [1.0, 2.0]})
+
+
+def test_lecture_memorisee_jusqu_a_l_invalidation():
+    charger = Chargeur()
+    df1, version1 = magasin.lire("suivi_equipements", charger)
+    df2, version2 = magasin.lire("suivi_equipements", charger)
+
+    assert charger.nb_appels == 1
+    assert version1 == version2 == magasin.version("suivi_equipements")
+
+    magasin.invalider("suivi_equipements")
+    assert magasin.version("suivi_equipements") != version1
+
+    _, version3 = magasin.lire("suivi_equipements", charger)
+    assert charger.nb_appels == 2
+    assert version3 not in (None, version1)
+    assert version3 == magasin.version("suivi_equipements")
+
+
+def test_invalidation_ciblee():
+    charger = Chargeur()
+    _, version_suivi = magasin.lire("suivi_equipements", charger)
+    magasin.lire("observations", charger)
+
+    magasin.invalider("observations")
+    assert magasin.version("suivi_equipements") == version_suivi
+    magasin.lire("suivi_equipements", charger)
+    assert charger.nb_appels == 2
+
+
+def test_validite_ecoulee_relit_la_table():
+    charger = Chargeur()
+    _, version1 = magasin.lire("equipements", charger)
+    _, version2 = magasin.lire("equipements", charger, validite=0)
+
+    assert charger.nb_appels == 2
+    assert version2 != version1
+
+
+def test_vue_modifiee_sans_toucher_la_table_partagee():
+    charger = Chargeur()
+    df, _ = magasin.lire("suivi_equipements", charger)
+    df.loc[0, "valeur"] = 99.0
+    df["ajout"] = 1
+
+    df_partage, _ = magasin.lire("suivi_equipements", charger)
+    assert df_partage["valeur"].tolist() == [1.0, 2.0]
+    assert "ajout" not in df_partage.columns
+
+
+def test_invalidation_pendant_le_chargement_non_memorisee():
+    charger = Chargeur(pendant=lambda: magasin.invalider("suivi_equipements"))
+    df, version = magasin.lire("suivi_equipements", charger)
+
+    # Résultat servi, mais sans version ni mémorisation
+    assert df["id_equipement"].tolist() == ["E1", "E2"]
+    assert version is None
+    assert magasin.empreinte_memoire() == []
+
+    charger.pendant = None
+    _, version = magasin.lire("suivi_equipements", charger)
+    assert charger.nb_appels == 2
+    assert version == magasin.version("suivi_equipements")
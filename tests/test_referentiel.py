@@ -0,0 +1,65 @@
+"""
+Tests du référentiel des équipements (data/referentiel.py) : dictionnaires
+construits une fois par version et réutilisés entre les sessions
+"""
+
+import pandas as pd
+import pytest
+
+from data import referentiel
+from data.referentiel import Referentiel, pour_version
+
+
+@pytest.fixture(autouse=True)
+def sans_referentiel_courant(monkeypatch):
+    monkeypatch.setattr(referentiel, "_courant", None)
+
+
+@pytest.fixture
+def df_equipements() -> pd.DataFrame:
+    return pd.DataFrame({
+        "id_equipement": ["P-102", "C-201", "P-101", "V-301"],
+        "departement": ["Pompage", "Compression", "Pompage", "Ventilation"],
+    })
+
+
+def test_dictionnaires_du_referentiel(df_equipements):
+    ref = Referentiel(df_equipements, version=4)
+
+    assert ref.version == 4
+    assert ref.departement_de == {
+        "P-102": "Pompage", "C-201": "Compression", "P-101": "Pompage", "V-301": "Ventilation",
+    }
+    assert ref.equipements_par_departement == {
+        "Compression": ["C-201"], "Pompage": ["P-101", "P-102"], "Ventilation": ["V-301"],
+    }
+    assert ref.departements == ["Compression", "Pompage", "Ventilation"]
+    assert ref.ids == frozenset({"P-101", "P-102", "C-201", "V-301"})
+
+
+def test_equipements_par_departements(df_equipements):
+    ref = Referentiel(df_equipements)
+
+    assert ref.equipements() == ["C-201", "P-101", "P-102", "V-301"]
+    assert ref.equipements([]) == ref.equipements()
+    assert ref.equipements(["Ventilation", "Pompage"]) == ["P-101", "P-102", "V-301"]
+    assert ref.equipements(["Inconnu"]) == []
+
+
+def test_reutilise_pour_la_meme_version(df_equipements):
+    ref = pour_version(df_equipements, 7)
+
+    assert pour_version(df_equipements, 7) is ref
+    autre = pour_version(df_equipements, 8)
+    assert autre is not ref
+    assert pour_version(df_equipements, 8) is autre
+
+
+def test_sans_version_construit_sans_cache(df_equipements):
+    ref = pour_version(df_equipements, 7)
+
+    secours = pour_version(df_equipements.iloc[:1], None)
+    assert secours is not ref
+    assert secours.ids == frozenset({"P-102"})
+    # Le référentiel mémorisé reste celui de la version 7
+    assert pour_version(df_equipements, 7) is ref
@@ -0,0 +1,61 @@
+"""
+Tests du client surveillé (data/resilience.py) : fonctions SQL de lecture
+retentées sans invalidation, fonctions d'écriture invalidant tout
+"""
+
+import pytest
+
+from data import contexte, resilience
+
+
+class ClientRpc:
+    """Client dont l'appel rpc échoue nb_echecs fois avant de répondre."""
+
+    def __init__(self, nb_echecs: int = 0):
+        self.nb_echecs = nb_echecs
+        self.nb_appels = 0
+
+    def rpc(self, fonction, params):
+        return self
+
+    def execute(self):
+        self.nb_appels += 1
+        if self.nb_appels <= self.nb_echecs:
+            raise ConnectionError("connection reset")
+        return type("Reponse", (), {"data": [{"n": 1}]})()
+
+
+@pytest.fixture
+def invalidations(monkeypatch):
+    """Coupe-circuits remis à zéro, reprise immédiate ; invalidations relevées."""
+    monkeypatch.setattr(resilience, "_coupe_circuits", {})
+    monkeypatch.setattr(resilience, "DELAI_REPRISE_LECTURE", 0)
+    monkeypatch.setattr(resilience, "NB_TENTATIVES_LECTURE", 3)
+    monkeypatch.setattr(resilience, "SEUIL_ECHECS_TABLE", 3)
+    appels = []
+    monkeypatch.setattr(contexte, "invalider", lambda *tables: appels.append(tables))
+    return appels
+
+
+def test_rpc_de_lecture_retentee_sans_invalidation(invalidations):
+    client = ClientRpc(nb_echecs=1)
+    lignes = resilience.ClientSurveille(client).rpc("stats", {}, lecture=True).execute().data
+
+    assert lignes == [{"n": 1}]
+    assert client.nb_appels == 2
+    assert invalidations == []
+
+
+def test_rpc_d_ecriture_non_retentee(invalidations):
+    client = ClientRpc(nb_echecs=1)
+    with pytest.raises(ConnectionError):
+        resilience.ClientSurveille(client).rpc("supprimer", {"p_id": "E1"}).execute()
+
+    assert client.nb_appels == 1
+    assert invalidations == []
+
+
+def test_rpc_d_ecriture_invalide_toutes_les_tables(invalidations):
+    resilience.ClientSurveille(ClientRpc()).rpc("supprimer", {"p_id": "E1"}).execute()
+
+    assert invalidations == [()]
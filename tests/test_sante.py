@@ -0,0 +1,82 @@
+"""
+Tests de la sonde de santé (data/sante.py) : requête passée par le client
+surveillé, suspendue tant que le coupe-circuit de la table sondée est ouvert
+"""
+
+import pytest
+
+from data import resilience, sante
+
+
+class ClientSonde:
+    """Client dont chaque requête réussit, ou lève l'erreur fournie."""
+
+    def __init__(self, erreur=None):
+        self.erreur = erreur
+        self.nb_requetes = 0
+
+    def table(self, nom):
+        return self
+
+    def __getattr__(self, attribut):
+        # select / limit : chaîne de requête
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        self.nb_requetes += 1
+        if self.erreur:
+            raise self.erreur
+        return type("Reponse", (), {"data": [{"id_equipement": "E1"}]})()
+
+
+@pytest.fixture
+def sonde(monkeypatch):
+    """Installe un client factice ; coupe-circuits et statut remis à zéro."""
+    monkeypatch.setattr(resilience, "_coupe_circuits", {})
+    monkeypatch.setattr(resilience, "DELAI_REPRISE_LECTURE", 0)
+    monkeypatch.setattr(resilience, "NB_TENTATIVES_LECTURE", 3)
+    monkeypatch.setattr(resilience, "SEUIL_ECHECS_TABLE", 3)
+    monkeypatch.setattr(sante, "_etat", dict(sante._etat, statut=sante.INCONNU, echecs_consecutifs=0))
+
+    def installer(client):
+        monkeypatch.setattr(sante, "_client", resilience.ClientSurveille(client))
+        return client
+
+    return installer
+
+
+def test_sonde_reussie_signalee_par_le_client_surveille(sonde):
+    client = sonde(ClientSonde())
+    sante._sonde_en_cours = True
+    sante._sonder()
+
+    assert client.nb_requetes == 1
+    assert sante._etat["statut"] in (sante.OK, sante.LENT)
+    assert not sante._sonde_en_cours
+
+
+def test_echecs_repetes_ouvrent_le_coupe_circuit_de_la_table(sonde):
+    client = sonde(ClientSonde(ConnectionError("connection refused")))
+    sante._sonde_en_cours = True
+    sante._sonder()
+
+    # Lecture retentée jusqu'à l'ouverture du coupe-circuit de la table sondée
+    assert client.nb_requetes == resilience.SEUIL_ECHECS_TABLE
+    assert resilience.coupe_circuit(sante.TABLE_SONDE).est_ouvert()
+    assert sante._etat["statut"] == sante.INDISPONIBLE
+    assert sante.etat_sante()["coupe_circuit_ouvert"]
+
+    # Coupe-circuit ouvert : aucune nouvelle sonde lancée
+    sante.verifier_en_arriere_plan(forcer=True)
+    assert not sante._sonde_en_cours
+    assert client.nb_requetes == resilience.SEUIL_ECHECS_TABLE
+
+
+def test_erreur_applicative_signalee_par_la_sonde(sonde):
+    sonde(ClientSonde(ValueError("colonne inconnue")))
+    sante._sonde_en_cours = True
+    sante._sonder()
+
+    assert sante._etat["statut"] == sante.INDISPONIBLE
+    assert sante._etat["message"] == "colonne inconnue"
+    assert not resilience.coupe_circuit(sante.TABLE_SONDE).est_ouvert()
@@ -0,0 +1,170 @@
+"""
+Tests des statistiques descriptives (data/statistiques.py) et de l'extraction
+des séries de suivi (data/series.py)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data import statistiques
+from data.series import dernieres_valeurs, extraire_series, filtrer_periode
+from data.statistiques import (
+    calculer_kde,
+    calculer_statistiques,
+    densite_serie,
+    largeur_bande_scott,
+    statistiques_serie,
+)
+
+
+@pytest.fixture(autouse=True)
+def cache_vide():
+    statistiques.vider_cache_statistiques()
+    yield
+    statistiques.vider_cache_statistiques()
+
+
+# =============================================================================
+# CALCUL EN UNE PASSE
+# =============================================================================
+
+def test_statistiques_identiques_a_pandas():
+    rng = np.random.default_rng(0)
+    serie = pd.Series(rng.normal(1500, 40, 5000))
+    serie[::97] = np.nan
+
+    calc = calculer_statistiques(serie)
+    attendu = serie.dropna()
+
+    assert calc["n"] == attendu.size
+    assert calc["moyenne"] == pytest.approx(attendu.mean())
+    assert calc["mediane"] == pytest.approx(attendu.median())
+    assert calc["variance"] == pytest.approx(attendu.var())
+    assert calc["ecart_type"] == pytest.approx(attendu.std())
+    assert calc["rms"] == pytest.approx(np.sqrt((attendu ** 2).mean()))
+    assert calc["min"] == attendu.min() and calc["max"] == attendu.max()
+    for q, valeur in calc["quantiles"].items():
+        assert valeur == pytest.approx(attendu.quantile(q))
+
+
+def test_statistiques_serie_vide_ou_unique():
+    assert calculer_statistiques([np.nan, np.nan]) == {"n": 0}
+    calc = calculer_statistiques([3.0])
+    assert calc["n"] == 1 and calc["moyenne"] == 3.0 and np.isnan(calc["variance"])
+
+
+# =============================================================================
+# MÉMORISATION PAR VERSION DE TABLE
+# =============================================================================
+
+def test_memorisation_par_version():
+    serie = pd.Series([1.0, 2.0, 3.0])
+    premier = statistiques_serie(serie, ("E1", "P1", "v"), "toutes", version=1)
+
+    # Même version : résultat mémorisé, la série n'est pas relue
+    assert statistiques_serie(pd.Series([9.0]), ("E1", "P1", "v"), "toutes", version=1) is premier
+
+    # Nouvelle version de la table : recalcul
+    assert statistiques_serie(pd.Series([9.0]), ("E1", "P1", "v"), "toutes", version=2)["n"] == 1
+
+
+def test_sans_version_calcul_direct():
+    serie = pd.Series([1.0, 2.0, 3.0])
+    statistiques_serie(serie, ("E1", "P1", "v"), version=None)
+    assert statistiques_serie(pd.Series([5.0]), ("E1", "P1", "v"), version=None)["n"] == 1
+    assert not statistiques._cache_stats
+
+
+# =============================================================================
+# DENSITÉ (KDE)
+# =============================================================================
+
+def _kde_directe(x_eval, x, h):
+    ecarts = (x_eval[:, None] - x[None, :]) / h
+    return np.exp(-0.5 * ecarts ** 2).sum(axis=1) / (x.size * h * np.sqrt(2 * np.pi))
+
+
+def test_kde_identique_a_l_evaluation_directe():
+    x = np.random.default_rng(4).normal(10, 2, 3000)
+    x_eval, densite = calculer_kde(x)
+    attendu = _kde_directe(x_eval, x, largeur_bande_scott(x))
+    assert np.abs(densite - attendu).max() < 1e-3 * attendu.max()
+    assert np.trapezoid(densite, x_eval) == pytest.approx(1, abs=0.01)
+
+
+def test_kde_etendue_large_reste_echantillonnee():
+    # Étendue de 400 largeurs de bande × 10 : grille agrandie au-delà de 1024 nœuds
+    rng = np.random.default_rng(5)
+    x = np.concatenate([rng.normal(0, 1, 3000), [400.0]])
+    x_eval, densite = calculer_kde(x, largeur_bande=0.1)
+    attendu = _kde_directe(x_eval, x, 0.1)
+    assert np.abs(densite - attendu).max() < 1e-2 * attendu.max()
+
+
+def test_kde_valeurs_aberrantes_grille_restreinte():
+    rng = np.random.default_rng(6)
+    x = np.concatenate([rng.normal(0, 1, 3000), [1e5, 2e5]])
+    x_eval, densite = calculer_kde(x, largeur_bande=0.1)
+    assert x_eval.max() < 10
+    assert np.trapezoid(densite, x_eval) == pytest.approx(0.99, abs=0.01)
+    attendu = _kde_directe(x_eval, x, 0.1)
+    assert np.abs(densite - attendu).max() < 1e-2 * attendu.max()
+
+
+def test_kde_non_definie():
+    assert calculer_kde([1.0]) is None
+    assert calculer_kde([2.0, 2.0, 2.0]) is None
+
+
+def test_densite_memorisee_par_version():
+    serie = pd.Series(np.random.default_rng(7).normal(0, 1, 500))
+    premiere = densite_serie(serie, ("E1", "P1", "v"), "toutes", version=1)
+    assert densite_serie(serie, ("E1", "P1", "v"), "toutes", version=1) is premiere
+
+
+# =============================================================================
+# EXTRACTION DES SÉRIES
+# =============================================================================
+
+@pytest.fixture
+def df_suivi():
+    return pd.DataFrame({
+        "id_equipement": ["E1", "E1", "E1", "E2", "E2", "E3"],
+        "point_mesure": ["P1", "P1", "P2", "P1", "P1", "P1"],
+        "date": ["2024-01-01", "2024-01-08", "2024-01-01", "2024-01-01", "2024-01-01", "2024-01-15"],
+        "vitesse_rpm": [1500.0, 1510.0, 900.0, np.nan, 1200.0, 1000.0],
+        "twf_rms_g": [0.5, 0.6, 0.2, 0.3, 0.4, 0.1],
+    })
+
+
+def test_extraction_alignee(df_suivi):
+    large = extraire_series(df_suivi, [("E1", "P1"), ("E2", "P1")], ["vitesse_rpm", "twf_rms_g"])
+
+    assert list(large.columns.names) == ["id_equipement", "point_mesure", "variable"]
+    assert set(large.columns.droplevel("variable")) == {("E1", "P1"), ("E2", "P1")}
+    assert list(large.index) == [pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-08")]
+    assert large[("E1", "P1", "vitesse_rpm")].tolist() == [1500.0, 1510.0]
+    # Doublon de date : première valeur renseignée de chaque variable
+    assert large.loc["2024-01-01", ("E2", "P1", "vitesse_rpm")] == 1200.0
+    assert large.loc["2024-01-01", ("E2", "P1", "twf_rms_g")] == 0.3
+
+
+def test_extraction_reechantillonnee(df_suivi):
+    large = extraire_series(df_suivi, [("E1", "P1")], ["vitesse_rpm"], frequence="MS")
+    assert large[("E1", "P1", "vitesse_rpm")].tolist() == [1505.0]
+
+
+def test_extraction_vide(df_suivi):
+    assert extraire_series(df_suivi, [("E9", "P1")], ["vitesse_rpm"]).empty
+    assert extraire_series(df_suivi.iloc[:0], [("E1", "P1")]).empty
+
+
+def test_fenetres(df_suivi):
+    large = extraire_series(df_suivi, [("E1", "P1"), ("E3", "P1")], ["vitesse_rpm"])
+    assert len(filtrer_periode(large, pd.Timestamp("2024-01-08").date(),
+                               pd.Timestamp("2024-01-15").date())) == 2
+
+    derniere = dernieres_valeurs(large, 1)
+    assert derniere[("E1", "P1", "vitesse_rpm")].dropna().tolist() == [1510.0]
+    assert derniere[("E3", "P1", "vitesse_rpm")].dropna().tolist() == [1000.0]
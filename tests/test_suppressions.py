@@ -0,0 +1,121 @@
+"""
+Tests des suppressions (data/data_manager.py) : repli sur les requêtes de
+table seulement si la fonction SQL est absente, agrégats invalidés même
+après une erreur en cours de sélection
+"""
+
+import pandas as pd
+import pytest
+from postgrest.exceptions import APIError
+
+import data.data_manager as dm
+from data.resilience import est_objet_absent
+
+
+def _erreur(code: str, message: str) -> APIError:
+    return APIError({"code": code, "message": message, "details": None, "hint": None})
+
+
+class ClientRpc:
+    """Client dont l'appel rpc lève l'erreur fournie ; les tables sont vides."""
+
+    def __init__(self, erreur):
+        self.erreur = erreur
+        self.tables = []
+
+    def rpc(self, fonction, params):
+        return self
+
+    def table(self, nom):
+        self.tables.append(nom)
+        return self
+
+    def __getattr__(self, attribut):
+        # select / eq / limit / delete : chaîne de requête
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        if self.erreur and not self.tables:
+            raise self.erreur
+        return type("Reponse", (), {"data": [], "count": 0})()
+
+
+@pytest.fixture(autouse=True)
+def rpc_disponible(monkeypatch):
+    monkeypatch.setattr(dm, "_rpc_suppression_cascade", True)
+
+
+def test_codes_objet_absent():
+    assert est_objet_absent(_erreur("PGRST202", "Could not find the function"))
+    assert est_objet_absent(_erreur("PGRST205", "Could not find the table"))
+    assert not est_objet_absent(_erreur("57014", "canceling statement due to statement timeout"))
+    assert not est_objet_absent(TimeoutError("supprimer_equipement_cascade"))
+
+
+def test_erreur_de_la_fonction_ne_desactive_pas_l_appel(monkeypatch):
+    client = ClientRpc(_erreur("57014", "supprimer_equipement_cascade: statement timeout"))
+    monkeypatch.setattr(dm, "_supabase_client", client)
+
+    succes, message = dm.supprimer_equipement("E1")
+
+    assert not succes and "timeout" in message
+    assert dm._rpc_suppression_cascade
+    assert client.tables == []
+
+
+def test_fonction_absente_repli_sur_les_tables(monkeypatch):
+    client = ClientRpc(_erreur("PGRST202", "Could not find the function supprimer_equipement_cascade"))
+    monkeypatch.setattr(dm, "_supabase_client", client)
+
+    dm.supprimer_equipement("E1")
+
+    assert not dm._rpc_suppression_cascade
+    assert client.tables == ["observations", "suivi_equipements", "equipements"]
+
+
+class ClientSuppression:
+    """Client dont la suppression numéro echec (1 = première) échoue."""
+
+    def __init__(self, echec: int):
+        self.echec = echec
+        self.nb_suppressions = 0
+
+    def table(self, nom):
+        return self
+
+    def __getattr__(self, attribut):
+        # delete / eq / in_ : chaîne de requête
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        self.nb_suppressions += 1
+        if self.nb_suppressions == self.echec:
+            raise ConnectionError("connection reset")
+        return type("Reponse", (), {"data": [{"id": self.nb_suppressions}]})()
+
+
+def test_selection_interrompue_invalide_les_groupes_supprimes(monkeypatch):
+    monkeypatch.setattr(dm, "_supabase_client", ClientSuppression(echec=3))
+    invalides = []
+    monkeypatch.setattr(dm, "invalider_mesure", invalides.append)
+    cles = pd.DataFrame({
+        "id_equipement": ["E1", "E2", "E3"],
+        "point_mesure": ["P1", "P1", "P1"],
+        "date": ["2024-01-01"] * 3,
+    })
+
+    succes, message = dm.supprimer_suivis_selection(cles)
+
+    assert not succes and "2 suivi(s) supprimé(s) avant l'erreur" in message
+    assert sorted(invalides) == ["E1", "E2", "E3"]
+
+
+def test_periode_en_erreur_invalide_l_equipement(monkeypatch):
+    monkeypatch.setattr(dm, "_supabase_client", ClientSuppression(echec=1))
+    invalides = []
+    monkeypatch.setattr(dm, "invalider_mesure", invalides.append)
+
+    succes, _ = dm.supprimer_suivis_periode("E1", "2024-01-01", "2024-12-31")
+
+    assert not succes
+    assert invalides == ["E1"]
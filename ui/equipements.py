@@ -6,21 +6,23 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from data.data_manager import (
-    charger_equipements,
     sauvegarder_equipement,
     exporter_equipements_excel
 )
+from data.contexte import ContexteDonnees
+from auth.auth import widget_permission
+from auth.permissions import Permission
 
 
 
-def render():
+def render(ctx: ContexteDonnees):
     """Affiche l'onglet Équipements"""
 
     st.header("📦 Référentiel des Équipements")
     st.caption("Visualisation, ajout et export des équipements par département")
 
     # Chargement données
-    df_equipements = charger_equipements()
+    df_equipements = ctx.equipements()
 
     if df_equipements.empty:
         st.warning("⚠️ Aucun équipement trouvé dans le système")
@@ -87,7 +89,8 @@ def render():
                 submitted = st.form_submit_button(
                     "✅ Ajouter",
                     type="primary",
-                    use_container_width=True
+                    use_container_width=True,
+                    **widget_permission(Permission.AJOUTER_EQUIPEMENTS)
                 )
 
             # Validation et enregistrement
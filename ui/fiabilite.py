@@ -24,7 +24,11 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 from datetime import datetime, date
-from data.data_manager import charger_equipements, charger_suivi
+from data.contexte import ContexteDonnees
+from data.statistiques import statistiques_serie, densite_serie
+from data.agregats import SEUIL_AGREGATS, statistiques_periode
+from data.instrumentation import instrumenter
+from ui.graphiques import construire_figure
 import io
 
 
@@ -137,7 +141,8 @@ def _get_date_min_equipement(df_suivi: pd.DataFrame, id_equip: str) -> date:
 # =============================================================================
 # FILTRES GLOBAUX — 3 FILTRES SEULEMENT (Dept | Équip | Point de mesure)
 # Le paramètre N'EST PLUS un filtre global.
-# Résultats stockés dans session_state pour partage entre les 3 onglets.
+# Le DataFrame filtré est transmis aux 3 onglets (jamais stocké en session :
+# la mémoire d'une session reste proportionnelle à sa sélection).
 # =============================================================================
 
 def render_filtres_globaux(df_equipements: pd.DataFrame, df_suivi: pd.DataFrame):
@@ -146,8 +151,12 @@ def render_filtres_globaux(df_equipements: pd.DataFrame, df_suivi: pd.DataFrame)
         fiab_departement   → département sélectionné
         fiab_equipement    → ID équipement sélectionné
         fiab_point_mesure  → point de mesure sélectionné
-        fiab_df_filtered   → DataFrame filtré (toutes colonnes, toutes variables)
+        fiab_cols_variables → paramètres disponibles
         fiab_selection_ok  → True si des données existent pour la sélection
+
+    Returns:
+        DataFrame filtré (toutes colonnes, toutes variables), None si la
+        sélection est incomplète
     """
     with st.container(border=True):
         st.markdown("#### 🔍 Sélection de l'équipement")
@@ -176,7 +185,7 @@ def render_filtres_globaux(df_equipements: pd.DataFrame, df_suivi: pd.DataFrame)
             if not equips_valides:
                 st.selectbox("2️⃣ ID Équipement", ["— aucun —"], key="fiab_equipement")
                 st.session_state["fiab_selection_ok"] = False
-                return
+                return None
             eq_idx = 0
             if st.session_state.get("fiab_equipement") in equips_valides:
                 eq_idx = equips_valides.index(st.session_state["fiab_equipement"])
@@ -193,7 +202,7 @@ def render_filtres_globaux(df_equipements: pd.DataFrame, df_suivi: pd.DataFrame)
             if not points:
                 st.selectbox("3️⃣ Point de mesure", ["— aucun —"], key="fiab_point_mesure")
                 st.session_state["fiab_selection_ok"] = False
-                return
+                return None
             pm_idx = 0
             if st.session_state.get("fiab_point_mesure") in points:
                 pm_idx = points.index(st.session_state["fiab_point_mesure"])
@@ -203,20 +212,23 @@ def render_filtres_globaux(df_equipements: pd.DataFrame, df_suivi: pd.DataFrame)
             )
 
     # ── DataFrame filtré (toutes les colonnes — toutes variables) ─────────────
-    df_filtered = df_equip[df_equip["point_mesure"] == point_mesure].copy()
-    df_filtered["date"] = pd.to_datetime(df_filtered["date"], errors="coerce")
-    df_filtered = df_filtered.sort_values("date")
+    # (assign renvoie un nouveau DataFrame : la table partagée n'est pas modifiée)
+    df_filtered = df_equip[df_equip["point_mesure"] == point_mesure]
+    df_filtered = df_filtered.assign(
+        date=pd.to_datetime(df_filtered["date"], errors="coerce")
+    ).sort_values("date")
 
     # Garder seulement les colonnes qui existent réellement dans df_suivi
     cols_variables = [c for c in VARIABLES_DISPONIBLES.keys() if c in df_filtered.columns]
 
-    st.session_state["fiab_df_filtered"]   = df_filtered
     st.session_state["fiab_cols_variables"] = cols_variables   # paramètres disponibles
     st.session_state["fiab_selection_ok"]  = not df_filtered.empty
 
     if df_filtered.empty:
         st.warning("⚠️ Aucune donnée pour cette sélection.")
 
+    return df_filtered
+
 
 # =============================================================================
 # SECTION — INTERVALLES DE FONCTIONNEMENT
@@ -420,6 +432,7 @@ def render_courbe_fiabilite(lam: float, mtbf_h: float):
 # SECTION — GRAPHIQUE TENDANCE D'UN PARAMÈTRE (utilisé par Visualisation)
 # =============================================================================
 
+@instrumenter()
 def _fig_tendance(df_plot: pd.DataFrame, parametre: str,
                   param_label: str, id_equip: str, point_mesure: str) -> go.Figure:
     """
@@ -427,47 +440,56 @@ def _fig_tendance(df_plot: pd.DataFrame, parametre: str,
     un paramètre donné : données brutes + tendance linéaire + moyenne mobile 5 pts.
     """
     couleur = COULEURS_PARAMETRES.get(parametre, "#2980b9")
-    fig     = go.Figure()
-
-    fig.add_trace(go.Scatter(
+    traces  = [dict(
         x=df_plot["date"], y=df_plot[parametre],
         mode="lines+markers", name=param_label,
         line=dict(color=couleur, width=2), marker=dict(size=5)
-    ))
+    )]
 
     if len(df_plot) >= 3:
         x_num  = (df_plot["date"] - df_plot["date"].min()).dt.days.values
         coeffs = np.polyfit(x_num, df_plot[parametre].values, 1)
-        fig.add_trace(go.Scatter(
+        traces.append(dict(
             x=df_plot["date"], y=np.polyval(coeffs, x_num),
             mode="lines", name="Tendance linéaire",
             line=dict(color="#e74c3c", width=2, dash="dash")
         ))
 
     if len(df_plot) >= 5:
-        fig.add_trace(go.Scatter(
+        traces.append(dict(
             x=df_plot["date"],
             y=df_plot[parametre].rolling(5, center=True).mean(),
             mode="lines", name="Moyenne mobile (5 pts)",
             line=dict(color="#2ecc71", width=2, dash="dot")
         ))
 
-    fig.update_layout(
+    # Toutes les traces envoyées en un seul bloc (WebGL si série dense)
+    fig = construire_figure(traces, layout=dict(
         title=f"📊 {param_label} — {id_equip} | {point_mesure}",
         xaxis_title="Date", yaxis_title=param_label,
         hovermode="x unified", height=380,
         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-    )
+    ))
     return fig
 
 
+def _cle_serie(parametre: str) -> tuple:
+    """Identifiant (équipement, point de mesure, paramètre) de la série affichée."""
+    return (
+        st.session_state.get("fiab_equipement"),
+        st.session_state.get("fiab_point_mesure"),
+        parametre,
+    )
+
+
 # =============================================================================
 # SECTION — ANALYSE DÉTAILLÉE (histogramme + boxplot + KDE + stats)
 # IMPORTANT : utilise TOUTES les données (sans filtre de plage)
 # =============================================================================
 
 def render_analyse_detaillee(df_complet: pd.DataFrame, parametre: str,
-                              param_label: str, prefix: str):
+                              param_label: str, prefix: str, fenetre=None,
+                              version=None):
     """
     Affiche l'analyse statistique complète d'un paramètre sur TOUTES les données
     disponibles (sans filtre de plage de valeurs).
@@ -478,25 +500,27 @@ def render_analyse_detaillee(df_complet: pd.DataFrame, parametre: str,
         parametre  : clé de la colonne (ex. "vitesse_rpm")
         param_label: label humain (ex. "Vitesse (RPM)")
         prefix     : préfixe unique pour les keys Plotly (ex. "vitesse_rpm")
+        fenetre    : description hashable de la fenêtre affichée (cache des stats)
+        version    : version de la table suivi_equipements (cache des stats)
     """
     serie = df_complet[parametre].dropna()
     if serie.empty:
         st.warning(f"⚠️ Aucune donnée pour {param_label}.")
         return
 
-    # ── Tableau de statistiques ───────────────────────────────────────────────
-    rms_val = float(np.sqrt(np.mean(serie ** 2)))
-    stats   = {
-        "Moyenne":           float(serie.mean()),
-        "Médiane":           float(serie.median()),
-        "Min":               float(serie.min()),
-        "Max":               float(serie.max()),
-        "Écart-type (σ)":    float(serie.std()),
-        "Variance (σ²)":     float(serie.var()),
-        "RMS":               rms_val,
-        "P25 (Q1)":          float(serie.quantile(0.25)),
-        "P75 (Q3)":          float(serie.quantile(0.75)),
-        "Nombre de mesures": len(serie),
+    # ── Tableau de statistiques (une passe, mémorisé) ─────────────────────────
+    calc  = statistiques_serie(serie, _cle_serie(parametre), fenetre, version)
+    stats = {
+        "Moyenne":           calc["moyenne"],
+        "Médiane":           calc["mediane"],
+        "Min":               calc["min"],
+        "Max":               calc["max"],
+        "Écart-type (σ)":    calc["ecart_type"],
+        "Variance (σ²)":     calc["variance"],
+        "RMS":               calc["rms"],
+        "P25 (Q1)":          calc["quantiles"][0.25],
+        "P75 (Q3)":          calc["quantiles"][0.75],
+        "Nombre de mesures": calc["n"],
     }
     col_stat, col_box = st.columns([1, 1])
 
@@ -531,11 +555,11 @@ def render_analyse_detaillee(df_complet: pd.DataFrame, parametre: str,
         marker_line=dict(color="#2980b9", width=1),
         opacity=0.85, name=param_label
     ))
-    fig_histo.add_vline(x=float(serie.mean()), line_dash="dash", line_color="#e74c3c",
-                        annotation_text=f"Moy={serie.mean():.3f}",
+    fig_histo.add_vline(x=calc["moyenne"], line_dash="dash", line_color="#e74c3c",
+                        annotation_text=f"Moy={calc['moyenne']:.3f}",
                         annotation_position="top right")
-    fig_histo.add_vline(x=float(serie.median()), line_dash="dot", line_color="#f39c12",
-                        annotation_text=f"Méd={serie.median():.3f}",
+    fig_histo.add_vline(x=calc["mediane"], line_dash="dot", line_color="#f39c12",
+                        annotation_text=f"Méd={calc['mediane']:.3f}",
                         annotation_position="top left")
     fig_histo.update_layout(
         title=f"📊 Distribution — {param_label}",
@@ -545,18 +569,17 @@ def render_analyse_detaillee(df_complet: pd.DataFrame, parametre: str,
     st.plotly_chart(fig_histo, use_container_width=True,
                     key=f"fiab_detail_{prefix}_histo")
 
-    # ── Densité KDE (optionnel — scipy) ──────────────────────────────────────
-    try:
-        from scipy.stats import gaussian_kde  # type: ignore
-        kde   = gaussian_kde(serie)
-        x_kde = np.linspace(float(serie.min()), float(serie.max()), 300)
+    # ── Densité KDE (binning + FFT, mémorisée) ───────────────────────────────
+    kde = densite_serie(serie, _cle_serie(parametre), fenetre, version)
+    if kde is not None:
+        x_kde, y_kde = kde
         fig_kde = go.Figure()
         fig_kde.add_trace(go.Scatter(
-            x=x_kde, y=kde(x_kde),
+            x=x_kde, y=y_kde,
             fill="tozeroy", fillcolor="rgba(46,204,113,0.2)",
             line=dict(color="#2ecc71", width=2.5), name="Densité KDE"
         ))
-        fig_kde.add_vline(x=float(serie.mean()), line_dash="dash",
+        fig_kde.add_vline(x=calc["moyenne"], line_dash="dash",
                           line_color="#e74c3c",
                           annotation_text="Moyenne",
                           annotation_position="top right")
@@ -566,36 +589,43 @@ def render_analyse_detaillee(df_complet: pd.DataFrame, parametre: str,
         )
         st.plotly_chart(fig_kde, use_container_width=True,
                         key=f"fiab_detail_{prefix}_kde")
-    except Exception:
-        pass  # scipy absent → ignoré silencieusement
 
 
 # =============================================================================
 # SECTION — STATISTIQUES DESCRIPTIVES (onglet 3)
 # =============================================================================
 
-def render_statistiques(df: pd.DataFrame, parametre: str, param_label: str):
-    """Tableau de statistiques descriptives du paramètre (onglet Stats)."""
-    serie = df[parametre].dropna()
-    if serie.empty:
+def render_statistiques(df: pd.DataFrame, parametre: str, param_label: str,
+                        fenetre=None, calc: dict = None, version=None):
+    """
+    Tableau de statistiques descriptives du paramètre (onglet Stats).
+    `calc` permet de fournir des statistiques déjà calculées (agrégats) ;
+    `version` est celle de la table suivi_equipements (cache des stats).
+    """
+    if calc is None:
+        serie = df[parametre].dropna()
+        if serie.empty:
+            st.warning("⚠️ Aucune donnée disponible pour ce paramètre.")
+            return
+        calc = statistiques_serie(serie, _cle_serie(parametre), fenetre, version)
+    elif calc["n"] == 0:
         st.warning("⚠️ Aucune donnée disponible pour ce paramètre.")
         return
 
-    rms_val = float(np.sqrt(np.mean(serie ** 2)))
-    stats   = {
-        "Moyenne":           float(serie.mean()),
-        "Médiane":           float(serie.median()),
-        "Min":               float(serie.min()),
-        "Max":               float(serie.max()),
-        "Écart-type (σ)":    float(serie.std()),
-        "Variance (σ²)":     float(serie.var()),
-        "RMS":               rms_val,
-        "P10":               float(serie.quantile(0.10)),
-        "P25 (Q1)":          float(serie.quantile(0.25)),
-        "P75 (Q3)":          float(serie.quantile(0.75)),
-        "P90":               float(serie.quantile(0.90)),
-        "Plage (max−min)":   float(serie.max() - serie.min()),
-        "Nombre de mesures": len(serie),
+    stats = {
+        "Moyenne":           calc["moyenne"],
+        "Médiane":           calc["mediane"],
+        "Min":               calc["min"],
+        "Max":               calc["max"],
+        "Écart-type (σ)":    calc["ecart_type"],
+        "Variance (σ²)":     calc["variance"],
+        "RMS":               calc["rms"],
+        "P10":               calc["quantiles"][0.10],
+        "P25 (Q1)":          calc["quantiles"][0.25],
+        "P75 (Q3)":          calc["quantiles"][0.75],
+        "P90":               calc["quantiles"][0.90],
+        "Plage (max−min)":   calc["plage"],
+        "Nombre de mesures": calc["n"],
     }
     df_stats = pd.DataFrame([
         {"Indicateur": k,
@@ -603,6 +633,8 @@ def render_statistiques(df: pd.DataFrame, parametre: str, param_label: str):
         for k, v in stats.items()
     ])
     st.dataframe(df_stats, use_container_width=True, hide_index=True)
+    if calc.get("approche"):
+        st.caption("ℹ️ Quantiles estimés à partir des agrégats pré-calculés (t-digest).")
 
 
 # =============================================================================
@@ -755,7 +787,7 @@ def render_exports(df: pd.DataFrame, parametre: str, param_label: str,
 # ONGLET 1 — CALCUL MTBF & FIABILITÉ  (inchangé dans sa logique)
 # =============================================================================
 
-def render_tab_mtbf():
+def render_tab_mtbf(ctx: ContexteDonnees, df_filtered: pd.DataFrame):
     """
     Onglet MTBF & Fiabilité.
     - Lit département/équipement/point_mesure depuis session_state.
@@ -768,7 +800,6 @@ def render_tab_mtbf():
         st.info("ℹ️ Sélectionnez un équipement dans les filtres ci-dessus.")
         return
 
-    df_filtered   = st.session_state["fiab_df_filtered"]
     id_equip      = st.session_state["fiab_equipement"]
     point_mesure  = st.session_state["fiab_point_mesure"]
     cols_variables = st.session_state.get("fiab_cols_variables", [])
@@ -777,9 +808,8 @@ def render_tab_mtbf():
     param_ref   = cols_variables[0] if cols_variables else "vitesse_rpm"
     label_ref   = VARIABLES_DISPONIBLES.get(param_ref, param_ref)
 
-    # Date min dynamique
-    df_suivi_global = st.session_state.get("fiab_df_suivi_global", pd.DataFrame())
-    date_min        = _get_date_min_equipement(df_suivi_global, id_equip)
+    # Date min dynamique (suivi complet, déjà lu pendant cette exécution)
+    date_min        = _get_date_min_equipement(ctx.suivi(), id_equip)
 
     # ── Intervalles ───────────────────────────────────────────────────────────
     with st.container(border=True):
@@ -931,16 +961,17 @@ def render_tab_mtbf():
 #          sur TOUTES les données (sans filtre de plage)
 # =============================================================================
 
-def render_tab_tendances():
+def render_tab_tendances(df_filtered: pd.DataFrame, version=None):
     """
     Onglet Visualisation des tendances.
     Affiche tous les paramètres disponibles en graphiques empilés.
+    `version` : version de la table suivi_equipements (cache des stats).
     """
     if not st.session_state.get("fiab_selection_ok", False):
         st.info("ℹ️ Sélectionnez un équipement dans les filtres ci-dessus.")
         return
 
-    df_complet    = st.session_state["fiab_df_filtered"].copy()  # données COMPLÈTES
+    df_complet    = df_filtered  # données COMPLÈTES
     id_equip      = st.session_state["fiab_equipement"]
     point_mesure  = st.session_state["fiab_point_mesure"]
     cols_variables = st.session_state.get("fiab_cols_variables", [])
@@ -961,7 +992,7 @@ def render_tab_tendances():
                 horizontal=True, key="fiab_tend_mode"
             )
 
-        df_temp = df_complet.copy()
+        df_temp = df_complet
 
         if mode == "Période personnalisée":
             with col_o2:
@@ -1001,7 +1032,7 @@ def render_tab_tendances():
             value=False, key="fiab_tend_filtre_val"
         )
 
-        df_plot = df_temp.copy()   # sera filtré si activer_filtre = True
+        df_plot = df_temp   # sera filtré si activer_filtre = True
 
         if activer_filtre and not df_temp.empty:
             col_ref, col_vmin, col_vmax = st.columns(3)
@@ -1033,7 +1064,7 @@ def render_tab_tendances():
             df_plot = df_temp[
                 (df_temp[param_ref_filtre] >= val_min) &
                 (df_temp[param_ref_filtre] <= val_max)
-            ].copy()
+            ]
 
             n_avant  = len(df_temp)
             n_apres  = len(df_plot)
@@ -1100,7 +1131,9 @@ def render_tab_tendances():
                 df_complet_param = df_complet[["date", parametre]].dropna()
                 render_analyse_detaillee(
                     df_complet_param, parametre, param_label,
-                    prefix=parametre   # ex. "vitesse_rpm" → keys uniques garanties
+                    prefix=parametre,   # ex. "vitesse_rpm" → keys uniques garanties
+                    fenetre="toutes",
+                    version=version
                 )
 
 
@@ -1110,16 +1143,19 @@ def render_tab_tendances():
 # (car le paramètre n'est plus dans les filtres globaux)
 # =============================================================================
 
-def render_tab_stats():
+def render_tab_stats(df_filtered: pd.DataFrame, version=None):
     """
     Onglet Statistiques descriptives.
     Permet de choisir le paramètre localement (selectbox dans l'onglet).
+    `version` : version de la table suivi_equipements (cache des stats).
     """
     if not st.session_state.get("fiab_selection_ok", False):
         st.info("ℹ️ Sélectionnez un équipement dans les filtres ci-dessus.")
         return
 
-    df_base       = st.session_state["fiab_df_filtered"].copy()
+    # Copie superficielle : la conversion de "date" ci-dessous ne touche pas
+    # le DataFrame partagé avec les autres onglets
+    df_base       = df_filtered.copy(deep=False)
     id_equip      = st.session_state["fiab_equipement"]
     point_mesure  = st.session_state["fiab_point_mesure"]
     cols_variables = st.session_state.get("fiab_cols_variables", [])
@@ -1168,7 +1204,14 @@ def render_tab_stats():
     # ── Statistiques ──────────────────────────────────────────────────────────
     with st.container(border=True):
         st.subheader(f"📋 Statistiques descriptives — {param_label}")
-        render_statistiques(df_stat, parametre, param_label)
+        # Gros volumes : fusion des agrégats par période au lieu d'un recalcul brut
+        calc = None
+        if len(df_base) >= SEUIL_AGREGATS:
+            calc = statistiques_periode(
+                df_base[["date", parametre]], _cle_serie(parametre), ds1, ds2, version
+            )
+        render_statistiques(df_stat, parametre, param_label,
+                            fenetre=(ds1, ds2), calc=calc, version=version)
 
     # ── Graphiques ────────────────────────────────────────────────────────────
     with st.container(border=True):
@@ -1219,7 +1262,9 @@ def render_tab_stats():
         # Analyse détaillée (histo + box + KDE)
         render_analyse_detaillee(
             df_viz, parametre, param_label,
-            prefix="stat"
+            prefix="stat",
+            fenetre=(ds1, ds2, val_min_s, val_max_s),
+            version=version
         )
 
 
@@ -1227,7 +1272,7 @@ def render_tab_stats():
 # POINT D'ENTRÉE PRINCIPAL
 # =============================================================================
 
-def render():
+def render(ctx: ContexteDonnees):
     """
     Structure finale :
 
@@ -1246,18 +1291,17 @@ def render():
         "courbes R(t) et statistiques industrielles"
     )
 
-    df_equipements = charger_equipements()
-    df_suivi       = charger_suivi()
+    df_equipements = ctx.equipements()
+    df_suivi       = ctx.suivi()
+    # Clé des statistiques mémorisées : change à chaque relecture de la table
+    version_suivi  = ctx.version("suivi_equipements")
 
     if df_equipements.empty or df_suivi.empty:
         st.error("⚠️ Données insuffisantes. Vérifiez la connexion à la base de données.")
         return
 
-    # Stocker df_suivi complet pour calcul date_min dans render_tab_mtbf()
-    st.session_state["fiab_df_suivi_global"] = df_suivi
-
     # Filtres globaux (3 colonnes — sans paramètre)
-    render_filtres_globaux(df_equipements, df_suivi)
+    df_filtered = render_filtres_globaux(df_equipements, df_suivi)
 
     st.markdown("---")
 
@@ -1269,10 +1313,10 @@ def render():
     ])
 
     with tab_mtbf:
-        render_tab_mtbf()
+        render_tab_mtbf(ctx, df_filtered)
 
     with tab_tend:
-        render_tab_tendances()
+        render_tab_tendances(df_filtered, version_suivi)
 
     with tab_stats:
-        render_tab_stats()
\ No newline at end of file
+        render_tab_stats(df_filtered, version_suivi)
\ No newline at end of file
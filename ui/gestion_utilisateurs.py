@@ -4,7 +4,8 @@ Onglet Gestion des Utilisateurs - Accessible uniquement par l'administrateur
 
 import streamlit as st
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Optional
 
 from auth.auth import (
     get_supabase_client,
@@ -28,6 +29,8 @@ from auth.permissions import (
     ROLE_METADATA,
     Role,
 )
+from data.contexte import ContexteDonnees
+from data.resilience import est_objet_absent
 
 
 # =============================================================================
@@ -57,24 +60,80 @@ def _statut_badge(actif: bool) -> str:
     return _badge("🔴 Désactivé", "#d62728")
 
 
-def _compter_observations(email: str, df_obs: pd.DataFrame) -> int:
-    """Compte les observations enregistrées par un utilisateur (via colonne analyste)."""
-    if df_obs.empty or 'analyste' not in df_obs.columns:
-        return 0
-    # On fait une correspondance souple : email ou nom complet dans la colonne analyste
-    return int((df_obs['analyste'].astype(str).str.lower() == email.lower()).sum())
+# Fonction SQL d'agrégation par analyste (data/supabase.sql) ; passe à False si
+# elle n'est pas installée sur la base, pour ne plus tenter l'appel
+_rpc_stats_analystes = True
 
 
-def _charger_stats_observations() -> pd.DataFrame:
-    """Charge toutes les observations pour les statistiques par analyste."""
+def _compter_observations(nom: str, stats_obs: dict) -> Optional[int]:
+    """Nombre d'observations enregistrées par un utilisateur (via colonne analyste), None si inconnu."""
+    if stats_obs is None:
+        return None
+    return stats_obs.get(nom.lower(), (0, None))[0]
+
+
+def _derniere_observation(nom: str, stats_obs: dict) -> str:
+    """Date de la dernière observation d'un utilisateur, formatée JJ/MM/AAAA."""
+    if stats_obs is None:
+        return "—"
+    derniere = stats_obs.get(nom.lower(), (0, None))[1]
+    return derniere.strftime("%d/%m/%Y") if derniere is not None and pd.notna(derniere) else "—"
+
+
+def _charger_stats_observations() -> dict:
+    """
+    Nombre d'observations et date de la dernière observation par analyste
+
+    Agrégation faite par la base (fonction SQL stats_observations_par_analyste,
+    un seul appel quel que soit le volume). Repli si la fonction n'est pas
+    installée : lecture paginée de (analyste, date) puis agrégation locale.
+
+    Returns:
+        dict: {analyste en minuscules: (nb_observations, dernière date)} ;
+              None en cas d'erreur (message affiché, comptes non renseignés)
+    """
+    global _rpc_stats_analystes
+
     try:
         client = get_supabase_client()
-        resp = client.table("observations").select("analyste, date").execute()
-        if resp.data:
-            return pd.DataFrame(resp.data)
-    except Exception:
-        pass
-    return pd.DataFrame(columns=["analyste", "date"])
+        lignes = None
+
+        if _rpc_stats_analystes:
+            try:
+                lignes = client.rpc("stats_observations_par_analyste", {}, lecture=True).execute().data or []
+            except Exception as e:
+                if not est_objet_absent(e):
+                    raise
+                _rpc_stats_analystes = False
+
+        if lignes is None:
+            # Repli : toutes les observations, par pages (l'API limite chaque réponse)
+            toutes, page_size, offset = [], 1000, 0
+            while True:
+                resp = client.table("observations").select("analyste, date")\
+                    .order("date", desc=True).range(offset, offset + page_size - 1).execute()
+                toutes.extend(resp.data or [])
+                if len(resp.data or []) < page_size:
+                    break
+                offset += page_size
+
+            df_obs = pd.DataFrame(toutes, columns=["analyste", "date"])
+            df_obs["analyste"] = df_obs["analyste"].astype(str).str.lower()
+            df_obs["date"] = pd.to_datetime(df_obs["date"], errors="coerce")
+            lignes = df_obs.groupby("analyste").agg(
+                nb_observations=("date", "size"), derniere_observation=("date", "max")
+            ).reset_index().to_dict("records")
+
+        return {
+            str(l["analyste"]).lower(): (
+                int(l["nb_observations"]),
+                pd.to_datetime(l["derniere_observation"], errors="coerce")
+            )
+            for l in lignes
+        }
+    except Exception as e:
+        st.error(f"❌ Erreur chargement des statistiques d'observations : {e}")
+        return None
 
 
 def _reset_password_admin(email: str, nouveau_mdp: str) -> tuple:
@@ -102,7 +161,7 @@ def _reset_password_admin(email: str, nouveau_mdp: str) -> tuple:
 # SECTIONS DE L'INTERFACE
 # =============================================================================
 
-def _section_kpis(users: list, df_obs: pd.DataFrame):
+def _section_kpis(users: list, stats_obs: dict):
     """Affiche les KPIs globaux en haut de page."""
     total       = len(users)
     actifs      = sum(1 for u in users if u.get("actif", True))
@@ -116,7 +175,7 @@ def _section_kpis(users: list, df_obs: pd.DataFrame):
     c4.metric("🔑 Administrateurs",    admins)
 
 
-def _section_liste(users: list, df_obs: pd.DataFrame):
+def _section_liste(users: list, stats_obs: dict):
     """Tableau principal des utilisateurs avec recherche et filtres."""
     st.subheader("📋 Liste des utilisateurs")
 
@@ -175,7 +234,7 @@ def _section_liste(users: list, df_obs: pd.DataFrame):
         dept        = u.get("departement", "—") or "—"
         date_crea   = u.get("date_creation", "")
         last_co     = u.get("derniere_connexion", "")
-        nb_obs      = _compter_observations(nom, df_obs)
+        nb_obs      = _compter_observations(nom, stats_obs)
 
         # Formatage des dates
         try:
@@ -441,7 +500,7 @@ def _section_actions(users: list):
                         st.error(message)
 
 
-def _section_statistiques(users: list, df_obs: pd.DataFrame):
+def _section_statistiques(users: list, stats_obs: dict):
     """Statistiques détaillées par utilisateur."""
     with st.container(border=True):
         st.subheader("📊 Statistiques par utilisateur")
@@ -459,18 +518,8 @@ def _section_statistiques(users: list, df_obs: pd.DataFrame):
             date_crea = u.get("date_creation", "")
             last_co   = u.get("derniere_connexion", "")
             actif     = u.get("actif", True)
-            nb_obs    = _compter_observations(nom, df_obs)
-
-            # Dernière observation
-            if not df_obs.empty and 'analyste' in df_obs.columns and 'date' in df_obs.columns:
-                obs_user = df_obs[df_obs['analyste'].astype(str).str.lower() == nom.lower()]
-                if not obs_user.empty:
-                    derniere_obs = pd.to_datetime(obs_user['date'], errors='coerce').max()
-                    derniere_obs_fmt = derniere_obs.strftime("%d/%m/%Y") if pd.notna(derniere_obs) else "—"
-                else:
-                    derniere_obs_fmt = "—"
-            else:
-                derniere_obs_fmt = "—"
+            nb_obs    = _compter_observations(nom, stats_obs)
+            derniere_obs_fmt = _derniere_observation(nom, stats_obs)
 
             try:
                 date_crea_fmt = datetime.fromisoformat(date_crea[:19]).strftime("%d/%m/%Y") if date_crea else "—"
@@ -504,7 +553,7 @@ def _section_statistiques(users: list, df_obs: pd.DataFrame):
                 "Total obs.": st.column_config.ProgressColumn(
                     "Observations",
                     min_value=0,
-                    max_value=max(df_stats["Total obs."].max(), 1),
+                    max_value=max(int(df_stats["Total obs."].fillna(0).max()), 1),
                     format="%d",
                     width="medium"
                 ),
@@ -512,47 +561,149 @@ def _section_statistiques(users: list, df_obs: pd.DataFrame):
         )
 
 
-def _section_audit():
-    """Journal d'audit des 100 dernières actions."""
+# Actions journalisées par l'application (filtre du journal d'audit)
+ACTIONS_AUDIT = [
+    "connexion", "tentative_connexion_echouee", "deconnexion",
+    "creation_utilisateur", "modification_role", "desactivation_utilisateur",
+    "reactivation_utilisateur", "suppression_utilisateur",
+    "demande_reset_password", "changement_password", "reset_password_admin",
+    "import_mesures",
+]
+TABLES_AUDIT = ["users", "equipements", "observations", "suivi_equipements"]
+
+# Durée de conservation d'une page d'audit déjà chargée (secondes)
+DUREE_CACHE_AUDIT = 60
+
+# Nombre maximal de pages d'audit conservées dans la session
+NB_PAGES_CACHE_AUDIT = 10
+
+
+def _page_audit(filtres: tuple, avant, taille: int) -> tuple:
+    """
+    Charge une page du journal d'audit, mémorisée DUREE_CACHE_AUDIT secondes
+    dans la session (navigation avant/arrière sans nouvelle requête) ; seules
+    les NB_PAGES_CACHE_AUDIT dernières pages chargées sont conservées
+
+    Args:
+        filtres (tuple): (email, action, table_name, date_debut, date_fin)
+        avant (tuple|None): Curseur : (timestamp, id) de la dernière ligne de la
+            page précédente
+        taille (int): Nombre de lignes par page
+
+    Returns:
+        tuple: (DataFrame formaté, curseur de la page suivante ou None)
+    """
+    cache = st.session_state.setdefault("audit_pages", {})
+    cle = (filtres, avant, taille)
+    maintenant = datetime.now().timestamp()
+
+    if cle in cache and maintenant - cache[cle][0] < DUREE_CACHE_AUDIT:
+        return cache[cle][1], cache[cle][2]
+
+    email, action, table_name, date_debut, date_fin = filtres
+    # Une ligne de plus que la page : indique s'il existe une page suivante
+    logs = get_audit_logs(
+        limit=taille + 1, avant=avant, email=email, action=action,
+        table_name=table_name, date_debut=date_debut, date_fin=date_fin
+    )
+    suivant = (logs[taille - 1].get("timestamp"), logs[taille - 1].get("id")) \
+        if len(logs) > taille else None
+    logs = logs[:taille]
+
+    df = pd.DataFrame(logs, columns=["timestamp", "email", "action", "table_name", "details"])
+    dates = pd.to_datetime(df["timestamp"], format="ISO8601", errors="coerce")
+    df_audit = pd.DataFrame({
+        "Date / Heure": dates.dt.strftime("%d/%m/%Y %H:%M:%S").fillna(df["timestamp"].astype(str)),
+        "Utilisateur":  df["email"].fillna("—"),
+        "Action":       df["action"].fillna("—"),
+        "Table":        df["table_name"].fillna("—"),
+        "Détails":      df["details"].map(
+            lambda d: ", ".join(f"{k}: {v}" for k, v in d.items()) if isinstance(d, dict)
+            else ("" if d is None else str(d))
+        ),
+    })
+
+    for cle_expiree in [c for c, (charge_le, _, _) in cache.items()
+                        if maintenant - charge_le >= DUREE_CACHE_AUDIT]:
+        del cache[cle_expiree]
+    cache[cle] = (maintenant, df_audit, suivant)
+    while len(cache) > NB_PAGES_CACHE_AUDIT:
+        del cache[next(iter(cache))]
+    return df_audit, suivant
+
+
+def _section_audit(users: list):
+    """Journal d'audit paginé et filtrable (utilisateur, action, table, période)."""
     with st.container(border=True):
         st.subheader("🕵️ Journal d'audit")
-        st.caption("100 dernières actions enregistrées dans le système")
-
-        logs = get_audit_logs(limit=100)
-
-        if not logs:
-            st.info("ℹ️ Aucune action enregistrée.")
-            return
-
-        rows = []
-        for log in logs:
-            ts = log.get("timestamp", "")
-            try:
-                ts_fmt = datetime.fromisoformat(ts[:19]).strftime("%d/%m/%Y %H:%M:%S")
-            except Exception:
-                ts_fmt = ts
-
-            details = log.get("details", {})
-            detail_str = ", ".join(f"{k}: {v}" for k, v in details.items()) if isinstance(details, dict) else str(details)
-
-            rows.append({
-                "Date / Heure":   ts_fmt,
-                "Utilisateur":    log.get("email", "—"),
-                "Action":         log.get("action", "—"),
-                "Table":          log.get("table_name", "—"),
-                "Détails":        detail_str,
-            })
+        st.caption("Actions enregistrées dans le système, de la plus récente à la plus ancienne")
+
+        # ── Filtres ──────────────────────────────────────────────────────────
+        col_user, col_action, col_table = st.columns(3)
+        emails = sorted({u.get("email") for u in users if u.get("email")})
+        with col_user:
+            email = st.selectbox("Utilisateur", ["Tous"] + emails, key="audit_filtre_email")
+        with col_action:
+            action = st.selectbox("Action", ["Toutes"] + ACTIONS_AUDIT, key="audit_filtre_action")
+        with col_table:
+            table_name = st.selectbox("Table", ["Toutes"] + TABLES_AUDIT, key="audit_filtre_table")
+
+        col_debut, col_fin, col_taille = st.columns(3)
+        with col_debut:
+            date_debut = st.date_input("Du", value=None, key="audit_filtre_debut", format="DD/MM/YYYY")
+        with col_fin:
+            date_fin = st.date_input("Au", value=None, key="audit_filtre_fin", format="DD/MM/YYYY")
+        with col_taille:
+            taille = st.selectbox("Lignes par page", [50, 100, 200], index=1, key="audit_taille_page")
+
+        filtres = (
+            None if email == "Tous" else email,
+            None if action == "Toutes" else action,
+            None if table_name == "Toutes" else table_name,
+            date_debut.isoformat() if date_debut else None,
+            (date_fin + timedelta(days=1)).isoformat() if date_fin else None,
+        )
 
-        df_audit = pd.DataFrame(rows)
-        st.dataframe(df_audit, use_container_width=True, hide_index=True)
+        # ── Curseurs : pile des débuts de page visités ───────────────────────
+        if st.session_state.get("audit_filtres") != (filtres, taille):
+            st.session_state["audit_filtres"] = (filtres, taille)
+            st.session_state["audit_curseurs"] = [None]
+        curseurs = st.session_state["audit_curseurs"]
+
+        df_audit, suivant = _page_audit(filtres, curseurs[-1], taille)
+
+        if df_audit.empty:
+            st.info("ℹ️ Aucune action enregistrée pour ces critères.")
+        else:
+            st.dataframe(df_audit, use_container_width=True, hide_index=True)
+
+        # ── Navigation ───────────────────────────────────────────────────────
+        col_prec, col_page, col_suiv, col_refresh = st.columns([1, 2, 1, 1])
+        with col_prec:
+            if st.button("◀ Précédent", key="audit_prec", disabled=len(curseurs) == 1,
+                         use_container_width=True):
+                curseurs.pop()
+                st.rerun()
+        with col_page:
+            st.caption(f"Page {len(curseurs)} — {len(df_audit)} ligne(s)")
+        with col_suiv:
+            if st.button("Suivant ▶", key="audit_suiv", disabled=suivant is None,
+                         use_container_width=True):
+                curseurs.append(suivant)
+                st.rerun()
+        with col_refresh:
+            if st.button("🔄 Actualiser", key="audit_refresh", use_container_width=True):
+                st.session_state["audit_pages"] = {}
+                st.session_state["audit_curseurs"] = [None]
+                st.rerun()
 
 
 # =============================================================================
 # POINT D'ENTRÉE PRINCIPAL
 # =============================================================================
 
-def render():
-    """Affiche l'onglet Gestion des Utilisateurs (admin uniquement)."""
+def render(ctx: ContexteDonnees):
+    """Affiche l'onglet Gestion des Utilisateurs (admin uniquement ; ctx inutilisé ici)."""
 
     # ── Vérification de permission ────────────────────────────────────────────
     if not check_permission(Permission.GERER_UTILISATEURS):
@@ -566,14 +717,14 @@ def render():
 
     # ── Chargement des données ────────────────────────────────────────────────
     users = get_all_users()
-    df_obs = _charger_stats_observations()
+    stats_obs = _charger_stats_observations()
 
     if not users:
         st.warning("⚠️ Impossible de charger les utilisateurs. Vérifiez la connexion Supabase.")
         users = []
 
     # ── KPIs globaux ─────────────────────────────────────────────────────────
-    _section_kpis(users, df_obs)
+    _section_kpis(users, stats_obs)
 
     st.markdown("##")
 
@@ -588,7 +739,7 @@ def render():
 
     with tab_liste:
         st.markdown("##")
-        _section_liste(users, df_obs)
+        _section_liste(users, stats_obs)
 
     with tab_ajouter:
         st.markdown("##")
@@ -600,8 +751,8 @@ def render():
 
     with tab_stats:
         st.markdown("##")
-        _section_statistiques(users, df_obs)
+        _section_statistiques(users, stats_obs)
 
     with tab_audit:
         st.markdown("##")
-        _section_audit()
+        _section_audit(users)
@@ -0,0 +1,75 @@
+"""
+Constructeurs de graphiques Plotly partagés par les onglets
+Bascule automatique SVG → WebGL pour les séries denses
+"""
+
+import os
+import plotly.graph_objects as go
+from plotly.colors import qualitative
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+def _entier_env(nom: str, defaut: int) -> int:
+    """
+    Lit un entier positif dans l'environnement
+
+    Args:
+        nom (str): Variable d'environnement
+        defaut (int): Valeur retenue si la variable est absente ou invalide
+
+    Returns:
+        int: Valeur lue, ou defaut
+    """
+    try:
+        valeur = int(os.getenv(nom, defaut))
+    except (TypeError, ValueError):
+        return defaut
+    return valeur if valeur >= 0 else defaut
+
+
+# Au-delà de ce nombre de points (toutes traces d'une figure confondues),
+# les courbes sont rendues en WebGL (go.Scattergl) au lieu de SVG (go.Scatter)
+SEUIL_WEBGL = _entier_env("SEUIL_WEBGL_POINTS", 5000)
+
+# Couleurs attribuées successivement aux séries de comparaison
+PALETTE_SERIES = qualitative.Dark24
+
+
+# =============================================================================
+# CONSTRUCTION DES FIGURES
+# =============================================================================
+
+def classe_trace(nb_points: int):
+    """
+    Retourne la classe de trace adaptée au volume de points
+
+    Args:
+        nb_points (int): Nombre total de points de la figure
+
+    Returns:
+        type: go.Scattergl au-delà de SEUIL_WEBGL, sinon go.Scatter
+    """
+    return go.Scattergl if nb_points > SEUIL_WEBGL else go.Scatter
+
+
+def construire_figure(traces: list, layout: dict = None) -> go.Figure:
+    """
+    Construit une figure en une seule passe à partir de définitions de traces
+
+    Toutes les traces sont instanciées avec la même classe (SVG ou WebGL selon
+    le volume total) puis transmises d'un bloc au constructeur de la figure,
+    au lieu d'appels successifs à fig.add_trace().
+
+    Args:
+        traces (list): Liste de dicts d'arguments de go.Scatter (x, y, mode, name, ...)
+        layout (dict, optional): Mise en forme de la figure
+
+    Returns:
+        go.Figure: Figure prête à afficher
+    """
+    nb_points = sum(len(t.get("x", [])) for t in traces)
+    classe = classe_trace(nb_points)
+    return go.Figure(data=[classe(**t) for t in traces], layout=layout)
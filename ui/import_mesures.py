@@ -0,0 +1,141 @@
+"""
+Onglet Import - Import en masse des mesures de suivi (CSV / Excel)
+"""
+
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+from data.data_manager import SUIVI_COLS
+from data.import_mesures import importer_mesures
+from auth.auth import log_action
+from data.contexte import ContexteDonnees
+
+
+def render(ctx: ContexteDonnees):
+    """Affiche l'onglet Import des mesures (ctx : contexte commun des pages, inutilisé ici)"""
+
+    st.header("📤 Import des mesures de suivi")
+    st.caption("Chargement en masse de relevés vibratoires depuis un fichier CSV ou Excel")
+
+    # =============================================================================
+    # BLOC 1 : FORMAT ATTENDU
+    # =============================================================================
+
+    with st.container(border=True):
+        st.subheader("📋 Format attendu")
+        st.markdown(
+            "Une ligne par mesure, avec les colonnes suivantes "
+            "(même format que l'export du suivi) :"
+        )
+        st.code(",".join(SUIVI_COLS), language=None)
+        st.caption(
+            "Séparateur `,` ou `;` — dates `AAAA-MM-JJ` ou `JJ/MM/AAAA` — "
+            "décimales `.` ou `,`. Les mesures déjà présentes "
+            "(même équipement, point de mesure et date) sont ignorées."
+        )
+
+        modele = pd.DataFrame([{
+            "id_equipement": "262-1P-4",
+            "point_mesure": "M-COA",
+            "date": datetime.now().strftime("%Y-%m-%d"),
+            "vitesse_rpm": 1760.0,
+            "twf_rms_g": 0.17,
+            "crest_factor": 3.5,
+            "twf_peak_to_peak_g": 1.16
+        }], columns=SUIVI_COLS)
+
+        st.download_button(
+            label="📄 Télécharger un modèle CSV",
+            data=modele.to_csv(index=False).encode("utf-8"),
+            file_name="modele_import_suivi.csv",
+            mime="text/csv"
+        )
+
+    # =============================================================================
+    # BLOC 2 : IMPORT
+    # =============================================================================
+
+    st.markdown("##")
+
+    with st.container(border=True):
+        st.subheader("📥 Importer un fichier")
+
+        fichier = st.file_uploader(
+            "Fichier de mesures",
+            type=["csv", "xlsx"],
+            key="import_mesures_fichier"
+        )
+
+        if fichier is None:
+            st.info("ℹ️ Sélectionnez un fichier CSV ou Excel pour lancer l'import")
+            return
+
+        st.caption(f"📎 {fichier.name} — {fichier.size / 1024:.1f} Ko")
+
+        if st.button("🚀 Lancer l'import", type="primary", key="import_mesures_lancer"):
+            barre = st.progress(0.0, text="Lecture du fichier...")
+
+            def progression(fraction, texte):
+                barre.progress(fraction, text=texte)
+
+            rapport = importer_mesures(fichier, fichier.name, progression)
+            barre.progress(1.0, text="Import terminé")
+
+            if rapport["inserees"]:
+                log_action("import_mesures", "suivi_equipements", None, {
+                    "fichier": fichier.name,
+                    "lues": rapport["lues"],
+                    "inserees": rapport["inserees"],
+                    "doublons": rapport["doublons"],
+                    "invalides": rapport["invalides"]
+                })
+
+            st.session_state["import_mesures_rapport"] = rapport
+
+    # =============================================================================
+    # BLOC 3 : RAPPORT
+    # =============================================================================
+
+    rapport = st.session_state.get("import_mesures_rapport")
+    if not rapport:
+        return
+
+    st.markdown("##")
+
+    with st.container(border=True):
+        st.subheader("📊 Rapport d'import")
+
+        if rapport["success"]:
+            st.success(rapport["message"])
+        elif rapport["message"].startswith("⚠️"):
+            st.warning(rapport["message"])
+        else:
+            st.error(rapport["message"])
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Lignes lues", rapport["lues"])
+        col2.metric("Importées", rapport["inserees"])
+        col3.metric("Doublons ignorés", rapport["doublons"])
+        col4.metric("Lignes invalides", rapport["invalides"])
+
+        df_erreurs = rapport["erreurs"]
+        if not df_erreurs.empty:
+            st.markdown(f"**{len(df_erreurs)} ligne(s) non importée(s)**")
+            st.dataframe(
+                df_erreurs.rename(columns={
+                    "ligne": "Ligne",
+                    "id_equipement": "ID Équipement",
+                    "point_mesure": "Point de mesure",
+                    "date": "Date",
+                    "erreur": "Motif"
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+            st.download_button(
+                label="📥 Télécharger le rapport d'erreurs",
+                data=df_erreurs.to_csv(index=False).encode("utf-8"),
+                file_name=f"erreurs_import_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
+                mime="text/csv",
+                key="import_mesures_erreurs"
+            )
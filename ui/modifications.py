@@ -6,25 +6,27 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from data.data_manager import (
-    charger_equipements,
-    charger_observations,
-    charger_suivi,
     modifier_observation,
     modifier_suivi,
+    modifier_suivis_batch,
+    modifier_observations_batch,
     get_supabase_client
 )
+from data.contexte import ContexteDonnees
+from auth.auth import check_permission, widget_permission
+from auth.permissions import Permission
 
 
-def render():
+def render(ctx: ContexteDonnees):
     """Affiche l'onglet Modifications"""
 
     st.header("✏️ Modifications")
     st.caption("Modification des observations, des suivis de mesures et des équipements")
 
     # Chargement données
-    df_equipements = charger_equipements()
-    df_observations = charger_observations()
-    df_suivi = charger_suivi()
+    df_equipements = ctx.equipements()
+    df_observations = ctx.observations()
+    df_suivi = ctx.suivi()
 
     if df_equipements.empty:
         st.warning("⚠️ Aucun équipement disponible")
@@ -199,7 +201,8 @@ def render():
                             submitted = st.form_submit_button(
                                 "✅ Enregistrer modifications",
                                 type="primary",
-                                use_container_width=True
+                                use_container_width=True,
+                                **widget_permission(Permission.MODIFIER_OBSERVATIONS)
                             )
 
                         # Validation et enregistrement
@@ -414,7 +417,8 @@ def render():
                             submitted_suivi = st.form_submit_button(
                                 "✅ Enregistrer modifications",
                                 type="primary",
-                                use_container_width=True
+                                use_container_width=True,
+                                **widget_permission(Permission.MODIFIER_SUIVIS)
                             )
 
                         # Validation et enregistrement
@@ -517,7 +521,8 @@ def render():
                     submitted_equip = st.form_submit_button(
                         "✅ Enregistrer modifications",
                         type="primary",
-                        use_container_width=True
+                        use_container_width=True,
+                        **widget_permission(Permission.MODIFIER_EQUIPEMENTS)
                     )
 
                 if submitted_equip:
@@ -677,6 +682,115 @@ def render():
                             )
                             st.rerun()
 
+    # =============================================================================
+    # CARTE 4 : MODIFICATION EN MASSE
+    # =============================================================================
+
+    st.markdown("##")
+
+    with st.container(border=True):
+        st.subheader("🗂️ Modification en masse")
+        st.caption("Édition directe dans une grille de toutes les lignes d'un équipement, enregistrées en une seule opération")
+
+        type_masse = st.radio(
+            "Données à modifier",
+            options=["Suivis de mesure", "Observations"],
+            horizontal=True,
+            key="masse_modif_type"
+        )
+
+        est_suivi = type_masse == "Suivis de mesure"
+        df_source = df_suivi if est_suivi else df_observations
+
+        if df_source.empty:
+            st.info("ℹ️ Aucune donnée à modifier")
+        else:
+            col1, col2, col3 = st.columns(3)
+
+            with col1:
+                dept_masse = st.selectbox(
+                    "1️⃣ Département",
+                    options=sorted(df_equipements['departement'].unique()),
+                    key="masse_modif_dept"
+                )
+
+            ids_dept = set(df_equipements.loc[
+                df_equipements['departement'] == dept_masse, 'id_equipement'
+            ])
+            ids_masse = sorted(set(df_source['id_equipement'].unique()) & ids_dept)
+
+            with col2:
+                id_masse = st.selectbox(
+                    "2️⃣ Équipement",
+                    options=ids_masse,
+                    key="masse_modif_equip"
+                )
+
+            if not ids_masse:
+                st.warning(f"⚠️ Aucune donnée dans le département '{dept_masse}'")
+            else:
+                lignes_equip = df_source[df_source['id_equipement'] == id_masse].copy()
+                lignes_equip['date'] = pd.to_datetime(lignes_equip['date']).dt.date
+
+                if est_suivi:
+                    with col3:
+                        points_masse = st.multiselect(
+                            "3️⃣ Points de mesure (tous si vide)",
+                            options=sorted(lignes_equip['point_mesure'].unique()),
+                            key="masse_modif_points"
+                        )
+                    if points_masse:
+                        lignes_equip = lignes_equip[lignes_equip['point_mesure'].isin(points_masse)]
+                    cles = ['id_equipement', 'point_mesure', 'date']
+                else:
+                    cles = ['id_equipement', 'date']
+
+                lignes_equip = lignes_equip.sort_values('date', ascending=False).reset_index(drop=True)
+
+                st.caption("📌 Les colonnes de clé (équipement, point de mesure, date) ne sont pas modifiables ici")
+
+                grille_editee = st.data_editor(
+                    lignes_equip,
+                    disabled=cles,
+                    use_container_width=True,
+                    hide_index=True,
+                    num_rows="fixed",
+                    key=f"masse_modif_grille_{type_masse}_{id_masse}"
+                )
+
+                # Lignes effectivement modifiées (comparaison vectorisée avec l'original)
+                colonnes_valeurs = [c for c in lignes_equip.columns if c not in cles]
+                avant = lignes_equip[colonnes_valeurs].astype(object)
+                apres = grille_editee[colonnes_valeurs].astype(object)
+                differences = (avant != apres) & ~(avant.isna() & apres.isna())
+                lignes_modifiees = grille_editee[differences.any(axis=1).to_numpy()]
+
+                st.caption(f"**{len(lignes_modifiees)}** ligne(s) modifiée(s)")
+
+                permission_masse = Permission.MODIFIER_SUIVIS if est_suivi else Permission.MODIFIER_OBSERVATIONS
+                if st.button(
+                        f"💾 Enregistrer {len(lignes_modifiees)} modification(s)",
+                        type="primary",
+                        disabled=lignes_modifiees.empty or not check_permission(permission_masse),
+                        key="btn_modif_masse"
+                ):
+                    if est_suivi:
+                        success, message, echecs = modifier_suivis_batch(lignes_modifiees)
+                    else:
+                        success, message, echecs = modifier_observations_batch(lignes_modifiees)
+
+                    if success:
+                        st.success(message)
+                        st.rerun()
+                    else:
+                        st.error(message)
+                        if not echecs.empty:
+                            st.dataframe(
+                                lignes_modifiees.loc[echecs.index, cles].assign(erreur=echecs['erreur']),
+                                use_container_width=True,
+                                hide_index=True
+                            )
+
     # =============================================================================
     # INFORMATIONS COMPLÉMENTAIRES
     # =============================================================================
@@ -742,6 +856,14 @@ def render():
 
         ---
 
+        **🗂️ Modification en masse :**
+
+        1. Choisissez le type de données, le département puis l'équipement
+        2. Modifiez directement les valeurs dans la grille
+        3. Cliquez sur "Enregistrer" : toutes les lignes modifiées sont mises à jour en une seule opération
+
+        ---
+
         **⚠️ Important :**
         - Les modifications sont définitives
         - Vérifiez bien les données avant de valider
@@ -4,26 +4,34 @@ Onglet Observations - Saisie et consultation avec visualisation des tendances
 
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
 from data.data_manager import (
-    charger_equipements,
-    charger_observations,
-    charger_suivi,
     sauvegarder_observation,
     sauvegarder_suivi
 )
+from data.contexte import ContexteDonnees
+from data.series import (
+    FREQUENCES_ALIGNEMENT,
+    extraire_series,
+    filtrer_periode,
+    dernieres_valeurs
+)
+from data.statistiques import statistiques_serie
+from ui.graphiques import construire_figure, PALETTE_SERIES
+from auth.auth import widget_permission
+from auth.permissions import Permission
 
 
-def render():
+def render(ctx: ContexteDonnees):
     """Affiche l'onglet Observations"""
 
     st.header("📝 Gestion des Observations")
     st.caption("Saisie rapide et consultation de l'historique")
 
     # Chargement données
-    df_equipements = charger_equipements()
-    df_observations = charger_observations()
+    df_equipements = ctx.equipements()
+    ref = ctx.referentiel()
+    df_observations = ctx.observations()
 
     if df_equipements.empty:
         st.error("⚠️ Aucun équipement disponible. Configurez d'abord le référentiel.")
@@ -36,17 +44,12 @@ def render():
     with st.container(border=True):
         st.subheader("➕ Nouvelle observation")
 
-        departements = sorted(df_equipements['departement'].unique())
         dept_selectionne = st.selectbox(
             "1️⃣ Département",
-            options=departements,
+            options=ref.departements,
             key="dept_select_obs"
         )
 
-        equipements_dept = df_equipements[
-            df_equipements['departement'] == dept_selectionne
-        ]
-
         with st.form("form_observation", clear_on_submit=True):
 
             col1, col2 = st.columns([2, 1])
@@ -54,7 +57,7 @@ def render():
             with col1:
                 id_selectionne = st.selectbox(
                     "2️⃣ Équipement",
-                    options=sorted(equipements_dept['id_equipement'].tolist()),
+                    options=ref.equipements_par_departement.get(dept_selectionne, []),
                     key="form_equip"
                 )
 
@@ -127,7 +130,8 @@ def render():
                 submitted = st.form_submit_button(
                     "✅ Enregistrer",
                     type="primary",
-                    use_container_width=True
+                    use_container_width=True,
+                    **widget_permission(Permission.AJOUTER_OBSERVATIONS)
                 )
 
             if submitted:
@@ -161,7 +165,7 @@ def render():
         st.subheader("📊 Saisie des mesures de suivi")
         st.caption("Enregistrement des données vibratoires et de vitesse")
 
-        df_suivi = charger_suivi()
+        df_suivi = ctx.suivi()
 
         POINTS_MESURE = [
             "M-COA", "M-CA", "Entrée Réducteur", "Sortie Réducteur",
@@ -171,14 +175,10 @@ def render():
 
         dept_suivi = st.selectbox(
             "1️⃣ Département",
-            options=sorted(df_equipements['departement'].unique()),
+            options=ref.departements,
             key="dept_select_suivi"
         )
 
-        equipements_dept_suivi = df_equipements[
-            df_equipements["departement"] == dept_suivi
-        ]
-
         with st.form("form_suivi", clear_on_submit=True):
 
             col1, col2, col3 = st.columns([2, 2, 1])
@@ -186,7 +186,7 @@ def render():
             with col1:
                 id_suivi = st.selectbox(
                     "2️⃣ Équipement",
-                    options=sorted(equipements_dept_suivi["id_equipement"].tolist()),
+                    options=ref.equipements_par_departement.get(dept_suivi, []),
                     key="form_suivi_equip"
                 )
 
@@ -253,7 +253,8 @@ def render():
                 submitted_suivi = st.form_submit_button(
                     "✅ Enregistrer mesure",
                     type="primary",
-                    use_container_width=True
+                    use_container_width=True,
+                    **widget_permission(Permission.AJOUTER_SUIVIS)
                 )
 
             if submitted_suivi:
@@ -281,7 +282,7 @@ def render():
         st.subheader("📈 Visualisation des tendances")
 
         # Charger les données de suivi
-        df_suivi = charger_suivi()
+        df_suivi = ctx.suivi()
 
         if df_suivi.empty:
             st.info("ℹ️ Aucune donnée de suivi disponible")
@@ -290,20 +291,22 @@ def render():
         # Conversion dates
         df_suivi['date'] = pd.to_datetime(df_suivi['date'], errors='coerce')
 
-        # Construire un mapping id_equipement → département depuis df_equipements
-        equip_to_dept = df_equipements.set_index('id_equipement')['departement'].to_dict()
+        # Mapping id_equipement → département (référentiel partagé)
+        equip_to_dept = ref.departement_de
+
+        # Couples (équipement, point de mesure) disponibles — calculés une seule fois
+        couples_suivi = df_suivi[['id_equipement', 'point_mesure']].drop_duplicates()
+        couples_suivi = couples_suivi.assign(
+            departement=couples_suivi['id_equipement'].map(equip_to_dept)
+        )
 
         # ── ÉQUIPEMENT PRINCIPAL ──────────────────────────────────────────────
         col_f1, col_f2, col_f3 = st.columns(3)
 
+        # Départements qui ont des données de suivi
+        depts_avec_suivi = sorted(couples_suivi['departement'].dropna().unique())
+
         with col_f1:
-            # Départements qui ont des données de suivi
-            depts_avec_suivi = sorted(
-                df_suivi['id_equipement']
-                .map(equip_to_dept)
-                .dropna()
-                .unique()
-            )
             dept_tendances = st.selectbox(
                 "1️⃣ Département",
                 options=depts_avec_suivi,
@@ -311,10 +314,11 @@ def render():
             )
 
         # Équipements du département sélectionné qui ont des données de suivi
-        equips_dept_tendances = sorted([
-            eq for eq in df_suivi['id_equipement'].unique()
-            if equip_to_dept.get(eq) == dept_tendances
-        ])
+        equips_dept_tendances = sorted(
+            couples_suivi.loc[
+                couples_suivi['departement'] == dept_tendances, 'id_equipement'
+            ].unique()
+        )
 
         with col_f2:
             id_equip_suivi = st.selectbox(
@@ -324,86 +328,102 @@ def render():
             )
 
         with col_f3:
-            df_equip_suivi = df_suivi[df_suivi['id_equipement'] == id_equip_suivi]
             point_mesure_suivi = st.selectbox(
                 "3️⃣ Point de mesure",
-                options=sorted(df_equip_suivi['point_mesure'].unique()),
+                options=sorted(
+                    couples_suivi.loc[
+                        couples_suivi['id_equipement'] == id_equip_suivi, 'point_mesure'
+                    ].unique()
+                ),
                 key="point_mesure_tendances"
             )
 
-        # Filtrer les données principales
-        df_filtered_suivi = df_suivi[
-            (df_suivi['id_equipement'] == id_equip_suivi) &
-            (df_suivi['point_mesure'] == point_mesure_suivi)
-        ].copy()
+        serie_principale = (id_equip_suivi, point_mesure_suivi)
 
-        if df_filtered_suivi.empty:
-            st.warning("⚠️ Aucune donnée pour cette sélection")
-            return
-
-        df_filtered_suivi = df_filtered_suivi.sort_values('date')
-
-        # ── ÉQUIPEMENT DE COMPARAISON (optionnel) ────────────────────────────
-        #st.markdown("##")
+        # ── ÉQUIPEMENTS DE COMPARAISON (optionnel, N séries) ─────────────────
         ajouter_comparaison = st.toggle(
-            "➕ Ajouter un équipement de comparaison",
+            "➕ Ajouter des équipements de comparaison",
             value=False,
             key="toggle_comparaison"
         )
 
-        df_filtered_suivi2 = None
-        id_equip_suivi2 = None
-        point_mesure_suivi2 = None
+        series_comparaison = []
 
         if ajouter_comparaison:
-            col_c1, col_c2, col_c3 = st.columns(3)
+            col_c1, col_c2 = st.columns(2)
 
             with col_c1:
-                depts_avec_suivi2 = sorted(
-                    df_suivi['id_equipement']
-                    .map(equip_to_dept)
-                    .dropna()
-                    .unique()
-                )
-                dept_tendances2 = st.selectbox(
-                    "1️⃣ Département (comparaison)",
-                    options=depts_avec_suivi2,
+                depts_comparaison = st.multiselect(
+                    "1️⃣ Département(s) (comparaison)",
+                    options=depts_avec_suivi,
+                    default=[dept_tendances],
                     key="dept_tendances2"
                 )
 
-            equips_dept_tendances2 = sorted([
-                eq for eq in df_suivi['id_equipement'].unique()
-                if equip_to_dept.get(eq) == dept_tendances2
-            ])
+            couples_comparaison = couples_suivi[
+                couples_suivi['departement'].isin(depts_comparaison)
+            ]
+            points_comparaison_dispo = sorted(couples_comparaison['point_mesure'].unique())
 
             with col_c2:
-                id_equip_suivi2 = st.selectbox(
-                    "2️⃣ Équipement (comparaison)",
-                    options=equips_dept_tendances2,
-                    key="id_equip_tendances2"
-                )
-
-            with col_c3:
-                df_equip_suivi2 = df_suivi[df_suivi['id_equipement'] == id_equip_suivi2]
-                point_mesure_suivi2 = st.selectbox(
-                    "3️⃣ Point de mesure (comparaison)",
-                    options=sorted(df_equip_suivi2['point_mesure'].unique()),
+                points_comparaison = st.multiselect(
+                    "2️⃣ Point(s) de mesure (comparaison)",
+                    options=points_comparaison_dispo,
+                    default=(
+                        [point_mesure_suivi]
+                        if point_mesure_suivi in points_comparaison_dispo else None
+                    ),
                     key="point_mesure_tendances2"
                 )
 
-            df_filtered_suivi2 = df_suivi[
-                (df_suivi['id_equipement'] == id_equip_suivi2) &
-                (df_suivi['point_mesure'] == point_mesure_suivi2)
-            ].copy().sort_values('date')
+            couples_comparaison = couples_comparaison[
+                couples_comparaison['point_mesure'].isin(points_comparaison)
+            ]
+            options_comparaison = sorted(
+                couple for couple in zip(
+                    couples_comparaison['id_equipement'],
+                    couples_comparaison['point_mesure']
+                )
+                if couple != serie_principale
+            )
 
-            if df_filtered_suivi2.empty:
-                st.warning("⚠️ Aucune donnée pour l'équipement de comparaison")
-                df_filtered_suivi2 = None
+            tout_comparer = st.checkbox(
+                f"Comparer toutes les séries correspondantes ({len(options_comparaison)})",
+                value=False,
+                key="comparaison_toutes"
+            )
 
-        #st.markdown("##")
+            if tout_comparer:
+                series_comparaison = options_comparaison
+            else:
+                series_comparaison = st.multiselect(
+                    "3️⃣ Équipement(s) de comparaison",
+                    options=options_comparaison,
+                    format_func=lambda c: f"{c[0]} | {c[1]}",
+                    key="id_equip_tendances2"
+                )
 
         # ── FILTRES TEMPORELS ─────────────────────────────────────────────────
-        col_t1, col_t2, col_t3 = st.columns([2, 2, 1])
+        col_t1, col_t2, col_t3, col_t4 = st.columns([2, 2, 1, 1])
+
+        with col_t4:
+            alignement = st.selectbox(
+                "Alignement temporel",
+                options=list(FREQUENCES_ALIGNEMENT.keys()),
+                key="alignement_tendances",
+                help="Rééchantillonne toutes les séries sur un axe commun (moyenne par période)"
+            )
+
+        # Extraction de toutes les séries en une seule passe, alignées sur un axe commun
+        df_series = extraire_series(
+            df_suivi,
+            [serie_principale] + list(series_comparaison),
+            frequence=FREQUENCES_ALIGNEMENT[alignement]
+        )
+
+        if serie_principale not in df_series.columns.droplevel('variable'):
+            st.warning("⚠️ Aucune donnée pour cette sélection")
+            return
 
         with col_t1:
             mode_filtrage = st.radio(
@@ -414,10 +434,11 @@ def render():
             )
 
         if mode_filtrage == "Période personnalisée":
-            with col_t2:
-                date_min_suivi = df_filtered_suivi['date'].min().date()
-                date_max_suivi = df_filtered_suivi['date'].max().date()
+            dates_principales = df_series[serie_principale].dropna(how='all').index
+            date_min_suivi = dates_principales.min().date()
+            date_max_suivi = dates_principales.max().date()
 
+            with col_t2:
                 date_debut_suivi = st.date_input(
                     "Date début",
                     value=date_min_suivi,
@@ -435,21 +456,11 @@ def render():
                     key="date_fin_tendances"
                 )
 
-            df_filtered_suivi = df_filtered_suivi[
-                (df_filtered_suivi['date'].dt.date >= date_debut_suivi) &
-                (df_filtered_suivi['date'].dt.date <= date_fin_suivi)
-            ]
-            if df_filtered_suivi2 is not None:
-                df_filtered_suivi2 = df_filtered_suivi2[
-                    (df_filtered_suivi2['date'].dt.date >= date_debut_suivi) &
-                    (df_filtered_suivi2['date'].dt.date <= date_fin_suivi)
-                ]
+            df_series = filtrer_periode(df_series, date_debut_suivi, date_fin_suivi)
+            fenetre = (alignement, date_debut_suivi, date_fin_suivi)
         else:
-            df_filtered_suivi = df_filtered_suivi.tail(22)
-            if df_filtered_suivi2 is not None:
-                df_filtered_suivi2 = df_filtered_suivi2.tail(22)
-
-        #st.markdown("##")
+            df_series = dernieres_valeurs(df_series, 22)
+            fenetre = (alignement, 22)
 
         # ── SÉLECTION DES VARIABLES ───────────────────────────────────────────
         variables_disponibles = {
@@ -471,10 +482,18 @@ def render():
             st.warning("⚠️ Veuillez sélectionner au moins une variable")
             return
 
-        #st.markdown("##")
+        # Séries effectivement présentes dans la fenêtre affichée
+        series_affichees = [
+            serie for serie in [serie_principale] + list(series_comparaison)
+            if serie in df_series.columns.droplevel('variable')
+        ]
+        avec_comparaison = len(series_affichees) > 1
+
+        if ajouter_comparaison and series_comparaison and not avec_comparaison:
+            st.warning("⚠️ Aucune donnée pour les équipements de comparaison")
 
         # ── CRÉATION DU GRAPHIQUE ─────────────────────────────────────────────
-        fig = go.Figure()
+        traces = []
 
         # Palette équipement principal (couleurs originales)
         couleurs_principal = {
@@ -484,67 +503,56 @@ def render():
             'twf_peak_to_peak_g': '#d62728'
         }
 
-        # Palette équipement de comparaison (nuances distinctes)
-        couleurs_comparaison = {
-            'vitesse_rpm':        '#aec7e8',
-            'twf_rms_g':          '#c5b0d5',
-            'crest_factor':       '#98df8a',
-            'twf_peak_to_peak_g': '#ff9896'
+        # Séries de comparaison : une couleur par série, un style de trait par variable
+        styles_variables = {
+            'vitesse_rpm':        'solid',
+            'twf_rms_g':          'dash',
+            'crest_factor':       'dot',
+            'twf_peak_to_peak_g': 'dashdot'
         }
 
-        # Traces équipement principal
-        for var in variables_selectionnees:
-            df_trace = (
-                df_filtered_suivi[['date', var]]
-                .dropna(subset=['date', var])
-                .drop_duplicates(subset='date')
-                .sort_values('date')
-            )
-            legend_label = (
-                f"{variables_disponibles[var]} — {id_equip_suivi} | {point_mesure_suivi}"
-                if df_filtered_suivi2 is not None
-                else variables_disponibles[var]
-            )
-            fig.add_trace(go.Scatter(
-                x=df_trace['date'],
-                y=df_trace[var],
-                mode='lines+markers',
-                name=legend_label,
-                connectgaps=True,
-                line=dict(color=couleurs_principal[var], width=2),
-                marker=dict(size=6, symbol='circle')
-            ))
-
-        # Traces équipement de comparaison
-        if df_filtered_suivi2 is not None and not df_filtered_suivi2.empty:
+        for rang, (id_equip, point) in enumerate(series_affichees):
             for var in variables_selectionnees:
-                df_trace2 = (
-                    df_filtered_suivi2[['date', var]]
-                    .dropna(subset=['date', var])
-                    .drop_duplicates(subset='date')
-                    .sort_values('date')
-                )
-                fig.add_trace(go.Scatter(
-                    x=df_trace2['date'],
-                    y=df_trace2[var],
+                if (id_equip, point, var) not in df_series.columns:
+                    continue
+                serie = df_series[(id_equip, point, var)].dropna()
+                if serie.empty:
+                    continue
+
+                if rang == 0:
+                    ligne = dict(color=couleurs_principal[var], width=2)
+                else:
+                    ligne = dict(
+                        color=PALETTE_SERIES[(rang - 1) % len(PALETTE_SERIES)],
+                        width=2,
+                        dash=styles_variables[var] if len(variables_selectionnees) > 1 else 'solid'
+                    )
+
+                traces.append(dict(
+                    x=serie.index,
+                    y=serie.values,
                     mode='lines+markers',
-                    name=f"{variables_disponibles[var]} — {id_equip_suivi2} | {point_mesure_suivi2}",
+                    name=(
+                        f"{variables_disponibles[var]} — {id_equip} | {point}"
+                        if avec_comparaison
+                        else variables_disponibles[var]
+                    ),
                     connectgaps=True,
-                    line=dict(color=couleurs_comparaison[var], width=2), #, dash='dash'),
-                    marker=dict(size=6, symbol='circle')#symbol='diamond')
+                    line=ligne,
+                    marker=dict(size=6, symbol='circle')
                 ))
 
         # Titre dynamique
-        if df_filtered_suivi2 is not None:
+        if avec_comparaison:
             titre = (
                 f"Tendances — {id_equip_suivi} ({point_mesure_suivi})"
-                f"  vs  {id_equip_suivi2} ({point_mesure_suivi2})"
+                f"  vs  {len(series_affichees) - 1} série(s) de comparaison"
             )
         else:
             titre = f"Tendances - {id_equip_suivi} - {point_mesure_suivi}"
 
-        # Mise en forme (identique à l'original)
-        fig.update_layout(
+        # Mise en forme (identique à l'original) — toutes les traces en un seul bloc
+        fig = construire_figure(traces, layout=dict(
             title=titre,
             xaxis_title="Date",
             yaxis_title="Valeurs",
@@ -557,42 +565,37 @@ def render():
                 xanchor="right",
                 x=1
             )
-        )
+        ))
 
         st.plotly_chart(fig, use_container_width=True)
 
         # ── Statistiques ──────────────────────────────────────────────────────
         st.markdown("##")
-        st.caption(f"**{len(df_filtered_suivi)}** mesure(s) affichée(s) — {id_equip_suivi} | {point_mesure_suivi}")
-        if df_filtered_suivi2 is not None and not df_filtered_suivi2.empty:
-            st.caption(f"**{len(df_filtered_suivi2)}** mesure(s) affichée(s) — {id_equip_suivi2} | {point_mesure_suivi2}")
+        for id_equip, point in series_affichees:
+            nb_mesures = int(df_series[(id_equip, point)].notna().any(axis=1).sum())
+            st.caption(f"**{nb_mesures}** mesure(s) affichée(s) — {id_equip} | {point}")
 
         with st.expander("📊 Statistiques détaillées"):
-            if df_filtered_suivi2 is not None:
-                st.markdown(f"**{id_equip_suivi} — {point_mesure_suivi}**")
-            stats_data = []
-            for var in variables_selectionnees:
-                stats_data.append({
-                    'Variable': variables_disponibles[var],
-                    'Minimum': f"{df_filtered_suivi[var].min():.3f}",
-                    'Maximum': f"{df_filtered_suivi[var].max():.3f}",
-                    'Moyenne': f"{df_filtered_suivi[var].mean():.3f}",
-                    'Variance': f"{df_filtered_suivi[var].var():.3f}",
-                    'Écart-type': f"{df_filtered_suivi[var].std():.3f}"
-                })
-            st.dataframe(pd.DataFrame(stats_data), use_container_width=True, hide_index=True)
-
-            if df_filtered_suivi2 is not None and not df_filtered_suivi2.empty:
-                st.markdown("---")
-                st.markdown(f"**{id_equip_suivi2} — {point_mesure_suivi2}**")
-                stats_data2 = []
+            for rang, (id_equip, point) in enumerate(series_affichees):
+                if rang > 0:
+                    st.markdown("---")
+                if avec_comparaison:
+                    st.markdown(f"**{id_equip} — {point}**")
+                stats_data = []
                 for var in variables_selectionnees:
-                    stats_data2.append({
+                    if (id_equip, point, var) not in df_series.columns:
+                        continue
+                    serie = df_series[(id_equip, point, var)].dropna()
+                    if serie.empty:
+                        continue
+                    calc = statistiques_serie(serie, (id_equip, point, var), fenetre,
+                                              ctx.version("suivi_equipements"))
+                    stats_data.append({
                         'Variable': variables_disponibles[var],
-                        'Minimum': f"{df_filtered_suivi2[var].min():.3f}",
-                        'Maximum': f"{df_filtered_suivi2[var].max():.3f}",
-                        'Moyenne': f"{df_filtered_suivi2[var].mean():.3f}",
-                        'Variance': f"{df_filtered_suivi[var].var():.3f}",
-                        'Écart-type': f"{df_filtered_suivi2[var].std():.3f}"
+                        'Minimum': f"{calc['min']:.3f}",
+                        'Maximum': f"{calc['max']:.3f}",
+                        'Moyenne': f"{calc['moyenne']:.3f}",
+                        'Variance': f"{calc['variance']:.3f}",
+                        'Écart-type': f"{calc['ecart_type']:.3f}"
                     })
-                st.dataframe(pd.DataFrame(stats_data2), use_container_width=True, hide_index=True)
\ No newline at end of file
+                st.dataframe(pd.DataFrame(stats_data), use_container_width=True, hide_index=True)
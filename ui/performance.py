@@ -0,0 +1,276 @@
+"""
+Onglet Performance - Accessible uniquement par l'administrateur
+Durées par opération (pages, chargements, écritures, exports, requêtes
+Supabase), occupation mémoire des tables partagées et, en mode profilage,
+mémoire par page et par session
+"""
+
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+
+from auth.auth import check_permission
+from auth.permissions import Permission
+from data import instrumentation, magasin, profilage
+from data.contexte import ContexteDonnees
+
+
+# Catégories d'opérations (préfixe du nom → libellé)
+CATEGORIES = {
+    "page:":        "Pages",
+    "supabase:":    "Requêtes Supabase",
+    "charger_":     "Chargements",
+    "sauvegarder_": "Écritures",
+    "exporter_":    "Exports",
+}
+
+
+def _categorie(operation: str) -> str:
+    """Libellé de la catégorie d'une opération."""
+    for prefixe, libelle in CATEGORIES.items():
+        if operation.startswith(prefixe):
+            return libelle
+    return "Autres"
+
+
+def _taille(octets: int) -> str:
+    """Taille lisible (Ko, Mo...)."""
+    for unite in ("o", "Ko", "Mo"):
+        if octets < 1024:
+            return f"{octets:.0f} {unite}"
+        octets /= 1024
+    return f"{octets:.1f} Go"
+
+
+# =============================================================================
+# SECTIONS
+# =============================================================================
+
+def _section_operations(operations: list):
+    """Tableau des durées par opération, filtrable par catégorie."""
+    st.subheader("⏱️ Durées par opération")
+
+    df = pd.DataFrame(operations)
+    df.insert(0, "Catégorie", df["operation"].map(_categorie))
+
+    categories = ["Toutes"] + sorted(df["Catégorie"].unique())
+    choix = st.selectbox("Catégorie", categories, key="perf_categorie")
+    if choix != "Toutes":
+        df = df[df["Catégorie"] == choix]
+
+    df["octets"] = df["octets"].map(_taille)
+    st.dataframe(
+        df,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "operation":  st.column_config.TextColumn("Opération", width="large"),
+            "nb":         st.column_config.NumberColumn("Appels", format="%d"),
+            "echecs":     st.column_config.NumberColumn("Échecs", format="%d"),
+            "moyenne_ms": st.column_config.NumberColumn("Moyenne (ms)", format="%.1f"),
+            "p50_ms":     st.column_config.NumberColumn("p50 (ms)", format="%.1f"),
+            "p95_ms":     st.column_config.NumberColumn("p95 (ms)", format="%.1f"),
+            "p99_ms":     st.column_config.NumberColumn("p99 (ms)", format="%.1f"),
+            "max_ms":     st.column_config.NumberColumn("Max (ms)", format="%.1f"),
+            "total_s":    st.column_config.NumberColumn("Total (s)", format="%.2f"),
+            "lignes":     st.column_config.NumberColumn("Lignes", format="%d"),
+            "octets":     st.column_config.TextColumn("Volume"),
+        }
+    )
+    st.caption(
+        f"Percentiles calculés sur les {instrumentation.TAILLE_ECHANTILLON_MESURES} "
+        "derniers appels de chaque opération ; volume : DataFrames chargés ou fichiers produits"
+    )
+
+
+def _section_memoire():
+    """Occupation mémoire des tables partagées entre les sessions."""
+    st.subheader("🧠 Tables partagées")
+
+    tables = magasin.empreinte_memoire()
+    if not tables:
+        st.info("ℹ️ Aucune table en mémoire pour le moment.")
+        return
+
+    c1, c2 = st.columns(2)
+    c1.metric("📦 Tables en mémoire", len(tables))
+    c2.metric("💾 Mémoire totale", _taille(sum(t["octets"] for t in tables)))
+
+    df = pd.DataFrame(tables)
+    df["octets"] = df["octets"].map(_taille)
+    st.dataframe(
+        df,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "table":   st.column_config.TextColumn("Table"),
+            "version": st.column_config.NumberColumn("Version", format="%d"),
+            "lignes":  st.column_config.NumberColumn("Lignes", format="%d"),
+            "octets":  st.column_config.TextColumn("Mémoire"),
+            "age_s":   st.column_config.NumberColumn("Âge (s)", format="%.0f"),
+        }
+    )
+
+
+def _section_profilage():
+    """Pics mémoire par page, principaux allocateurs et empreinte des sessions."""
+    st.subheader("🔬 Profilage mémoire")
+
+    if not profilage.PROFILAGE_MEMOIRE_ACTIF:
+        st.info(
+            "ℹ️ Profilage inactif. Redémarrer l'application avec la variable "
+            "d'environnement `PROFILAGE_MEMOIRE=1` pour relever la mémoire de chaque "
+            "page (tracemalloc) et de chaque session. Ce mode ralentit l'application "
+            "et sérialise le rendu des pages : à réserver aux campagnes de mesure."
+        )
+        return
+
+    pages = profilage.profil_pages()
+    sessions = profilage.empreinte_sessions()
+    tables = sum(t["octets"] for t in magasin.empreinte_memoire())
+    pic_page = max((p["pic_max_octets"] for p in pages), default=0)
+    total_sessions = sum(s["octets"] for s in sessions)
+    courante, _ = profilage.memoire_tracee()
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("🧮 Mémoire Python tracée", _taille(courante))
+    c2.metric("📈 Pic du rendu le plus lourd", _taille(pic_page))
+    c3.metric("👥 Sessions actives", len(sessions))
+    c4.metric("💾 États de session", _taille(total_sessions))
+    st.caption(
+        f"Estimation de dimensionnement pour N utilisateurs simultanés : tables partagées "
+        f"({_taille(tables)}) + N × (état de session moyen "
+        f"({_taille(total_sessions / len(sessions) if sessions else 0)}) + pic de rendu "
+        f"({_taille(pic_page)})), hors mémoire du serveur Streamlit et des bibliothèques."
+    )
+
+    if pages:
+        st.markdown("**Pages**")
+        df_pages = pd.DataFrame(pages).drop(columns="allocateurs")
+        for col in ("pic_max_octets", "pic_dernier_octets", "croissance_moyenne_octets"):
+            df_pages[col] = df_pages[col].map(_taille)
+        st.dataframe(
+            df_pages,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "page":                      st.column_config.TextColumn("Page"),
+                "nb":                        st.column_config.NumberColumn("Rendus", format="%d"),
+                "pic_max_octets":            st.column_config.TextColumn("Pic max"),
+                "pic_dernier_octets":        st.column_config.TextColumn("Dernier pic"),
+                "croissance_moyenne_octets": st.column_config.TextColumn("Croissance nette moyenne"),
+            }
+        )
+
+        choix = st.selectbox("Principaux allocateurs du dernier rendu",
+                             [p["page"] for p in pages], key="perf_page_profilee")
+        allocateurs = next(p["allocateurs"] for p in pages if p["page"] == choix)
+        if allocateurs:
+            df_alloc = pd.DataFrame(allocateurs)
+            df_alloc["octets"] = df_alloc["octets"].map(_taille)
+            df_alloc["total_octets"] = df_alloc["total_octets"].map(_taille)
+            st.dataframe(
+                df_alloc,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "emplacement":  st.column_config.TextColumn("Fichier:ligne", width="large"),
+                    "octets":       st.column_config.TextColumn("Alloué pendant le rendu"),
+                    "blocs":        st.column_config.NumberColumn("Blocs", format="%d"),
+                    "total_octets": st.column_config.TextColumn("Encore occupé"),
+                }
+            )
+        else:
+            st.caption("Aucune allocation nette pendant le dernier rendu.")
+
+    if sessions:
+        st.markdown("**Sessions**")
+        df_sessions = pd.DataFrame(sessions)
+        df_sessions["cles"] = df_sessions["cles"].map(
+            lambda cles: ", ".join(f"{c['cle']} ({_taille(c['octets'])})" for c in cles)
+        )
+        df_sessions["octets"] = df_sessions["octets"].map(_taille)
+        st.dataframe(
+            df_sessions,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "session":     st.column_config.TextColumn("Session"),
+                "utilisateur": st.column_config.TextColumn("Utilisateur"),
+                "page":        st.column_config.TextColumn("Dernière page"),
+                "octets":      st.column_config.TextColumn("État de session"),
+                "nb_cles":     st.column_config.NumberColumn("Clés", format="%d"),
+                "cles":        st.column_config.TextColumn("Entrées les plus volumineuses", width="large"),
+                "age_s":       st.column_config.NumberColumn("Dernier rendu (s)", format="%.0f"),
+            }
+        )
+
+
+def _section_export():
+    """Téléchargement des mesures (JSON, Prometheus) et réinitialisation."""
+    horodatage = datetime.now().strftime("%Y%m%d_%H%M%S")
+    col_json, col_prom, col_reset = st.columns(3)
+
+    with col_json:
+        st.download_button(
+            label="📥 Export JSON",
+            data=instrumentation.exporter_json(),
+            file_name=f"performance_{horodatage}.json",
+            mime="application/json",
+            use_container_width=True
+        )
+    with col_prom:
+        st.download_button(
+            label="📥 Export Prometheus",
+            data=instrumentation.exporter_prometheus(),
+            file_name=f"performance_{horodatage}.prom",
+            mime="text/plain",
+            use_container_width=True
+        )
+    with col_reset:
+        if st.button("🔄 Réinitialiser les mesures", use_container_width=True, key="perf_reset"):
+            instrumentation.reinitialiser()
+            profilage.reinitialiser()
+            st.rerun()
+
+
+# =============================================================================
+# RENDU PRINCIPAL
+# =============================================================================
+
+def render(ctx: ContexteDonnees):
+    """Affiche l'onglet Performance (admin uniquement ; ctx inutilisé ici)."""
+
+    if not check_permission(Permission.GERER_UTILISATEURS):
+        st.error("🔒 Accès refusé — Cette section est réservée aux administrateurs.")
+        st.stop()
+
+    st.header("⚡ Performance")
+    depuis = datetime.fromtimestamp(instrumentation.mesures_depuis())
+    st.caption(
+        f"Mesures du processus depuis le {depuis.strftime('%d/%m/%Y à %H:%M:%S')} "
+        "(toutes sessions confondues)"
+    )
+    st.markdown("---")
+
+    operations = instrumentation.synthese()
+
+    with st.container(border=True):
+        if operations:
+            _section_operations(operations)
+        else:
+            st.info("ℹ️ Aucune mesure enregistrée pour le moment.")
+
+    st.markdown("##")
+
+    with st.container(border=True):
+        _section_memoire()
+
+    st.markdown("##")
+
+    with st.container(border=True):
+        _section_profilage()
+
+    st.markdown("##")
+
+    _section_export()
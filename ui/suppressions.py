@@ -6,25 +6,29 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from data.data_manager import (
-    charger_equipements,
-    charger_observations,
-    charger_suivi,
     supprimer_observation,
     supprimer_equipement,
-    supprimer_suivi
+    supprimer_suivi,
+    supprimer_suivis_periode,
+    supprimer_suivis_selection,
+    supprimer_observations_periode,
+    supprimer_observations_selection
 )
+from data.contexte import ContexteDonnees
+from auth.auth import widget_permission
+from auth.permissions import Permission
 
 
-def render():
+def render(ctx: ContexteDonnees):
     """Affiche l'onglet Suppressions"""
 
     st.header("🗑️ Suppressions")
     st.caption("⚠️ Zone critique - Utilisez avec précaution")
 
     # Chargement données
-    df_equipements = charger_equipements()
-    df_observations = charger_observations()
-    df_suivi = charger_suivi()
+    df_equipements = ctx.equipements()
+    df_observations = ctx.observations()
+    df_suivi = ctx.suivi()
 
     if df_equipements.empty:
         st.warning("⚠️ Aucun équipement disponible")
@@ -108,7 +112,8 @@ def render():
                                 "🗑️ Supprimer",
                                 type="secondary",
                                 use_container_width=True,
-                                key="btn_suppr_obs_initial"
+                                key="btn_suppr_obs_initial",
+                                **widget_permission(Permission.SUPPRIMER_OBSERVATIONS)
                         ):
                             st.session_state.confirm_obs_delete = True
                             st.rerun()
@@ -256,7 +261,8 @@ def render():
                                 "🗑️ Supprimer",
                                 type="secondary",
                                 use_container_width=True,
-                                key="btn_suppr_suivi_initial"
+                                key="btn_suppr_suivi_initial",
+                                **widget_permission(Permission.SUPPRIMER_SUIVIS)
                         ):
                             st.session_state.confirm_suivi_delete = True
                             st.rerun()
@@ -377,7 +383,8 @@ def render():
                             "🗑️ Supprimer",
                             type="secondary",
                             use_container_width=True,
-                            key="btn_suppr_equip_initial"
+                            key="btn_suppr_equip_initial",
+                            **widget_permission(Permission.SUPPRIMER_EQUIPEMENTS)
                     ):
                         st.session_state.confirm_equip_delete = True
                         st.rerun()
@@ -423,6 +430,182 @@ def render():
                         st.session_state.confirm_equip_delete = False
                         st.rerun()
 
+    # =============================================================================
+    # CARTE 4 : SUPPRESSION EN MASSE
+    # =============================================================================
+
+    st.markdown("##")
+
+    with st.container(border=True):
+        st.subheader("🔴 Suppression en masse")
+        st.caption("Suppression de plusieurs observations ou suivis d'un équipement en une seule opération")
+
+        col_type, col_mode = st.columns(2)
+
+        with col_type:
+            type_masse = st.radio(
+                "Données à supprimer",
+                options=["Suivis de mesure", "Observations"],
+                horizontal=True,
+                key="masse_suppr_type"
+            )
+
+        with col_mode:
+            mode_masse = st.radio(
+                "Mode de sélection",
+                options=["Par période", "Sélection de lignes"],
+                horizontal=True,
+                key="masse_suppr_mode"
+            )
+
+        est_suivi = type_masse == "Suivis de mesure"
+        df_source = df_suivi if est_suivi else df_observations
+
+        if df_source.empty:
+            st.info("ℹ️ Aucune donnée à supprimer")
+        else:
+            col1, col2 = st.columns(2)
+
+            with col1:
+                dept_masse = st.selectbox(
+                    "1️⃣ Département",
+                    options=sorted(df_equipements['departement'].unique()),
+                    key="masse_suppr_dept"
+                )
+
+            ids_dept = set(df_equipements.loc[
+                df_equipements['departement'] == dept_masse, 'id_equipement'
+            ])
+            ids_masse = sorted(set(df_source['id_equipement'].unique()) & ids_dept)
+
+            with col2:
+                id_masse = st.selectbox(
+                    "2️⃣ Équipement",
+                    options=ids_masse,
+                    key="masse_suppr_equip"
+                )
+
+            if not ids_masse:
+                st.warning(f"⚠️ Aucune donnée dans le département '{dept_masse}'")
+            else:
+                lignes_equip = df_source[df_source['id_equipement'] == id_masse].copy()
+                lignes_equip['date'] = pd.to_datetime(lignes_equip['date'])
+                lignes_equip = lignes_equip.sort_values('date', ascending=False)
+
+                if 'confirm_masse_delete' not in st.session_state:
+                    st.session_state.confirm_masse_delete = False
+
+                if mode_masse == "Par période":
+                    col_d1, col_d2, col_p = st.columns(3)
+
+                    with col_d1:
+                        date_debut_masse = st.date_input(
+                            "Date début",
+                            value=lignes_equip['date'].min().date(),
+                            key="masse_suppr_d1"
+                        )
+                    with col_d2:
+                        date_fin_masse = st.date_input(
+                            "Date fin",
+                            value=lignes_equip['date'].max().date(),
+                            key="masse_suppr_d2"
+                        )
+
+                    points_masse = None
+                    if est_suivi:
+                        with col_p:
+                            points_masse = st.multiselect(
+                                "Points de mesure (tous si vide)",
+                                options=sorted(lignes_equip['point_mesure'].unique()),
+                                key="masse_suppr_points"
+                            )
+
+                    masque = (
+                        (lignes_equip['date'].dt.date >= date_debut_masse) &
+                        (lignes_equip['date'].dt.date <= date_fin_masse)
+                    )
+                    if points_masse:
+                        masque &= lignes_equip['point_mesure'].isin(points_masse)
+                    a_supprimer = lignes_equip[masque]
+                else:
+                    grille = lignes_equip.assign(**{"🗑️": False})
+                    colonnes = ["🗑️"] + [c for c in lignes_equip.columns if c != "🗑️"]
+                    grille_editee = st.data_editor(
+                        grille[colonnes],
+                        disabled=[c for c in colonnes if c != "🗑️"],
+                        use_container_width=True,
+                        hide_index=True,
+                        key=f"masse_suppr_grille_{type_masse}_{id_masse}"
+                    )
+                    a_supprimer = lignes_equip[grille_editee["🗑️"].to_numpy()]
+
+                st.caption(f"**{len(a_supprimer)}** enregistrement(s) sélectionné(s)")
+
+                if not a_supprimer.empty and not st.session_state.confirm_masse_delete:
+                    if st.button(
+                            f"🗑️ Supprimer {len(a_supprimer)} enregistrement(s)",
+                            type="secondary",
+                            key="btn_suppr_masse_initial",
+                            **widget_permission(
+                                Permission.SUPPRIMER_SUIVIS if est_suivi
+                                else Permission.SUPPRIMER_OBSERVATIONS
+                            )
+                    ):
+                        st.session_state.confirm_masse_delete = True
+                        st.rerun()
+
+                if not a_supprimer.empty and st.session_state.confirm_masse_delete:
+                    st.markdown("---")
+                    st.warning(
+                        f"⚠️ **Confirmer la suppression de {len(a_supprimer)} "
+                        f"{'suivi(s)' if est_suivi else 'observation(s)'} ?**\n\n"
+                        f"**Équipement :** {id_masse}\n\n"
+                        f"**Période :** {a_supprimer['date'].min().date()} → "
+                        f"{a_supprimer['date'].max().date()}"
+                    )
+
+                    col_confirm, col_cancel = st.columns(2)
+
+                    with col_confirm:
+                        if st.button(
+                                "✅ Confirmer",
+                                type="primary",
+                                use_container_width=True,
+                                key="btn_confirm_masse"
+                        ):
+                            if mode_masse == "Par période" and est_suivi:
+                                success, message = supprimer_suivis_periode(
+                                    id_masse, date_debut_masse, date_fin_masse, points_masse
+                                )
+                            elif mode_masse == "Par période":
+                                success, message = supprimer_observations_periode(
+                                    id_masse, date_debut_masse, date_fin_masse
+                                )
+                            elif est_suivi:
+                                success, message = supprimer_suivis_selection(
+                                    a_supprimer[['id_equipement', 'point_mesure', 'date']]
+                                )
+                            else:
+                                success, message = supprimer_observations_selection(
+                                    a_supprimer[['id_equipement', 'date']]
+                                )
+
+                            st.session_state.confirm_masse_delete = False
+                            if success:
+                                st.success(message)
+                                st.rerun()
+                            else:
+                                st.error(message)
+
+                    with col_cancel:
+                        if st.button(
+                                "❌ Annuler",
+                                use_container_width=True,
+                                key="btn_cancel_masse"
+                        ):
+                            st.session_state.confirm_masse_delete = False
+                            st.rerun()
+
     # =============================================================================
     # INFORMATIONS DE SÉCURITÉ
     # =============================================================================
@@ -454,12 +637,18 @@ def render():
            - Supprime TOUS les suivis associés
            - Action irréversible
 
-        4. **Bonnes pratiques :**
+        4. **Suppression en masse :**
+           - Choisissez le type de données puis l'équipement
+           - Par période : toutes les lignes entre deux dates (et points de mesure choisis)
+           - Sélection de lignes : cochez les lignes dans la grille
+           - Une seule opération pour l'ensemble de la sélection
+
+        5. **Bonnes pratiques :**
            - Vérifiez toujours les informations avant de confirmer
            - Exportez vos données régulièrement
            - En cas de doute, consultez un responsable
 
-        5. **Récupération :**
+        6. **Récupération :**
            - Aucune récupération possible après confirmation
            - Assurez-vous d'avoir des sauvegardes à jour
         """)
\ No newline at end of file
@@ -6,25 +6,24 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from data.data_manager import (
-    charger_equipements,
-    charger_observations,
-    charger_suivi,
     exporter_observations_excel,
     exporter_equipements_excel,
     exporter_suivi_excel
 )
+from data.contexte import ContexteDonnees
 
 
-def render():
+def render(ctx: ContexteDonnees):
     """Affiche l'onglet Téléchargements"""
 
     st.header("📥 Exports Excel")
     st.caption("Générez des fichiers Excel propres et exploitables")
 
     # Chargement données
-    df_equipements = charger_equipements()
-    df_observations = charger_observations()
-    df_suivi = charger_suivi()
+    df_equipements = ctx.equipements()
+    ref = ctx.referentiel()
+    df_observations = ctx.observations()
+    df_suivi = ctx.suivi()
 
     if df_equipements.empty:
         st.warning("⚠️ Aucun équipement disponible")
@@ -50,7 +49,7 @@ def render():
             with col_f1:
                 dept_filter = st.multiselect(
                     "Département(s)",
-                    options=sorted(df_equipements['departement'].unique()),
+                    options=ref.departements,
                     default=None,
                     placeholder="Tous les départements",
                     key="dl_obs_dept"
@@ -58,16 +57,9 @@ def render():
 
             with col_f2:
                 # Équipements disponibles
-                if dept_filter:
-                    equip_disponibles = df_equipements[
-                        df_equipements['departement'].isin(dept_filter)
-                    ]['id_equipement'].tolist()
-                else:
-                    equip_disponibles = df_equipements['id_equipement'].tolist()
-
                 equip_filter = st.multiselect(
                     "Équipement(s)",
-                    options=sorted(equip_disponibles),
+                    options=ref.equipements(dept_filter),
                     default=None,
                     placeholder="Tous les équipements",
                     key="dl_obs_equip"
@@ -103,9 +95,7 @@ def render():
             df_filtered = df_obs.copy()
 
             if dept_filter:
-                ids_dept = df_equipements[
-                    df_equipements['departement'].isin(dept_filter)
-                ]['id_equipement'].tolist()
+                ids_dept = ref.equipements(dept_filter)
                 df_filtered = df_filtered[df_filtered['id_equipement'].isin(ids_dept)]
 
             if equip_filter:
@@ -131,7 +121,7 @@ def render():
 
             with col_btn:
                 if len(df_filtered) > 0:
-                    fichier = exporter_observations_excel(df_filtered, df_equipements)
+                    fichier = exporter_observations_excel(df_filtered)
 
                     # Nom fichier intelligent
                     timestamp = datetime.now().strftime('%Y%m%d_%H%M')
@@ -165,7 +155,7 @@ def render():
         # Filtre département
         dept_filter_equip = st.multiselect(
             "Département(s)",
-            options=sorted(df_equipements['departement'].unique()),
+            options=ref.departements,
             default=None,
             placeholder="Tous les départements",
             key="dl_equip_dept"
@@ -323,7 +313,7 @@ def render():
 
             with col_btn3:
                 if len(df_filtered_suivi) > 0:
-                    fichier_suivi = exporter_suivi_excel(df_filtered_suivi, df_equipements)
+                    fichier_suivi = exporter_suivi_excel(df_filtered_suivi)
 
                     timestamp = datetime.now().strftime('%Y%m%d_%H%M')
                     nom_fichier_suivi = f"rapport_suivi_mesures_{timestamp}.xlsx"